@@ -0,0 +1,286 @@
+# -*- encoding: utf8 -*-
+#
+# Benchmarks of IPyIDA's hot paths, runnable without IDA thanks to a fake
+# idaapi module (see fake_idaapi.py):
+#
+#   python benchmarks/bench.py -o results.json
+#   python benchmarks/bench.py --quick --compare results.json
+#
+# Results are written as JSON, with the versions of the packages involved, so
+# runs before and after an upgrade can be compared.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import fake_idaapi
+
+_clock = time.perf_counter
+
+
+class _Printer(object):
+    "The part of IPython's pretty printer used by the formatters"
+
+    def __init__(self):
+        self.parts = []
+        self.text = self.parts.append
+
+
+class _NullStream(object):
+    "IDA's output window"
+
+    def write(self, string):
+        pass
+
+    def flush(self):
+        pass
+
+
+def measure(func, repeat):
+    "Returns: the sorted durations of repeat calls to func"
+    times = []
+    for _ in range(repeat):
+        start = _clock()
+        func()
+        times.append(_clock() - start)
+    return sorted(times)
+
+def result(name, params, times, work=None, unit=None):
+    """
+    Returns: a result entry. work is the amount of `unit` processed by one
+    call, to report a throughput.
+    """
+    entry = dict(
+        name=name, params=params, repeat=len(times),
+        min=times[0], median=times[len(times) // 2], max=times[-1],
+    )
+    if work is not None:
+        entry["throughput"] = work / entry["median"] if entry["median"] > 0 else None
+        entry["throughput_unit"] = unit + "/s"
+    return entry
+
+
+def bench_print_int(db, quick):
+    from ipyida import kernel
+    ipython_kernel = kernel.IPythonKernel()
+    count = 10000 if quick else 200000
+    span = db.max_ea - db.min_ea
+    # Addresses in the database, most of them symbolicated, and small ints
+    ints = [ db.min_ea + (i * 7919) % span if i % 4 else i % 10 for i in range(count) ]
+    results = []
+
+    def cold():
+        ipython_kernel.name_index.invalidate()
+        ipython_kernel.print_int(db.eas[len(db.eas) // 2], _Printer())
+    results.append(result("print_int_cold_index", dict(names=len(db.eas)),
+                          measure(cold, 3)))
+
+    def run():
+        printer = _Printer()
+        for i in ints:
+            ipython_kernel.print_int(i, printer)
+    results.append(result("print_int", dict(count=count, names=len(db.eas)),
+                          measure(run, 3 if quick else 5), count, "ints"))
+    return results
+
+def bench_print_bytes(db, quick):
+    from ipyida import kernel
+    sizes = [ 1 << 10, 64 << 10, 1 << 20 ]
+    if not quick:
+        sizes += [ 16 << 20, 100 << 20 ]
+    results = []
+    for size in sizes:
+        data = os.urandom(size)
+        def run():
+            kernel.IPythonKernel.print_bytes(data, _Printer())
+        results.append(result("print_bytes", dict(size=size),
+                              measure(run, 5), size / float(1 << 20), "MB"))
+    return results
+
+def bench_tee_write(db, quick):
+    import zmq
+    from jupyter_client.session import Session
+    from ipykernel.iostream import IOPubThread
+    from ipyida import kernel
+
+    kernel._ida_stdout = kernel._ida_stderr = _NullStream()
+    context = zmq.Context()
+    socket = context.socket(zmq.PUB)
+    socket.bind_to_random_port("tcp://127.0.0.1")
+    pub_thread = IOPubThread(socket)
+    pub_thread.start()
+    try:
+        stream = kernel.IDATeeOutStream(Session(), pub_thread, "stdout", watchfd=False)
+    except TypeError:
+        # ipykernel < 6
+        stream = kernel.IDATeeOutStream(Session(), pub_thread, "stdout")
+
+    lines = 2000 if quick else 50000
+    line = "x" * 79 + "\n"
+    original_mode = kernel._tee_options["mode"]
+    results = []
+    try:
+        for mode in ("tee", "console", "zmq"):
+            kernel._tee_options["mode"] = mode
+            def run():
+                for _ in range(lines):
+                    stream.write(line)
+                stream.flush()
+            results.append(result("tee_write", dict(mode=mode, lines=lines),
+                                  measure(run, 3), lines * len(line) / float(1 << 20), "MB"))
+    finally:
+        kernel._tee_options["mode"] = original_mode
+        stream.close()
+        pub_thread.stop()
+        socket.close()
+        context.term()
+    return results
+
+def bench_kernel(db, quick, names, segment_size):
+    """
+    Start a kernel in another process and measure its start time, and the
+    round-trip time of execute and complete requests through jupyter_client.
+    """
+    from jupyter_client import BlockingKernelClient
+
+    runtime_dir = tempfile.mkdtemp(prefix="ipyida-bench-runtime-")
+    connection_file = os.path.join(runtime_dir, "kernel-bench.json")
+    env = dict(os.environ, JUPYTER_RUNTIME_DIR=runtime_dir)
+    start = _clock()
+    with open(os.devnull, "w") as devnull:
+        process = subprocess.Popen(
+            [ sys.executable, os.path.join(BENCH_DIR, "kernel_process.py"),
+              connection_file, str(names), str(segment_size) ],
+            env=env, stdout=devnull, stderr=devnull
+        )
+    try:
+        while not os.path.exists(connection_file):
+            if process.poll() is not None:
+                raise RuntimeError("The kernel process exited with status {:d}".format(
+                    process.returncode
+                ))
+            time.sleep(0.01)
+        time.sleep(0.05)
+        client = BlockingKernelClient(connection_file=connection_file)
+        client.load_connection_file()
+        client.start_channels()
+        client.wait_for_ready(timeout=60)
+        start_time = _clock() - start
+        results = [ result("kernel_start", dict(names=names), [ start_time ]) ]
+
+        count = 20 if quick else 200
+        def execute():
+            client.execute_interactive("x = 1", store_history=False,
+                                       output_hook=lambda msg: None)
+        def complete():
+            msg_id = client.complete("idaapi.get_n")
+            while client.get_shell_msg(timeout=10)["parent_header"].get("msg_id") != msg_id:
+                pass
+        for name, func in (("execute_round_trip", execute),
+                           ("complete_round_trip", complete)):
+            func()  # warm up
+            results.append(result(name, dict(), measure(func, count)))
+        client.shutdown()
+        client.stop_channels()
+        process.wait(10)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    return results
+
+BENCHMARKS = [ "print_int", "print_bytes", "tee_write", "kernel" ]
+
+def environment():
+    versions = {}
+    for name in ("ipykernel", "jupyter_client", "IPython", "qtconsole", "zmq", "tornado"):
+        try:
+            versions[name] = __import__(name).__version__
+        except Exception:
+            versions[name] = None
+    try:
+        revision = subprocess.check_output(
+            [ "git", "rev-parse", "HEAD" ], cwd=BENCH_DIR, stderr=subprocess.STDOUT
+        ).decode().strip()
+    except Exception:
+        revision = None
+    return dict(
+        time=time.time(), python=sys.version.split()[0], platform=platform.platform(),
+        ipyida_revision=revision, versions=versions,
+    )
+
+def _key(entry):
+    return entry["name"] + json.dumps(entry["params"], sort_keys=True)
+
+def compare(results, baseline):
+    "Returns: lines comparing the median times of results with a baseline"
+    old = dict((_key(e), e) for e in baseline["results"])
+    lines = []
+    for entry in results:
+        previous = old.get(_key(entry))
+        if previous is None:
+            continue
+        ratio = entry["median"] / previous["median"] if previous["median"] > 0 else float("nan")
+        lines.append("{:22s} {:40s} {:10.6f} s -> {:10.6f} s  x{:.2f}".format(
+            entry["name"], json.dumps(entry["params"], sort_keys=True),
+            previous["median"], entry["median"], ratio
+        ))
+    return lines
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark IPyIDA without IDA")
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="JSON", help="compare with previous results")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs, fewer runs")
+    parser.add_argument("--only", default=",".join(BENCHMARKS),
+                        help="comma separated list among " + ", ".join(BENCHMARKS))
+    parser.add_argument("--names", type=int, default=100000,
+                        help="number of names in the fake database")
+    parser.add_argument("--segment-size", type=int, default=16 << 20,
+                        help="size in bytes of the fake database segment")
+    args = parser.parse_args(argv)
+
+    db = fake_idaapi.install(names=args.names, segment_size=args.segment_size)
+    results = []
+    for name in args.only.split(","):
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark " + name)
+        sys.stderr.write("-> {:s}\n".format(name))
+        if name == "kernel":
+            results += bench_kernel(db, args.quick, args.names, args.segment_size)
+        else:
+            results += globals()["bench_" + name](db, args.quick)
+
+    for entry in results:
+        line = "{:22s} {:40s} median {:10.6f} s".format(
+            entry["name"], json.dumps(entry["params"], sort_keys=True), entry["median"]
+        )
+        if entry.get("throughput") is not None:
+            line += "  {:12.1f} {:s}".format(entry["throughput"], entry["throughput_unit"])
+        print(line)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        print("")
+        print("\n".join(compare(results, baseline)))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(environment=environment(), results=results), f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
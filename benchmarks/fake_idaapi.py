@@ -0,0 +1,152 @@
+# -*- encoding: utf8 -*-
+#
+# A stand-in for the idaapi module, simulating a database with a configurable
+# number of names and segment size, so IPyIDA can be benchmarked on a machine
+# without IDA.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import bisect
+import os
+import random
+import sys
+import tempfile
+import types
+
+BADADDR = 0xFFFFFFFFFFFFFFFF
+FF_NAME = 0x4000
+
+
+class Segment(object):
+
+    def __init__(self, name, start_ea, end_ea):
+        self.name = name
+        self.start_ea = start_ea
+        self.end_ea = end_ea
+
+
+class FakeDatabase(object):
+    """
+    A database with one segment of segment_size bytes starting at base, and
+    `names` named addresses in it. One name out of mangled_ratio is a mangled
+    C++ name.
+    """
+
+    def __init__(self, names=100000, segment_size=16 << 20, base=0x400000,
+                 mangled_ratio=4, seed=0):
+        rng = random.Random(seed)
+        self.min_ea = base
+        self.max_ea = base + segment_size
+        self.segments = [ Segment(".text", base, base + segment_size) ]
+        count = min(names, segment_size // 4)
+        self.eas = sorted(base + 4 * i for i in rng.sample(range(segment_size // 4), count))
+        self.names = {}
+        for i, ea in enumerate(self.eas):
+            if i % mangled_ratio == 0:
+                self.names[ea] = "_ZN6Class{:d}6methodEv".format(i)
+            else:
+                self.names[ea] = "sub_{:X}".format(ea)
+        pattern = bytes(bytearray(range(256)))
+        self.data = pattern * (segment_size // 256) + pattern[:segment_size % 256]
+        self.user_dir = tempfile.mkdtemp(prefix="ipyida-bench-")
+        self.path = os.path.join(self.user_dir, "sample.i64")
+
+
+def make_module(db):
+    "Returns: a module with the parts of idaapi used by IPyIDA, backed by db"
+    m = types.ModuleType("idaapi")
+    m.BADADDR = BADADDR
+    m.IDA_SDK_VERSION = 900
+    m.PATH_TYPE_IDB = 1
+    m.MNG_SHORT_FORM = 0
+    m.MFF_FAST = 0
+    m.MFF_READ = 1
+    m.MFF_WRITE = 2
+    m.MFF_NOWAIT = 4
+    m.database = db
+
+    m.get_kernel_version = lambda: "9.0"
+    m.get_user_idadir = lambda: db.user_dir
+    m.get_path = lambda kind: db.path
+    m.get_input_file_path = lambda: db.path[:-len(".i64")]
+    m.get_root_filename = lambda: os.path.basename(m.get_input_file_path())
+    m.auto_is_ok = lambda: True
+    m.auto_wait = lambda: True
+    m.qexit = lambda code: sys.exit(code)
+    m.inf_get_min_ea = lambda: db.min_ea
+    m.inf_get_max_ea = lambda: db.max_ea
+    m.inf_is_be = lambda: False
+
+    m.get_nlist_size = lambda: len(db.eas)
+    m.get_nlist_ea = lambda i: db.eas[i]
+    m.get_flags = lambda ea: FF_NAME if ea in db.names else 0
+    m.has_name = lambda flags: bool(flags & FF_NAME)
+    m.get_name = lambda ea: db.names.get(ea, "")
+
+    def demangle_name(name, flags):
+        if not name.startswith("_ZN"):
+            return None
+        # _ZN6Class12methodEv -> Class1::method()
+        rest = name[3:]
+        parts = []
+        while rest and rest[0].isdigit():
+            i = 0
+            while rest[i].isdigit():
+                i += 1
+            length = int(rest[:i])
+            parts.append(rest[i:i+length])
+            rest = rest[i+length:]
+        return "::".join(parts) + "()"
+    m.demangle_name = demangle_name
+
+    def get_bytes(ea, size):
+        if ea < db.min_ea or ea >= db.max_ea:
+            return None
+        return db.data[ea - db.min_ea:ea - db.min_ea + size]
+    m.get_bytes = get_bytes
+    m.get_qword = lambda ea: int.from_bytes(get_bytes(ea, 8), "little")
+
+    def getseg(ea):
+        starts = [ s.start_ea for s in db.segments ]
+        i = bisect.bisect_right(starts, ea) - 1
+        if i >= 0 and ea < db.segments[i].end_ea:
+            return db.segments[i]
+        return None
+    m.getseg = getseg
+    m.get_segm_by_name = lambda name: next((s for s in db.segments if s.name == name), None)
+    m.get_item_head = lambda ea: ea
+    m.get_item_size = lambda ea: 1
+    m.get_item_end = lambda ea: ea + 1
+    m.get_func = lambda ea: None
+    m.get_fchunk = lambda ea: None
+
+    # Timers never fire: there is no UI loop
+    m.register_timer = lambda interval, callback: object()
+    m.unregister_timer = lambda timer: True
+    m.execute_sync = lambda func, flags: func()
+
+    class Hooks(object):
+        def hook(self):
+            return True
+        def unhook(self):
+            return True
+    m.IDB_Hooks = type("IDB_Hooks", (Hooks,), {})
+    m.IDP_Hooks = type("IDP_Hooks", (Hooks,), {})
+    m.UI_Hooks = type("UI_Hooks", (Hooks,), {})
+    return m
+
+def install(db=None, **kwargs):
+    """
+    Make `import idaapi` return a fake module backed by db, a new
+    FakeDatabase(**kwargs) by default.
+
+    Returns: the FakeDatabase
+    """
+    db = db or FakeDatabase(**kwargs)
+    sys.modules["idaapi"] = make_module(db)
+    # Set by IDAPython, used by IDATeeOutStream
+    main = sys.modules["__main__"]
+    main._orig_stdout = sys.stdout
+    main._orig_stderr = sys.stderr
+    return db
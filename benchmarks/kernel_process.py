@@ -0,0 +1,22 @@
+# -*- encoding: utf8 -*-
+#
+# Serves an IPyIDA kernel on a fake database, for the round-trip benchmarks
+# of bench.py:
+#
+#   python kernel_process.py <connection file> <names> <segment size>
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_idaapi
+
+if __name__ == "__main__":
+    connection_file, names, segment_size = sys.argv[1:4]
+    fake_idaapi.install(names=int(names), segment_size=int(segment_size))
+    from ipyida import headless
+    headless.serve(connection_file)
@@ -5,3 +5,5 @@
 # Copyright (c) 2015-2018 ESET
 # Author: Marc-Etienne M.Léveillé <leveille@eset.com>
 # See LICENSE file for redistribution.
+
+from ipyida.lazy import lazy_import
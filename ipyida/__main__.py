@@ -0,0 +1,63 @@
+# -*- encoding: utf8 -*-
+#
+# The `ipyida` command, used outside of IDA:
+#
+#   ipyida connect <idb> [jupyter console options]
+#   ipyida list
+#   ipyida pool ...
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import subprocess
+import sys
+
+USAGE = """usage: ipyida <command> [args]
+
+commands:
+  connect <idb>   open a console on the kernel of the IDA instance with <idb>
+  list            list the running kernels and their database
+  pool            run a script on many databases (see ipyida pool --help)
+"""
+
+def connect(args):
+    from .registry import Registry
+    if not args:
+        sys.stderr.write("usage: ipyida connect <idb> [jupyter console options]\n")
+        return 2
+    entry = Registry().lookup(args[0])
+    if entry is None:
+        sys.stderr.write("No IPyIDA kernel for {:s}, see `ipyida list`\n".format(args[0]))
+        return 1
+    return subprocess.call(
+        [ sys.executable, "-m", "jupyter", "console",
+          "--existing", entry["connection_file"] ] + list(args[1:])
+    )
+
+def list_kernels(args):
+    from .registry import Registry
+    for entry in Registry().entries():
+        sys.stdout.write("{:>8d}  {:s}\n          {:s}\n".format(
+            entry["pid"], entry["idb"], entry["connection_file"]
+        ))
+    return 0
+
+def pool(args):
+    from . import pool
+    return pool.main(args)
+
+COMMANDS = {
+    "connect": connect,
+    "list": list_kernels,
+    "pool": pool,
+}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        sys.stderr.write(USAGE)
+        return 2
+    return COMMANDS[argv[0]](argv[1:])
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,572 @@
+# -*- encoding: utf8 -*-
+#
+# This module keeps indexes of the database (functions, cross references,
+# strings and names) in a directory next to the IDB, so they don't have to be
+# rebuilt every time the database is opened.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import abc
+import array
+import bisect
+import json
+import mmap
+import os
+import sys
+
+import idaapi
+
+from .changes import dispatcher
+
+# Bump when the layout of the files changes
+FORMAT_VERSION = 1
+
+# Netnode storing the change counter of the index in the IDB. The sidecar is
+# only used if its counter is the one saved in the IDB.
+NETNODE_NAME = "$ ipyida.analysis_index"
+
+# abc.ABC doesn't exist in Python 2
+_ABC = abc.ABCMeta("_ABC", (object,), {})
+
+
+class TextColumn(object):
+    "Sequence of strings stored as UTF-8 in a blob, with their offsets"
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        offsets = array.array("Q", [ 0 ])
+        parts = []
+        position = 0
+        for string in strings:
+            data = string.encode("utf-8")
+            parts.append(data)
+            position += len(data)
+            offsets.append(position)
+        return cls(b"".join(parts), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return bytes(self.blob[self.offsets[i]:self.offsets[i+1]]).decode("utf-8", "replace")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class Table(_ABC):
+    """
+    Rows sorted by their first column. Columns are read from the sidecar
+    directory (memory-mapped) or built from the database on first access.
+
+    The changes of the database record the keys they touched. Before the
+    table is used or saved, the rows of these keys are queried again from the
+    database and merged, instead of rebuilding the whole table.
+    """
+
+    # Tuple of (name, typecode), typecode "text" for strings
+    COLUMNS = ()
+
+    # Beyond this number of touched keys, the table is rebuilt rather than
+    # merged, and changes stop being recorded
+    MAX_TOUCHED = 10000
+
+    def __init__(self, index, name):
+        self.index = index
+        self.name = name
+        self._columns = None
+        self._maps = []
+        self.touched = set()
+        # Set when the table can't be updated from touched keys
+        self.stale = False
+        # The columns in memory differ from the files
+        self.modified = False
+        # The columns were built in this session, or loaded while every
+        # change of the database was tracked. Only those are saved.
+        self.trusted = False
+
+    @abc.abstractmethod
+    def build(self):
+        "Returns: all the rows, queried from the database"
+
+    @abc.abstractmethod
+    def rows_for(self, key):
+        "Returns: the rows of key, queried from the database"
+
+    def touch(self, key):
+        if self.stale:
+            return
+        self.touched.add(key)
+        if len(self.touched) > self.MAX_TOUCHED:
+            self.invalidate()
+
+    def invalidate(self):
+        "The whole table has to be rebuilt"
+        self.stale = True
+        self.touched.clear()
+
+    @property
+    def columns(self):
+        "dict of column name -> sequence"
+        if self._columns is None:
+            self._columns = self.index.load_table(self)
+            if self._columns is None:
+                self._rebuild()
+            else:
+                # Changes made before the index was hooked are unknown
+                self.trusted = self.index.tracking
+        if self.stale:
+            self._rebuild()
+        elif self.touched:
+            self._merge()
+        return self._columns
+
+    def _rebuild(self):
+        self._set_rows(self.build())
+        self.touched.clear()
+        self.stale = False
+        self.trusted = True
+
+    def __len__(self):
+        return len(self.columns[self.COLUMNS[0][0]])
+
+    def _rows(self):
+        columns = self._columns
+        return list(zip(*[ columns[name] for name, _ in self.COLUMNS ]))
+
+    def _set_rows(self, rows):
+        rows.sort()
+        self._columns = {}
+        for i, (name, typecode) in enumerate(self.COLUMNS):
+            values = [ row[i] for row in rows ]
+            if typecode == "text":
+                self._columns[name] = TextColumn.from_strings(values)
+            else:
+                self._columns[name] = array.array(typecode, values)
+        self.modified = True
+        # The mapped columns were replaced
+        self._release_maps(keep=False)
+
+    def _merge(self):
+        touched = self.touched
+        self.touched = set()
+        rows = [ row for row in self._rows() if row[0] not in touched ]
+        for key in touched:
+            rows.extend(self.rows_for(key))
+        self._set_rows(rows)
+
+    def _release_maps(self, keep=True):
+        "Close the mapped files, copying the mapped columns in memory if keep is set"
+        if not self._maps:
+            return
+        if keep and self._columns is not None:
+            for name, column in list(self._columns.items()):
+                if isinstance(column, TextColumn):
+                    self._columns[name] = TextColumn(bytes(column.blob), array.array("Q", column.offsets))
+                elif isinstance(column, memoryview):
+                    self._columns[name] = array.array(column.format, column)
+        for mapped, view in self._maps:
+            view.release()
+            mapped.close()
+        self._maps = []
+
+    def _range(self, column, value):
+        "Returns: the slice of rows whose column equals value"
+        values = self.columns[column]
+        start = bisect.bisect_left(values, value)
+        return start, bisect.bisect_right(values, value, start)
+
+
+class FunctionTable(Table):
+    COLUMNS = (("start", "Q"), ("end", "Q"))
+
+    def build(self):
+        import idautils
+        rows = []
+        for start in idautils.Functions():
+            func = idaapi.get_func(start)
+            rows.append((start, func.end_ea))
+        return rows
+
+    def rows_for(self, start):
+        func = idaapi.get_func(start)
+        if func is None or func.start_ea != start:
+            return []
+        return [ (start, func.end_ea) ]
+
+    @property
+    def starts(self):
+        return self.columns["start"]
+
+    @property
+    def ends(self):
+        return self.columns["end"]
+
+    def find(self, ea):
+        "Returns: (start, end) of the function containing ea, or None"
+        starts = self.starts
+        i = bisect.bisect_right(starts, ea) - 1
+        if i >= 0 and ea < self.ends[i]:
+            return starts[i], self.ends[i]
+        return None
+
+
+class XrefTable(Table):
+    # Sorted by source. The reverse columns are the same references sorted by
+    # target, for refs_to.
+    COLUMNS = (("frm", "Q"), ("to", "Q"), ("type", "B"))
+    REVERSE_COLUMNS = (("rto", "Q"), ("rfrm", "Q"), ("rtype", "B"))
+
+    def build(self):
+        import idautils
+        rows = []
+        for seg_ea in idautils.Segments():
+            seg = idaapi.getseg(seg_ea)
+            for head in idautils.Heads(seg.start_ea, seg.end_ea):
+                rows.extend(self.rows_for(head))
+        return rows
+
+    def rows_for(self, ea):
+        import idautils
+        # XREF_FAR skips the ordinary flow to the next instruction
+        return [ (ea, x.to, x.type) for x in idautils.XrefsFrom(ea, idaapi.XREF_FAR) ]
+
+    def _set_rows(self, rows):
+        super(XrefTable, self)._set_rows(rows)
+        reverse = sorted((to, frm, kind) for frm, to, kind in rows)
+        for i, (name, typecode) in enumerate(self.REVERSE_COLUMNS):
+            self._columns[name] = array.array(typecode, [ row[i] for row in reverse ])
+
+    def refs_from(self, ea):
+        "Returns: a list of (to, type) of the references from ea"
+        start, end = self._range("frm", ea)
+        columns = self.columns
+        return list(zip(columns["to"][start:end], columns["type"][start:end]))
+
+    def refs_to(self, ea):
+        "Returns: a list of (from, type) of the references to ea"
+        start, end = self._range("rto", ea)
+        columns = self.columns
+        return list(zip(columns["rfrm"][start:end], columns["rtype"][start:end]))
+
+
+class StringTable(Table):
+    COLUMNS = (("ea", "Q"), ("length", "I"), ("type", "I"), ("text", "text"))
+
+    def build(self):
+        import idautils
+        return [ (s.ea, s.length, s.strtype, str(s)) for s in idautils.Strings() ]
+
+    def rows_for(self, ea):
+        # IDA only lists strings for the whole database
+        return [ row for row in self.build() if row[0] == ea ]
+
+    def touch(self, key):
+        # A change can create or split strings that don't start at key
+        self.invalidate()
+
+    def __getitem__(self, i):
+        columns = self.columns
+        return columns["ea"][i], columns["text"][i]
+
+    def search(self, substring):
+        "Returns: a list of (ea, text) of the strings containing substring"
+        columns = self.columns
+        eas, texts = columns["ea"], columns["text"]
+        return [ (eas[i], text) for i, text in enumerate(texts) if substring in text ]
+
+
+class NameTable(Table):
+    COLUMNS = (("ea", "Q"), ("name", "text"))
+
+    def __init__(self, index, name):
+        super(NameTable, self).__init__(index, name)
+        self._by_name = None
+        self._by_name_columns = None
+
+    def build(self):
+        import idautils
+        return list(idautils.Names())
+
+    def rows_for(self, ea):
+        name = idaapi.get_name(ea)
+        return [ (ea, name) ] if name else []
+
+    def name_at(self, ea):
+        "Returns: the name at ea, or None"
+        start, end = self._range("ea", ea)
+        return self.columns["name"][start] if start < end else None
+
+    def lookup(self, name):
+        "Returns: the address of name, or None"
+        columns = self.columns
+        if self._by_name is None or self._by_name_columns is not columns:
+            self._by_name = dict(zip(columns["name"], columns["ea"]))
+            self._by_name_columns = columns
+        return self._by_name.get(name)
+
+
+class AnalysisIndex(object):
+    """
+    The indexes of the current database. Tables are loaded on first access,
+    from the sidecar directory if it matches the database, and written back
+    when the database is saved.
+    """
+
+    def __init__(self):
+        self.functions = FunctionTable(self, "functions")
+        self.xrefs = XrefTable(self, "xrefs")
+        self.strings = StringTable(self, "strings")
+        self.names = NameTable(self, "names")
+        self.tables = [ self.functions, self.xrefs, self.strings, self.names ]
+        self._meta = None
+        # Every change since the database was opened was seen, so tables
+        # loaded from the sidecar and kept up to date can be saved again
+        self.tracking = False
+        self._ui_hooks = None
+
+    def watch(self):
+        """
+        Hook the index when a database with a saved index is opened, so its
+        tables can be trusted whenever the kernel starts. Databases without
+        one aren't tracked until the index is used.
+        """
+        if self._ui_hooks is None and hasattr(idaapi, "UI_Hooks"):
+            self._ui_hooks = _IndexUIHooks(self)
+            self._ui_hooks.hook()
+
+    def unwatch(self):
+        if self._ui_hooks is not None:
+            self._ui_hooks.unhook()
+            self._ui_hooks = None
+
+    def database_opened(self):
+        if self._saved_counter() is not None:
+            self.hook()
+            self.tracking = True
+
+    def hook(self):
+        "Track changes to the database. Nothing is loaded until a table is used."
+        if dispatcher.is_subscribed(self):
+            return
+        dispatcher.subscribe(self)
+        # Hooked before the database was opened
+        self.tracking = not idaapi.get_root_filename()
+
+    def unhook(self):
+        dispatcher.unsubscribe(self)
+        self.tracking = False
+
+    # Changes dispatched by ipyida.changes
+
+    def name_changed(self, ea):
+        self.names.touch(ea)
+
+    def function_changed(self, start_ea):
+        self.functions.touch(start_ea)
+
+    def xref_changed(self, frm):
+        self.xrefs.touch(frm)
+
+    def bytes_changed(self, ea):
+        self.strings.touch(ea)
+
+    def items_changed(self, ea):
+        self.strings.touch(ea)
+
+    def everything_changed(self):
+        for table in self.tables:
+            table.invalidate()
+
+    def database_saving(self):
+        try:
+            self.save()
+        except (IOError, OSError) as e:
+            sys.stderr.write("[IPyIDA] Could not save the analysis index: {}\n".format(e))
+
+    def database_closing(self):
+        self.close()
+
+    @property
+    def directory(self):
+        return idaapi.get_path(idaapi.PATH_TYPE_IDB) + ".ipyida"
+
+    @staticmethod
+    def _identity():
+        md5 = idaapi.retrieve_input_file_md5() if hasattr(idaapi, "retrieve_input_file_md5") else None
+        return dict(
+            input_md5=md5.hex() if isinstance(md5, bytes) else md5,
+            root_filename=idaapi.get_root_filename(),
+        )
+
+    @staticmethod
+    def _saved_counter():
+        "Returns: the counter saved in the IDB, or None if there is none"
+        # Reading must not create the netnode, that would change the IDB
+        node = idaapi.netnode(NETNODE_NAME, 0, False)
+        if node.index() == idaapi.BADNODE:
+            return None
+        return node.altval(0)
+
+    def _load_meta(self):
+        """
+        Returns: the metadata of the sidecar directory, or None if it's
+        missing or doesn't match the database
+        """
+        if self._meta is not None:
+            return self._meta
+        try:
+            with open(os.path.join(self.directory, "meta.json"), "r") as f:
+                meta = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if meta.get("format") != FORMAT_VERSION or \
+           meta.get("byteorder") != sys.byteorder or \
+           meta.get("identity") != self._identity() or \
+           meta.get("counter") != self._saved_counter():
+            # Another database, or the IDB wasn't saved with this index
+            return None
+        self._meta = meta
+        return meta
+
+    def _column_path(self, table, column, suffix):
+        return os.path.join(self.directory, "{:s}.{:s}.{:s}".format(table.name, column, suffix))
+
+    def _map(self, table, path, typecode):
+        if os.path.getsize(path) == 0:
+            return array.array(typecode) if typecode else b""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        if typecode:
+            view = view.cast(typecode)
+        table._maps.append((mapped, view))
+        return view
+
+    def load_table(self, table):
+        "Returns: the columns of table from the sidecar, or None"
+        meta = self._load_meta()
+        if meta is None or table.name not in meta["tables"]:
+            return None
+        columns = {}
+        try:
+            for name, typecode in table.COLUMNS + getattr(table, "REVERSE_COLUMNS", ()):
+                if typecode == "text":
+                    columns[name] = TextColumn(
+                        self._map(table, self._column_path(table, name, "blob"), None),
+                        self._map(table, self._column_path(table, name, "offsets"), "Q"),
+                    )
+                else:
+                    columns[name] = self._map(table, self._column_path(table, name, typecode), typecode)
+        except (IOError, OSError, ValueError):
+            return None
+        table.modified = False
+        return columns
+
+    def _write(self, path, data):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            if isinstance(data, array.array):
+                data.tofile(f)
+            else:
+                f.write(data)
+        os.replace(tmp_path, path)
+
+    def _keep(self, table, tables):
+        "Returns: True if the table can be saved, or its files kept, as up to date"
+        if table.stale:
+            # Not rebuilt while IDA saves, the next session builds it
+            return False
+        if table._columns is None:
+            return self.tracking and table.name in tables
+        return table.trusted
+
+    def save(self):
+        """
+        Write the tables changed in this session to the sidecar directory.
+        Called when the database is saved. The index is only used next time
+        if the IDB is saved too.
+
+        Tables that may not match the database, because they are stale or
+        changes happened before the index was hooked, are dropped from the
+        sidecar instead.
+        """
+        meta = self._load_meta() or dict(tables=[], counter=None)
+        tables = set(meta["tables"])
+        written = False
+        for table in self.tables:
+            if not self._keep(table, tables):
+                tables.discard(table.name)
+                continue
+            if table._columns is None and not table.touched:
+                # The files are up to date
+                continue
+            columns = table.columns
+            if not table.modified:
+                continue
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            if sys.platform == "win32":
+                # Mapped files can't be replaced on Windows
+                table._release_maps()
+            for name, typecode in table.COLUMNS + getattr(table, "REVERSE_COLUMNS", ()):
+                column = columns[name]
+                if typecode == "text":
+                    self._write(self._column_path(table, name, "blob"), column.blob)
+                    self._write(self._column_path(table, name, "offsets"), column.offsets)
+                else:
+                    self._write(self._column_path(table, name, typecode), column)
+            table.modified = False
+            tables.add(table.name)
+            written = True
+        if written:
+            counter = (self._saved_counter() or 0) + 1
+            idaapi.netnode(NETNODE_NAME, 0, True).altset(0, counter)
+        elif tables != set(meta["tables"]):
+            # Only dropped tables, the IDB doesn't change
+            counter = meta["counter"]
+        else:
+            return
+        meta = dict(
+            format=FORMAT_VERSION, byteorder=sys.byteorder, identity=self._identity(),
+            counter=counter, tables=sorted(tables),
+        )
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        self._write(os.path.join(self.directory, "meta.json"), json.dumps(meta).encode("utf-8"))
+        self._meta = meta
+
+    def close(self):
+        "Forget the loaded tables, for instance when the database is closed"
+        for table in self.tables:
+            table._release_maps(keep=False)
+            table._columns = None
+            table.touched.clear()
+            table.stale = False
+            table.trusted = False
+        self._meta = None
+        # The next database is opened while hooked
+        self.tracking = dispatcher.is_subscribed(self)
+
+
+if hasattr(idaapi, "UI_Hooks"):
+    class _IndexUIHooks(idaapi.UI_Hooks):
+
+        def __init__(self, index):
+            super(_IndexUIHooks, self).__init__()
+            self.index = index
+
+        def database_inited(self, *args):
+            self.index.database_opened()
+            return 0
+
+
+analysis_index = AnalysisIndex()
@@ -0,0 +1,441 @@
+# -*- encoding: utf8 -*-
+#
+# This module implements the %%background cell magic to run code in a worker
+# thread while keeping IDA's UI responsive.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import ast
+import functools
+import itertools
+import sys
+import threading
+import time
+import types
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+import idaapi
+
+# Modules whose functions must be called from IDA's main thread
+_IDA_MODULE_NAMES = ("idaapi", "idc", "idautils")
+
+def _is_ida_module_name(name):
+    return name in _IDA_MODULE_NAMES or name.startswith("ida_")
+
+def is_main_thread():
+    return threading.current_thread() is threading.main_thread()
+
+def execute_on_main_thread(func, *args, **kwargs):
+    """
+    Call func(*args, **kwargs) on IDA's main thread with execute_sync and
+    return its result. Exceptions are raised in the calling thread. If func
+    returns a generator, it's consumed on the main thread and a list is
+    returned.
+
+    func is called directly when already on the main thread.
+    """
+    if is_main_thread():
+        return func(*args, **kwargs)
+    result = {}
+    def thunk():
+        try:
+            value = func(*args, **kwargs)
+            if isinstance(value, types.GeneratorType):
+                value = list(value)
+            result["value"] = value
+        except BaseException:
+            result["error"] = sys.exc_info()
+        return 0
+    idaapi.execute_sync(thunk, idaapi.MFF_WRITE)
+    if "error" in result:
+        raise result["error"][1]
+    return result.get("value")
+
+def on_main_thread(func):
+    """
+    Decorator making every call of func run entirely on IDA's main thread.
+
+    Each call to an IDA API from a background cell is a round trip to the main
+    thread. Decorating a function doing many IDA calls batches them all in a
+    single round trip:
+
+        @on_main_thread
+        def function_sizes():
+            return [ (ea, idc.get_func_attr(ea, idc.FUNCATTR_END) - ea)
+                     for ea in idautils.Functions() ]
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return execute_on_main_thread(func, *args, **kwargs)
+    return wrapper
+
+
+def _is_ida_object(value):
+    "Returns: True if value is an instance of a class of an IDA module"
+    module = getattr(type(value), "__module__", None) or ""
+    return _is_ida_module_name(module)
+
+def _unwrap(value):
+    if isinstance(value, (MainThreadObject, MainThreadClass)):
+        return object.__getattribute__(value, "_object")
+    return value
+
+def _proxy_value(value):
+    """
+    Returns: value, or a proxy sending its use to the main thread if it's an
+    IDA module, class, or instance of an IDA class. Lists and tuples are
+    proxied item by item.
+    """
+    if isinstance(value, types.ModuleType):
+        return _proxy_module(value)
+    if type(value) in (list, tuple):
+        return type(value)(_proxy_value(item) for item in value)
+    if isinstance(value, type):
+        # Exceptions are raised in the calling thread and must be usable in
+        # except clauses
+        if _is_ida_module_name(value.__module__ or "") and \
+           not issubclass(value, BaseException):
+            return MainThreadClass(value)
+        return value
+    if _is_ida_object(value) and not isinstance(value, BaseException):
+        return MainThreadObject(value)
+    return value
+
+def _main_thread_callable(func):
+    """
+    Returns: a function calling func on the main thread, with proxies given
+    as arguments unwrapped and the result proxied
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        args = [ _unwrap(arg) for arg in args ]
+        kwargs = dict((k, _unwrap(v)) for k, v in kwargs.items())
+        return _proxy_value(execute_on_main_thread(func, *args, **kwargs))
+    return wrapper
+
+def _main_thread_attribute(obj, name):
+    value = execute_on_main_thread(getattr, obj, name)
+    if callable(value) and not isinstance(value, type):
+        return _main_thread_callable(value)
+    return _proxy_value(value)
+
+
+class MainThreadModule(types.ModuleType):
+    """
+    Proxy of an IDA module. Functions of the module are called on the main
+    thread, and the IDA objects they return are proxied too. Constants are
+    returned as is.
+    """
+
+    def __init__(self, module):
+        super(MainThreadModule, self).__init__(module.__name__, module.__doc__)
+        self.__dict__["_module"] = module
+        self.__dict__["_wrappers"] = {}
+
+    def __getattr__(self, name):
+        value = getattr(self._module, name)
+        if isinstance(value, (type, types.ModuleType)) or not callable(value):
+            return _proxy_value(value)
+        wrapper = self._wrappers.get(name)
+        if wrapper is None or wrapper.__wrapped__ is not value:
+            wrapper = _main_thread_callable(value)
+            self._wrappers[name] = wrapper
+        return wrapper
+
+    def __dir__(self):
+        return dir(self._module)
+
+
+class MainThreadClass(object):
+    """
+    Proxy of a class of an IDA module. Instances are created on the main
+    thread and proxied with MainThreadObject. isinstance works with the
+    proxy, and subclassing it subclasses the real class, whose methods then
+    run in the calling thread.
+    """
+
+    def __init__(self, cls):
+        object.__setattr__(self, "_object", cls)
+
+    def __call__(self, *args, **kwargs):
+        return _main_thread_callable(self._object)(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return _main_thread_attribute(self._object, name)
+
+    def __instancecheck__(self, instance):
+        return isinstance(_unwrap(instance), self._object)
+
+    def __subclasscheck__(self, subclass):
+        return issubclass(_unwrap(subclass), self._object)
+
+    def __mro_entries__(self, bases):
+        return (self._object,)
+
+    def __repr__(self):
+        return repr(self._object)
+
+    def __dir__(self):
+        return dir(self._object)
+
+
+class MainThreadObject(object):
+    """
+    Proxy of an instance of an IDA class (func_t, insn_t, cfunc_t, the
+    iterables of idautils...). Attributes are read and written, and methods
+    called, on the main thread. Iterating it builds a list on the main thread.
+    """
+
+    def __init__(self, obj):
+        object.__setattr__(self, "_object", obj)
+
+    def __getattr__(self, name):
+        return _main_thread_attribute(self._object, name)
+
+    def __setattr__(self, name, value):
+        execute_on_main_thread(setattr, self._object, name, _unwrap(value))
+
+    def __iter__(self):
+        return iter(_proxy_value(execute_on_main_thread(list, self._object)))
+
+    def __len__(self):
+        return execute_on_main_thread(len, self._object)
+
+    def __getitem__(self, key):
+        return _proxy_value(execute_on_main_thread(self._object.__getitem__, key))
+
+    def __contains__(self, item):
+        return execute_on_main_thread(self._object.__contains__, _unwrap(item))
+
+    def __bool__(self):
+        return execute_on_main_thread(bool, self._object)
+    __nonzero__ = __bool__
+
+    def __eq__(self, other):
+        return execute_on_main_thread(lambda: self._object == _unwrap(other))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return execute_on_main_thread(hash, self._object)
+
+    def __str__(self):
+        return execute_on_main_thread(str, self._object)
+
+    def __repr__(self):
+        return execute_on_main_thread(repr, self._object)
+
+    def __dir__(self):
+        return dir(self._object)
+
+_proxies = {}
+
+# Module name -> whether the module uses IDA, see _module_uses_ida
+_uses_ida = {}
+
+def _refers_to_ida(namespace):
+    """
+    Returns: True if namespace (globals of a module or function) holds an IDA
+    module, or a function or class of one
+    """
+    for value in list(namespace.values()):
+        if isinstance(value, types.ModuleType):
+            # __dict__ doesn't trigger the import of a LazyModule
+            name = value.__dict__.get("__name__") or ""
+        elif callable(value):
+            name = getattr(value, "__module__", None) or ""
+        else:
+            continue
+        if isinstance(name, str) and _is_ida_module_name(name):
+            return True
+    return False
+
+def _module_uses_ida(module):
+    """
+    Returns: True if the functions of module may call IDA: it refers to IDA
+    modules or functions, or it's a package with a submodule that does
+    """
+    name = module.__dict__.get("__name__") or ""
+    uses_ida = _uses_ida.get(name)
+    if uses_ida is None:
+        _uses_ida[name] = False
+        uses_ida = _refers_to_ida(module.__dict__) or any(
+            _module_uses_ida(value) for value in list(module.__dict__.values())
+            if isinstance(value, types.ModuleType) and
+               (value.__dict__.get("__name__") or "").startswith(name + ".")
+        )
+        _uses_ida[name] = uses_ida
+    return uses_ida
+
+def _proxy_module(module):
+    """
+    Returns: a proxy of module if it's an IDA module, or a module using IDA
+    (ipyida.bulk, helpers of ipyidarc.py...) whose functions then run
+    entirely on the main thread
+    """
+    if not isinstance(module, types.ModuleType) or \
+       isinstance(module, MainThreadModule) or \
+       not (_is_ida_module_name(module.__name__) or _module_uses_ida(module)):
+        return module
+    proxy = _proxies.get(module.__name__)
+    if proxy is None:
+        proxy = _proxies[module.__name__] = MainThreadModule(module)
+    return proxy
+
+def _import(name, globals=None, locals=None, fromlist=(), level=0):
+    return _proxy_module(builtins.__import__(name, globals, locals, fromlist, level))
+
+def _make_namespace(user_ns):
+    ns = dict(user_ns)
+    # id(globals) -> whether they refer to IDA
+    refers_to_ida = {}
+    for name, value in user_ns.items():
+        # Lists and tuples are left as is, to be shared with the console
+        if type(value) in (list, tuple):
+            continue
+        if isinstance(value, types.FunctionType):
+            # Functions defined in the console or imported from a module
+            # using IDA run on the main thread
+            key = id(value.__globals__)
+            if key not in refers_to_ida:
+                refers_to_ida[key] = _refers_to_ida(value.__globals__)
+            if refers_to_ida[key]:
+                ns[name] = _main_thread_callable(value)
+            continue
+        ns[name] = _proxy_value(value)
+    proxied_builtins = dict(vars(builtins))
+    proxied_builtins["__import__"] = _import
+    ns["__builtins__"] = proxied_builtins
+    return ns
+
+
+class BackgroundCell(object):
+    "A cell running in a worker thread"
+
+    _numbers = itertools.count(1)
+
+    def __init__(self, shell, source, result_name=None):
+        self.shell = shell
+        self.source = source
+        self.result_name = result_name
+        self.number = next(self._numbers)
+        self.result = None
+        self.error = None
+        self.elapsed = None
+        self.done = threading.Event()
+        self._ns = _make_namespace(shell.user_ns)
+        # The values of the names before the cell runs, to only copy back the
+        # names it bound
+        self._initial_ns = dict(self._ns)
+        self._thread = threading.Thread(
+            target=self._run, name="ipyida-background-{:d}".format(self.number)
+        )
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        "Wait for the cell to complete. Must not be called from the main thread."
+        if is_main_thread():
+            raise RuntimeError("Waiting on the main thread would deadlock IDA")
+        return self.done.wait(timeout)
+
+    @property
+    def running(self):
+        return not self.done.is_set()
+
+    def _run(self):
+        filename = "<background-{:d}>".format(self.number)
+        start = time.time()
+        try:
+            tree = ast.parse(self.source, filename)
+            last_expr = None
+            if tree.body and isinstance(tree.body[-1], ast.Expr):
+                last_expr = ast.Expression(tree.body.pop().value)
+            exec(compile(tree, filename, "exec"), self._ns)
+            if last_expr is not None:
+                self.result = eval(compile(last_expr, filename, "eval"), self._ns)
+        except BaseException:
+            self.error = sys.exc_info()
+        self.elapsed = time.time() - start
+        # Displaying the result may read the database (symbolication)
+        idaapi.execute_sync(self._deliver, idaapi.MFF_WRITE | idaapi.MFF_NOWAIT)
+
+    def _deliver(self):
+        # Runs on the main thread once the cell is completed
+        try:
+            user_ns = self.shell.user_ns
+            initial_ns = self._initial_ns
+            for name, value in self._ns.items():
+                if name == "__builtins__" or isinstance(value, MainThreadModule):
+                    continue
+                # Names the cell didn't bind may have been changed in the
+                # console while it ran
+                if initial_ns.get(name, self) is not value:
+                    user_ns[name] = _unwrap(value)
+            self.result = _unwrap(self.result)
+            if self.result_name:
+                user_ns[self.result_name] = self.result
+            print("[background #{:d}] {:s} in {:.2f}s".format(
+                self.number,
+                "failed" if self.error else "completed",
+                self.elapsed
+            ))
+            if self.error:
+                self.shell.showtraceback(self.error)
+            elif self.result is not None:
+                from IPython.display import display
+                display(self.result)
+        finally:
+            self.done.set()
+        return 0
+
+    def _repr_pretty_(self, printer, cycle):
+        printer.text("<background cell #{:d}: {:s}>".format(
+            self.number,
+            "running" if self.running else
+            "failed" if self.error else "completed"
+        ))
+
+jobs = []
+
+def background(line, cell):
+    """
+    Run the cell in a worker thread. IDA and the console stay responsive
+    while it runs and the result is displayed when it completes.
+
+    Calls to idaapi, idc, idautils and ida_* functions, and to the methods of
+    the IDA objects they return, are sent to IDA's main thread. Each of these
+    calls is a round trip to the main thread, which waits for IDA to be idle:
+    a loop making thousands of them is much slower than in the console. Use
+    ipyida.background.on_main_thread to batch many calls in a single round
+    trip.
+
+    Functions defined in the console and modules referring to IDA modules
+    (ipyida.bulk, helpers of ipyidarc.py...) would call IDA from the worker
+    thread, so their functions run entirely on the main thread instead,
+    blocking IDA while they run. Methods of subclasses of IDA classes defined
+    in the cell (hooks for instance) run in the worker thread, as do methods
+    of objects created in the console: they must not call IDA.
+
+    Usage:
+        %%background [result_name]
+
+    If result_name is given, the value of the last expression of the cell is
+    stored in that variable. Running and completed cells are kept in
+    ipyida.background.jobs.
+    """
+    from IPython import get_ipython
+    shell = get_ipython()
+    source = shell.transform_cell(cell) if hasattr(shell, "transform_cell") else cell
+    job = BackgroundCell(shell, source, line.strip() or None)
+    jobs.append(job)
+    job.start()
+    return job
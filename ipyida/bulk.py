@@ -0,0 +1,254 @@
+# -*- encoding: utf8 -*-
+#
+# This module provides functions working on many addresses at once. They
+# return NumPy arrays when NumPy is installed, lists otherwise.
+#
+# The module is available as `bulk` in the IPython console.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import bisect
+import struct
+import sys
+import time
+
+import idaapi
+
+from .symbols import name_index
+
+def _numpy():
+    """
+    Returns: the numpy module, or None if it's not installed. Imported on
+    first use, to keep it out of the kernel startup.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# Addresses closer than this are read with a single get_bytes call
+MAX_GAP = 0x1000
+
+_INT_FORMATS = { 1: "B", 2: "H", 4: "I", 8: "Q" }
+
+def _array(values, dtype):
+    numpy = _numpy()
+    if numpy is None:
+        return list(values)
+    return numpy.array(values, dtype=dtype)
+
+def _as_list(eas):
+    # An array can only be given if numpy was already imported
+    numpy = sys.modules.get("numpy")
+    if numpy is not None and isinstance(eas, numpy.ndarray):
+        return eas.tolist()
+    return list(eas)
+
+def _runs(sorted_eas, width):
+    """
+    Group sorted addresses into runs that can be covered by a single read.
+    Yields (start, end, first_index, last_index) tuples.
+    """
+    i = 0
+    while i < len(sorted_eas):
+        j = i
+        while j + 1 < len(sorted_eas) and \
+              sorted_eas[j+1] - sorted_eas[j] <= MAX_GAP:
+            j += 1
+        yield sorted_eas[i], sorted_eas[j] + width, i, j
+        i = j + 1
+
+def _little_endian():
+    if hasattr(idaapi, "inf_is_be"):
+        return not idaapi.inf_is_be()
+    return not idaapi.get_inf_structure().is_be()
+
+def read_ints(eas, width=8, signed=False):
+    """
+    Read integers of `width` bytes (1, 2, 4 or 8) at every address in eas.
+
+    Close addresses are read together with a single get_bytes call instead
+    of one get_qword (or similar) per address. Undefined bytes read as 0xFF
+    like with get_bytes.
+    """
+    if width not in _INT_FORMATS:
+        raise ValueError("width must be 1, 2, 4 or 8")
+    eas = _as_list(eas)
+    order = sorted(range(len(eas)), key=eas.__getitem__)
+    sorted_eas = [ eas[i] for i in order ]
+    fmt = ("<" if _little_endian() else ">") + \
+        (_INT_FORMATS[width].lower() if signed else _INT_FORMATS[width])
+    unpack_from = struct.Struct(fmt).unpack_from
+    values = [0] * len(eas)
+    for start, end, first, last in _runs(sorted_eas, width):
+        data = idaapi.get_bytes(start, end - start) or b""
+        if len(data) < end - start:
+            data += b"\xff" * (end - start - len(data))
+        for k in range(first, last + 1):
+            values[order[k]] = unpack_from(data, sorted_eas[k] - start)[0]
+    dtype = ("int{:d}" if signed else "uint{:d}").format(8 * width)
+    return _array(values, dtype)
+
+def read_bytes(eas, size):
+    "Return `size` bytes at every address in eas, as a list of bytes"
+    eas = _as_list(eas)
+    order = sorted(range(len(eas)), key=eas.__getitem__)
+    sorted_eas = [ eas[i] for i in order ]
+    result = [None] * len(eas)
+    for start, end, first, last in _runs(sorted_eas, size):
+        data = idaapi.get_bytes(start, end - start) or b""
+        for k in range(first, last + 1):
+            offset = sorted_eas[k] - start
+            result[order[k]] = data[offset:offset+size]
+    return result
+
+def _named_eas():
+    "Returns: the sorted addresses of the name list"
+    if name_index.hooked:
+        # Kept up to date by the changes of the database
+        return name_index.eas
+    get_nlist_ea = idaapi.get_nlist_ea
+    return sorted(get_nlist_ea(i) for i in range(idaapi.get_nlist_size()))
+
+def get_names(eas, demangle=False, dummy=False):
+    """
+    Return the name at every address in eas ('' when there is none). With
+    demangle, demangled names are returned when available.
+
+    Addresses without a name are found in the sorted name list, so names are
+    only read at named addresses. Dummy names (sub_..., loc_...) aren't in
+    the name list: with dummy, they are read at every other address, with
+    one get_name call each.
+    """
+    eas = _as_list(eas)
+    named = _named_eas()
+    get_name = idaapi.get_name
+    names = [""] * len(eas)
+    i = 0
+    for k in sorted(range(len(eas)), key=eas.__getitem__):
+        ea = eas[k]
+        i = bisect.bisect_left(named, ea, i)
+        if (i < len(named) and named[i] == ea) or dummy:
+            names[k] = get_name(ea)
+    if demangle:
+        demangle_name = idaapi.demangle_name
+        names = [ (name and demangle_name(name, 0)) or name for name in names ]
+    return names
+
+def _items(eas):
+    """
+    Yields (index, head, end) of the item containing every address in eas.
+
+    Addresses are processed in order so a single get_item_head and
+    get_item_end call is done for consecutive addresses in the same item.
+    """
+    get_item_head = idaapi.get_item_head
+    get_item_end = idaapi.get_item_end
+    head = end = idaapi.BADADDR
+    for i in sorted(range(len(eas)), key=eas.__getitem__):
+        ea = eas[i]
+        if not (head <= ea < end):
+            head, end = get_item_head(ea), get_item_end(ea)
+        yield i, head, end
+
+def get_item_heads(eas):
+    "Return the head of the item containing every address in eas"
+    eas = _as_list(eas)
+    heads = [0] * len(eas)
+    for i, head, end in _items(eas):
+        heads[i] = head
+    return _array(heads, "uint64")
+
+def get_item_sizes(eas):
+    """
+    Return the size of the item at every address in eas. Like
+    get_item_size, it's the number of bytes from the address to the end of
+    its item.
+    """
+    eas = _as_list(eas)
+    sizes = [0] * len(eas)
+    for i, head, end in _items(eas):
+        sizes[i] = end - eas[i]
+    return _array(sizes, "uint64")
+
+def get_func_bounds(eas):
+    """
+    Return the bounds (start_ea, end_ea) of the function containing every
+    address in eas as two arrays. Addresses outside of functions get BADADDR
+    for both.
+
+    Addresses are processed in order so a single get_func call is done for
+    consecutive addresses in the same function chunk.
+    """
+    eas = _as_list(eas)
+    order = sorted(range(len(eas)), key=eas.__getitem__)
+    starts = [idaapi.BADADDR] * len(eas)
+    ends = [idaapi.BADADDR] * len(eas)
+    get_func = idaapi.get_func
+    get_fchunk = idaapi.get_fchunk
+    chunk_start = chunk_end = idaapi.BADADDR
+    func_bounds = (idaapi.BADADDR, idaapi.BADADDR)
+    for i in order:
+        ea = eas[i]
+        if not (chunk_start <= ea < chunk_end):
+            chunk = get_fchunk(ea)
+            if chunk is None:
+                chunk_start = chunk_end = idaapi.BADADDR
+                func_bounds = (idaapi.BADADDR, idaapi.BADADDR)
+            else:
+                chunk_start, chunk_end = chunk.start_ea, chunk.end_ea
+                func = get_func(ea)
+                func_bounds = (func.start_ea, func.end_ea)
+        starts[i], ends[i] = func_bounds
+    return _array(starts, "uint64"), _array(ends, "uint64")
+
+def timings(eas, repeat=3):
+    """
+    Time the functions of this module against the equivalent loop calling
+    the IDA API once per address.
+
+    Returns: a dict mapping each function name to a (bulk, loop) tuple of the
+    best times in seconds.
+    """
+    eas = _as_list(eas)
+    get_flags = getattr(idaapi, "get_flags", None) or idaapi.getFlags
+    def func_bounds_loop():
+        for ea in eas:
+            func = idaapi.get_func(ea)
+            if func is not None:
+                func.start_ea, func.end_ea
+    cases = {
+        "read_ints": (
+            lambda: read_ints(eas, 8),
+            lambda: [ idaapi.get_qword(ea) for ea in eas ],
+        ),
+        "get_names": (
+            lambda: get_names(eas),
+            lambda: [ idaapi.get_name(ea) if idaapi.has_name(get_flags(ea)) else ""
+                      for ea in eas ],
+        ),
+        "get_item_heads": (
+            lambda: get_item_heads(eas),
+            lambda: [ idaapi.get_item_head(ea) for ea in eas ],
+        ),
+        "get_item_sizes": (
+            lambda: get_item_sizes(eas),
+            lambda: [ idaapi.get_item_size(ea) for ea in eas ],
+        ),
+        "get_func_bounds": (
+            lambda: get_func_bounds(eas),
+            func_bounds_loop,
+        ),
+    }
+    def best(func):
+        times = []
+        for _ in range(repeat):
+            start = time.time()
+            func()
+            times.append(time.time() - start)
+        return min(times)
+    return dict(
+        (name, (best(bulk), best(loop))) for name, (bulk, loop) in cases.items()
+    )
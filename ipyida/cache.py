@@ -0,0 +1,258 @@
+# -*- encoding: utf8 -*-
+#
+# This module memoizes functions querying the database, and forgets their
+# results when the parts of the database they depend on change.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import collections
+import functools
+import sys
+import threading
+
+from .changes import dispatcher
+
+# Kinds of database changes a cached result can depend on
+NAMES = "names"
+BYTES = "bytes"
+FUNCTIONS = "functions"
+XREFS = "xrefs"
+TYPES = "types"
+SEGMENTS = "segments"
+KINDS = (NAMES, BYTES, FUNCTIONS, XREFS, TYPES, SEGMENTS)
+
+def estimate_size(value, sample=100):
+    """
+    Returns: a rough size in bytes of value, extrapolated from the size of
+    up to `sample` of its items if it's a container
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray, memoryview)):
+        return size
+    if isinstance(value, dict):
+        items = list(value.items())
+        if items:
+            picked = items[:sample]
+            size += len(items) * sum(
+                sys.getsizeof(k) + sys.getsizeof(v) for k, v in picked
+            ) // len(picked)
+        return size
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value)
+        if items:
+            picked = items[:sample]
+            size += len(items) * sum(sys.getsizeof(i) for i in picked) // len(picked)
+    return size
+
+
+CacheInfo = collections.namedtuple(
+    "CacheInfo", ("hits", "misses", "stale", "evictions", "entries", "size")
+)
+
+class CacheStore(object):
+    """
+    Results of memoized functions, with their dependencies. Every kind of
+    change has a generation number, incremented by IDB hooks when such a
+    change happens. An entry is valid while the generations of the kinds it
+    depends on are the ones it was computed with, so a rename only drops the
+    entries that depend on names.
+
+    Least recently used entries are evicted beyond max_entries entries or
+    max_size bytes (estimated with estimate_size).
+    """
+
+    def __init__(self, max_entries=4096, max_size=256 << 20):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.generations = dict((kind, 0) for kind in KINDS)
+        # key -> (value, size, {kind: generation})
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+        # Statistics per function name
+        self.stats = collections.defaultdict(collections.Counter)
+
+    def hook(self):
+        dispatcher.subscribe(self)
+
+    def unhook(self):
+        dispatcher.unsubscribe(self)
+        # Changes aren't tracked anymore
+        self.clear()
+
+    @property
+    def hooked(self):
+        return dispatcher.is_subscribed(self)
+
+    def changed(self, *kinds):
+        "Record a change of the given kinds, invalidating what depends on them"
+        for kind in kinds:
+            self.generations[kind] += 1
+
+    def changed_all(self):
+        self.changed(*KINDS)
+
+    # Changes dispatched by ipyida.changes
+
+    def name_changed(self, ea):
+        self.changed(NAMES)
+
+    def bytes_changed(self, ea):
+        self.changed(BYTES)
+
+    def items_changed(self, ea):
+        self.changed(BYTES, XREFS)
+
+    def function_changed(self, ea):
+        self.changed(FUNCTIONS)
+
+    def type_changed(self):
+        self.changed(TYPES)
+
+    def xref_changed(self, frm):
+        self.changed(XREFS)
+
+    def everything_changed(self):
+        self.changed_all()
+
+    def get(self, key, name):
+        """
+        Returns: a tuple (True, value) if a valid entry exists for key, or
+        (False, None)
+        """
+        stats = self.stats[name]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, deps = entry
+                generations = self.generations
+                if all(generations[kind] == gen for kind, gen in deps.items()):
+                    self._entries.move_to_end(key)
+                    stats["hits"] += 1
+                    return True, value
+                del self._entries[key]
+                self._size -= size
+                stats["stale"] += 1
+            stats["misses"] += 1
+            return False, None
+
+    def put(self, key, name, value, depends):
+        size = estimate_size(value)
+        if size > self.max_size:
+            return
+        deps = dict((kind, self.generations[kind]) for kind in depends)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (value, size, deps)
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_size:
+                evicted_key, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.stats[evicted_key[0]]["evictions"] += 1
+
+    def clear(self, name=None):
+        "Drop every entry, or the entries of the function called name"
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                self._size = 0
+                return
+            for key in [ k for k in self._entries if k[0] == name ]:
+                self._size -= self._entries.pop(key)[1]
+
+    def info(self, name=None):
+        "Returns: a CacheInfo for the function called name, or for all of them"
+        with self._lock:
+            if name is None:
+                counts = collections.Counter()
+                for stats in self.stats.values():
+                    counts.update(stats)
+                entries = list(self._entries.values())
+            else:
+                counts = self.stats[name]
+                entries = [ e for k, e in self._entries.items() if k[0] == name ]
+        return CacheInfo(
+            counts["hits"], counts["misses"], counts["stale"], counts["evictions"],
+            len(entries), sum(e[1] for e in entries)
+        )
+
+    def report(self):
+        lines = [ "{:40s} {:>8s} {:>8s} {:>8s} {:>9s} {:>8s} {:>10s}".format(
+            "Function", "Hits", "Misses", "Stale", "Evictions", "Entries", "Size (KB)"
+        ) ]
+        for name in sorted(self.stats):
+            info = self.info(name)
+            lines.append("{:40s} {:8d} {:8d} {:8d} {:9d} {:8d} {:10.1f}".format(
+                name, info.hits, info.misses, info.stale, info.evictions,
+                info.entries, info.size / 1024.0
+            ))
+        total = self.info()
+        lines.append("{:d} entries, {:.1f} KB out of {:.1f} KB".format(
+            total.entries, total.size / 1024.0, self.max_size / 1024.0
+        ))
+        return "\n".join(lines)
+
+
+# Shared by all memoized functions
+store = CacheStore()
+
+def memoize(*depends):
+    """
+    Decorator caching the results of a function until the database changes
+    in one of the ways given in depends (NAMES, BYTES, FUNCTIONS, XREFS,
+    TYPES or SEGMENTS). Segment changes invalidate everything.
+
+        >>> @ipyida.cache.memoize(ipyida.cache.XREFS)
+        ... def callers(ea):
+        ...     return [ x.frm for x in idautils.XrefsTo(ea) ]
+
+    The arguments must be hashable, calls with unhashable arguments are not
+    cached. The wrapper has cache_info() and cache_clear() methods.
+    """
+    for kind in depends:
+        if kind not in KINDS:
+            raise ValueError("Unknown kind of change: {!r}".format(kind))
+    # Segment changes bump every generation, so they're always a dependency
+    depends = tuple(depends) or KINDS
+
+    def decorator(func):
+        name = "{:s}.{:s}".format(
+            func.__module__ or "?", getattr(func, "__qualname__", func.__name__)
+        )
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not store.hooked:
+                # Results can't be trusted without the hooks
+                store.hook()
+            key = (name, args, tuple(sorted(kwargs.items())))
+            try:
+                found, value = store.get(key, name)
+            except TypeError:
+                # Unhashable arguments
+                return func(*args, **kwargs)
+            if found:
+                return value
+            value = func(*args, **kwargs)
+            store.put(key, name, value, depends)
+            return value
+
+        wrapper.cache_info = lambda: store.info(name)
+        wrapper.cache_clear = lambda: store.clear(name)
+        return wrapper
+    return decorator
+
+def ipyida_cache(line):
+    """
+    Show the hits, misses and size of the results cached by functions
+    decorated with ipyida.cache.memoize.
+
+    Usage:
+        %ipyida_cache [--clear]
+    """
+    print(store.report())
+    if line.strip() == "--clear":
+        store.clear()
@@ -0,0 +1,208 @@
+# -*- encoding: utf8 -*-
+#
+# This module installs one set of IDA hooks and dispatches the changes of the
+# database to the caches and indexes of IPyIDA, so they all follow the same
+# rules about what a change invalidates.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import idaapi
+
+
+class ChangeDispatcher(object):
+    """
+    Calls the methods of the subscribers matching the changes of the
+    database. Subscribers implement any of:
+
+        name_changed(ea)        the name at ea was set or removed
+        bytes_changed(ea)       the byte at ea was patched
+        items_changed(ea)       code or data was created or destroyed at ea
+        function_changed(ea)    the function starting at ea was added,
+                                changed or deleted
+        type_changed()          a type or the type of an item changed
+        xref_changed(frm)       a cross reference from frm was added or
+                                deleted
+        everything_changed()    a segment changed, or the database was
+                                restored by Undo or Redo. Anything may have
+                                changed without other events.
+        database_saving()       the database is about to be saved
+        database_closing()      the database is being closed
+
+    The hooks are installed while there is at least one subscriber.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._hooks = []
+
+    def subscribe(self, subscriber):
+        if subscriber in self._subscribers:
+            return
+        self._subscribers.append(subscriber)
+        if not self._hooks:
+            self._hooks = [ _IDBHooks(self), _IDPHooks(self) ]
+            if hasattr(idaapi, "UI_Hooks"):
+                self._hooks.append(_UIHooks(self))
+            for hooks in self._hooks:
+                hooks.hook()
+
+    def unsubscribe(self, subscriber):
+        if subscriber not in self._subscribers:
+            return
+        self._subscribers.remove(subscriber)
+        if not self._subscribers:
+            for hooks in self._hooks:
+                hooks.unhook()
+            self._hooks = []
+
+    def is_subscribed(self, subscriber):
+        return subscriber in self._subscribers
+
+    def dispatch(self, event, *args):
+        for subscriber in list(self._subscribers):
+            method = getattr(subscriber, event, None)
+            if method is not None:
+                method(*args)
+
+
+class _IDBHooks(idaapi.IDB_Hooks):
+
+    def __init__(self, dispatcher):
+        super(_IDBHooks, self).__init__()
+        self.dispatch = dispatcher.dispatch
+
+    def savebase(self, *args):
+        self.dispatch("database_saving")
+        return 0
+
+    def closebase(self, *args):
+        self.dispatch("database_closing")
+        return 0
+
+    def renamed(self, ea, *args):
+        self.dispatch("name_changed", ea)
+        return 0
+
+    def byte_patched(self, ea, *args):
+        self.dispatch("bytes_changed", ea)
+        return 0
+
+    def make_code(self, insn, *args):
+        # An insn_t since IDA 7.0, an address before
+        self.dispatch("items_changed", getattr(insn, "ea", insn))
+        return 0
+
+    def make_data(self, ea, *args):
+        self.dispatch("items_changed", ea)
+        return 0
+
+    def destroyed_items(self, ea1, *args):
+        self.dispatch("items_changed", ea1)
+        return 0
+
+    def func_added(self, func, *args):
+        self.dispatch("function_changed", func.start_ea)
+        return 0
+
+    def func_updated(self, func, *args):
+        self.dispatch("function_changed", func.start_ea)
+        return 0
+
+    def deleting_func(self, func, *args):
+        self.dispatch("function_changed", func.start_ea)
+        return 0
+
+    def set_func_start(self, func, new_start, *args):
+        self.dispatch("function_changed", func.start_ea)
+        self.dispatch("function_changed", new_start)
+        return 0
+
+    def set_func_end(self, func, *args):
+        self.dispatch("function_changed", func.start_ea)
+        return 0
+
+    def func_tail_appended(self, func, *args):
+        self.dispatch("function_changed", func.start_ea)
+        return 0
+
+    def func_tail_deleted(self, func, *args):
+        self.dispatch("function_changed", func.start_ea)
+        return 0
+
+    def ti_changed(self, *args):
+        self.dispatch("type_changed")
+        return 0
+
+    def op_ti_changed(self, *args):
+        self.dispatch("type_changed")
+        return 0
+
+    def local_types_changed(self, *args):
+        self.dispatch("type_changed")
+        return 0
+
+    # Items in a deleted or shrunk segment are gone without other events
+
+    def segm_added(self, *args):
+        self.dispatch("everything_changed")
+        return 0
+
+    def segm_deleted(self, *args):
+        self.dispatch("everything_changed")
+        return 0
+
+    def segm_start_changed(self, *args):
+        self.dispatch("everything_changed")
+        return 0
+
+    def segm_end_changed(self, *args):
+        self.dispatch("everything_changed")
+        return 0
+
+    def segm_moved(self, *args):
+        self.dispatch("everything_changed")
+        return 0
+
+
+class _IDPHooks(idaapi.IDP_Hooks):
+    # Cross references are only reported to the processor module
+
+    def __init__(self, dispatcher):
+        super(_IDPHooks, self).__init__()
+        self.dispatch = dispatcher.dispatch
+
+    def ev_add_cref(self, frm, *args):
+        self.dispatch("xref_changed", frm)
+        return 0
+
+    def ev_add_dref(self, frm, *args):
+        self.dispatch("xref_changed", frm)
+        return 0
+
+    def ev_del_cref(self, frm, *args):
+        self.dispatch("xref_changed", frm)
+        return 0
+
+    def ev_del_dref(self, frm, *args):
+        self.dispatch("xref_changed", frm)
+        return 0
+
+
+if hasattr(idaapi, "UI_Hooks"):
+    class _UIHooks(idaapi.UI_Hooks):
+        # Undo and redo restore the database without sending other events.
+        # Once the action ran, lookups see the restored database.
+
+        def __init__(self, dispatcher):
+            super(_UIHooks, self).__init__()
+            self.dispatch = dispatcher.dispatch
+
+        def postprocess_action(self, name):
+            if name in ("Undo", "Redo"):
+                self.dispatch("everything_changed")
+            return 0
+
+
+# Shared by the caches and indexes of IPyIDA
+dispatcher = ChangeDispatcher()
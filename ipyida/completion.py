@@ -0,0 +1,326 @@
+# -*- encoding: utf8 -*-
+#
+# This module provides fast tab completion for the IDA modules from a
+# precomputed index.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import bisect
+import json
+import os
+import re
+import sys
+import types
+
+import idaapi
+
+# Bump when the format of the index file changes
+INDEX_FORMAT_VERSION = 1
+
+# Maximum number of completions returned by a matcher
+MAX_COMPLETIONS = 1000
+
+_IDA_MODULE_NAME_RE = re.compile(r"^(idaapi|idc|idautils|ida_\w+)$")
+_ATTRIBUTE_TOKEN_RE = re.compile(r"^([A-Za-z_]\w*)\.(\w*)$")
+
+def _kind(value):
+    if isinstance(value, type):
+        return "class"
+    if isinstance(value, types.ModuleType):
+        return "module"
+    if callable(value):
+        return "function"
+    return "instance"
+
+def _signature_and_doc(value):
+    doc = getattr(value, "__doc__", None) if callable(value) else None
+    if not isinstance(doc, str):
+        return "", ""
+    doc = doc.strip()
+    # SWIG generated docstrings start with the signature
+    first_line = doc.split("\n", 1)[0].strip()
+    if "(" in first_line and first_line.endswith(")") or "->" in first_line:
+        return first_line, doc
+    return "", doc
+
+
+class ModuleIndex(object):
+    """
+    Sorted attribute names of the IDA modules, with their kind, signature and
+    docstring. Built once per IDA and Python version and cached in the IDA
+    user directory.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or self.default_path()
+        self._modules = None
+
+    @staticmethod
+    def default_path():
+        version = idaapi.get_kernel_version() if hasattr(idaapi, "get_kernel_version") \
+            else str(idaapi.IDA_SDK_VERSION)
+        return os.path.join(
+            idaapi.get_user_idadir(), "ipyida",
+            "completion-ida{:s}-py{:d}{:d}.json".format(
+                version, sys.version_info.major, sys.version_info.minor
+            )
+        )
+
+    @property
+    def modules(self):
+        if self._modules is None:
+            self._modules = self._load() or self._build()
+        return self._modules
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if data.get("format") != INDEX_FORMAT_VERSION:
+            return None
+        return dict(
+            (name, self._columns(entries))
+            for name, entries in data["modules"].items()
+        )
+
+    @staticmethod
+    def _columns(entries):
+        return list(zip(*entries)) if entries else [(), (), (), ()]
+
+    @staticmethod
+    def _module_entries(module):
+        entries = []
+        for attr in sorted(dir(module)):
+            try:
+                value = getattr(module, attr)
+            except Exception:
+                continue
+            signature, doc = _signature_and_doc(value)
+            entries.append((attr, _kind(value), signature, doc))
+        return entries
+
+    def _save(self, modules):
+        data = dict(
+            (name, list(zip(*columns))) for name, columns in modules.items()
+        )
+        try:
+            directory = os.path.dirname(self.path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            with open(self.path, "w") as f:
+                json.dump(dict(format=INDEX_FORMAT_VERSION, modules=data), f)
+        except (IOError, OSError):
+            pass
+
+    def _build(self):
+        modules = {}
+        for name, module in list(sys.modules.items()):
+            if module is None or not _IDA_MODULE_NAME_RE.match(name):
+                continue
+            modules[name] = self._columns(self._module_entries(module))
+        self._save(modules)
+        return modules
+
+    def rebuild(self, module_name=None):
+        """
+        Rebuild the index, or only the entries of module_name, for instance
+        after it was imported
+        """
+        if module_name is None:
+            self._modules = self._build()
+            return
+        modules = self.modules
+        modules[module_name] = self._columns(
+            self._module_entries(sys.modules[module_name])
+        )
+        self._save(modules)
+
+    def complete(self, module_name, prefix):
+        """
+        Returns: a list of (attribute_name, kind) of module_name starting
+        with prefix
+        """
+        module = self.modules.get(module_name)
+        if module is None and sys.modules.get(module_name) is not None:
+            # Imported after the index was built
+            self.rebuild(module_name)
+            module = self.modules.get(module_name)
+        if module is None:
+            return []
+        names, kinds = module[0], module[1]
+        start = bisect.bisect_left(names, prefix)
+        end = bisect.bisect_left(names, prefix + u"\uffff", start)
+        if not prefix.startswith("_"):
+            # Hide private attributes like dir() completion does
+            return [ (names[i], kinds[i])
+                     for i in range(start, min(end, start + MAX_COMPLETIONS))
+                     if not names[i].startswith("_") ]
+        return [ (names[i], kinds[i])
+                 for i in range(start, min(end, start + MAX_COMPLETIONS)) ]
+
+    def describe(self, module_name, attribute):
+        "Returns: a (signature, docstring) tuple or None"
+        module = self.modules.get(module_name)
+        if module is None:
+            return None
+        i = bisect.bisect_left(module[0], attribute)
+        if i < len(module[0]) and module[0][i] == attribute:
+            return module[2][i], module[3][i]
+        return None
+
+module_index = ModuleIndex()
+
+def _ida_module_name(shell, name):
+    "Returns: the name of the IDA module called name in the user namespace, or None"
+    value = shell.user_ns.get(name)
+    if not isinstance(value, types.ModuleType):
+        return None
+    # Use __dict__ to avoid triggering the import of a LazyModule
+    module_name = value.__dict__.get("__name__")
+    if not module_name or not _IDA_MODULE_NAME_RE.match(module_name):
+        return None
+    return module_name
+
+def _ida_attribute_completions(shell, token):
+    """
+    Returns: a list of ("module.attribute", kind) if token is an attribute
+    of an IDA module in the user namespace, or None.
+    """
+    m = _ATTRIBUTE_TOKEN_RE.match(token)
+    if m is None:
+        return None
+    module_name = _ida_module_name(shell, m.group(1))
+    if module_name is None:
+        return None
+    return [ (m.group(1) + "." + name, kind)
+             for name, kind in module_index.complete(module_name, m.group(2)) ]
+
+def _ida_attribute_inspection(shell, oname):
+    """
+    Returns: a mime bundle with the signature and docstring of oname from
+    the index if it's an attribute of an IDA module, or None.
+    """
+    m = _ATTRIBUTE_TOKEN_RE.match(oname)
+    if m is None or not m.group(2):
+        return None
+    module_name = _ida_module_name(shell, m.group(1))
+    if module_name is None:
+        return None
+    description = module_index.describe(module_name, m.group(2))
+    if description is None or not any(description):
+        return None
+    signature, doc = description
+    lines = []
+    if signature:
+        lines.append("Signature: " + signature)
+        if doc.startswith(signature):
+            # SWIG docstrings repeat the signature
+            doc = doc[len(signature):].strip()
+    if doc:
+        lines.append("Docstring:\n" + doc)
+    return { "text/plain": "\n".join(lines) }
+
+def _string_literal_prefix(text_until_cursor):
+    """
+    Returns: the content of the string literal the cursor is in, or None if
+    the cursor is not in a string.
+    """
+    quote = None
+    start = 0
+    i = 0
+    while i < len(text_until_cursor):
+        c = text_until_cursor[i]
+        if quote is not None:
+            if c == "\\":
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in "'\"":
+            quote = c
+            start = i + 1
+        elif c == "#":
+            return None
+        i += 1
+    if quote is None:
+        return None
+    return text_until_cursor[start:]
+
+def _database_name_completions(name_list, text_until_cursor, token):
+    """
+    Returns: a list of (completion, "name") for the names of the database
+    starting with the content of the string literal under the cursor, or None.
+    """
+    prefix = _string_literal_prefix(text_until_cursor)
+    if not prefix or not name_list.ready or not prefix.endswith(token):
+        return None
+    # The token stops at delimiters such as ':' that may be part of a name.
+    # Complete only the token part.
+    head = len(prefix) - len(token)
+    return [ (name[head:], "name") for name in name_list.complete(prefix) ]
+
+def register_matcher(shell, matcher):
+    """
+    Add matcher to the shell's completer. matcher is called with
+    (text_until_cursor, token) and returns a list of (completion, kind)
+    tuples or None to let the other matchers run.
+
+    With IPython >= 8.6, matches suppress the other matchers (including
+    jedi). Older versions merge them with the other completions.
+    """
+    completer = shell.Completer
+    try:
+        from IPython.core.completer import context_matcher, SimpleCompletion
+    except ImportError:
+        context_matcher = None
+
+    if context_matcher is not None:
+        @context_matcher()
+        def ipyida_matcher(context):
+            matches = matcher(context.text_until_cursor, context.token)
+            return dict(
+                completions=[ SimpleCompletion(text, type=kind)
+                              for text, kind in matches or [] ],
+                suppress=bool(matches),
+            )
+        ipyida_matcher.matcher_priority = 1
+        ipyida_matcher.matcher_identifier = "ipyida." + matcher.__name__
+    else:
+        def ipyida_matcher(text):
+            matches = matcher(completer.text_until_cursor, text)
+            return [ completion for completion, _ in matches or [] ]
+
+    completer.custom_matchers.insert(0, ipyida_matcher)
+    return ipyida_matcher
+
+def register_inspector(shell):
+    """
+    Answer inspection requests (<Shift-Tab>, obj?) for attributes of IDA
+    modules from the index, before IPython inspects the object itself.
+    """
+    object_inspect_mime = shell.object_inspect_mime
+    def ipyida_object_inspect_mime(oname, *args, **kwargs):
+        bundle = _ida_attribute_inspection(shell, oname)
+        if bundle is not None:
+            return bundle
+        return object_inspect_mime(oname, *args, **kwargs)
+    shell.object_inspect_mime = ipyida_object_inspect_mime
+
+def register(shell, name_index=None):
+    """
+    Register the completion and inspection providers of IPyIDA with the
+    shell. If a NameIndex is given, names of the database are completed in
+    strings.
+    """
+    register_inspector(shell)
+    def ida_module_attributes(text_until_cursor, token):
+        return _ida_attribute_completions(shell, token)
+    register_matcher(shell, ida_module_attributes)
+    if name_index is not None:
+        def database_names(text_until_cursor, token):
+            return _database_name_completions(
+                name_index.names, text_until_cursor, token
+            )
+        register_matcher(shell, database_names)
@@ -0,0 +1,104 @@
+# -*- encoding: utf8 -*-
+#
+# This module runs the IPython kernel without IDA's GUI, in idat or with the
+# idapro Python module.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import hashlib
+import os
+import re
+import sys
+
+import idaapi
+
+def get_database_path():
+    "Returns: the path of the current IDB, or of the input file"
+    path = ""
+    if hasattr(idaapi, "get_path"):
+        path = idaapi.get_path(idaapi.PATH_TYPE_IDB)
+    return path or idaapi.get_input_file_path() or ""
+
+def connection_file_for_database(path=None):
+    """
+    Returns: the path of the connection file used by serve() for the
+    database at path (the current one by default), in Jupyter's runtime
+    directory.
+
+    The name is derived from the database path, so clients can find the
+    kernel of a given database, and several databases can be served at once.
+    """
+    from jupyter_core.paths import jupyter_runtime_dir
+    if path is None:
+        path = get_database_path()
+    path = os.path.abspath(path)
+    name = re.sub(r"[^\w.-]", "_", os.path.splitext(os.path.basename(path))[0])
+    digest = hashlib.md5(path.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(
+        jupyter_runtime_dir(),
+        "kernel-ipyida-{:s}-{:s}.json".format(name, digest)
+    )
+
+def serve(connection_file=None, wait_analysis=True):
+    """
+    Start the kernel and serve clients until one of them asks the kernel to
+    shut down. The kernel runs on a plain asyncio event loop that blocks the
+    calling thread, so this is meant for idat or the idapro Python module
+    where there is no Qt event loop.
+
+    Args:
+        connection_file: where to write the connection file. Defaults to
+            connection_file_for_database().
+        wait_analysis: wait for auto-analysis to finish before starting.
+
+    Returns: the path of the connection file that was used.
+    """
+    from ipyida import kernel, symbols
+    if not kernel.is_using_ipykernel_5():
+        raise RuntimeError("Serving without IDA's GUI requires ipykernel >= 5")
+    import asyncio
+
+    if wait_analysis:
+        idaapi.auto_wait()
+
+    if connection_file is None:
+        connection_file = connection_file_for_database()
+    directory = os.path.dirname(connection_file)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    if os.path.exists(connection_file):
+        # Left over by a previous run. The kernel would reuse its ports.
+        os.remove(connection_file)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    ipython_kernel = kernel.IPythonKernel()
+    # IDA timers don't fire while the loop runs: the name lists are built
+    # and the output buffered for IDA's console is flushed from the loop
+    symbols.set_event_loop(loop)
+    def flush_output():
+        kernel.flush_ida_console()
+        loop.call_later(kernel.ida_console_flush_interval(), flush_output)
+    loop.call_soon(flush_output)
+    try:
+        ipython_kernel.start(connection_file=connection_file)
+        sys.stderr.write("[IPyIDA] Kernel ready, connect with:\n"
+                         "    jupyter console --existing {:s}\n".format(connection_file))
+        # The kernel stops the loop when it receives a shutdown_request
+        loop.run_forever()
+    finally:
+        ipython_kernel.stop()
+        kernel.flush_ida_console()
+        symbols.set_event_loop(None)
+        try:
+            os.remove(connection_file)
+        except OSError:
+            pass
+    return connection_file
+
+if __name__ == "__main__":
+    # idat -A -S"/path/to/ipyida/headless.py" sample.exe
+    # ipyida.pool.launch sets IPYIDA_CONNECTION_FILE to know where to connect.
+    serve(os.environ.get("IPYIDA_CONNECTION_FILE"))
+    idaapi.qexit(0)
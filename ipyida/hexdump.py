@@ -0,0 +1,172 @@
+# -*- encoding: utf8 -*-
+#
+# This module renders bytes objects as hexdumps in the IPython console.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+BYTES_PER_LINE = 16
+
+# Two hex digits for every possible byte value
+_HEX_TABLE = [ "{:02X}".format(b) for b in range(256) ]
+
+# Translation table for the ASCII column: control characters become spaces and
+# non-ASCII bytes become dots.
+_ASCII_TABLE = bytes(bytearray(
+    0x20 if b < 0x20 else 0x2E if b >= 0x80 else b for b in range(256)
+))
+_NON_PRINTABLE = bytes(bytearray(list(range(0x20)) + list(range(0x80, 0x100))))
+
+_LINE_FORMAT = "{:08X}: {:23s}  {:23s} |{:16s}|\n"
+
+_hexdump_options = {
+    # Number of lines displayed at the beginning and at the end of a large
+    # buffer. Everything in between is elided.
+    "head_lines": 256,
+    "tail_lines": 16,
+}
+
+def set_hexdump_options(options):
+    """
+    This function is intended to be called in ipyidarc.py to change how bytes
+    objects are displayed.
+
+    Args: options is expected to be a dict with any of the following keys:
+        head_lines: number of lines shown at the beginning of a large buffer
+        tail_lines: number of lines shown at the end of a large buffer
+
+    Setting both to None disables truncation.
+    """
+    _hexdump_options.update(options)
+
+def format_lines(data, base=0):
+    """
+    Return the hexdump of `data` as a single string. Offsets start at `base`.
+
+    The hex and ASCII columns are computed for the whole buffer at once, lines
+    are then only slices of those.
+    """
+    data = bytes(data)
+    hexed = " ".join(map(_HEX_TABLE.__getitem__, bytearray(data)))
+    text = data.translate(_ASCII_TABLE).decode("latin-1")
+    lines = []
+    for i in range(0, len(data), BYTES_PER_LINE):
+        h = 3 * i
+        lines.append(_LINE_FORMAT.format(
+            base + i,
+            hexed[h:h+23],
+            hexed[h+24:h+47],
+            text[i:i+BYTES_PER_LINE]
+        ))
+    return "".join(lines)
+
+def is_printable(data):
+    return len(bytes(data).translate(None, _NON_PRINTABLE)) == len(data)
+
+def displayed_ranges(length, head_lines=None, tail_lines=None):
+    """
+    Return the list of (start, end) offsets of a buffer of `length` bytes
+    displayed by render. The gap between two ranges is elided.
+    """
+    if head_lines is None:
+        head_lines = _hexdump_options["head_lines"]
+    if tail_lines is None:
+        tail_lines = _hexdump_options["tail_lines"]
+    if head_lines is None and tail_lines is None:
+        return [ (0, length) ]
+    head_size = (head_lines or 0) * BYTES_PER_LINE
+    tail_size = (tail_lines or 0) * BYTES_PER_LINE
+    if length <= head_size + tail_size:
+        return [ (0, length) ]
+    # Keep the tail aligned on a line boundary of the original buffer
+    tail_start = length - tail_size
+    tail_start += -tail_start % BYTES_PER_LINE
+    return [ (0, head_size), (tail_start, length) ]
+
+def _byte_view(data):
+    "Returns: a memoryview of the bytes of data, copied only if they aren't contiguous"
+    view = memoryview(data)
+    if not view.c_contiguous:
+        # Strided slices like buf[a:b:2] can't be cast
+        view = memoryview(view.tobytes())
+    return view.cast("B")
+
+def render(data, base=0, head_lines=None, tail_lines=None):
+    """
+    Return the hexdump of `data`, eliding the middle of the buffer if it's
+    larger than head_lines + tail_lines. Only the displayed parts are copied
+    and formatted, so the cost doesn't depend on the size of the buffer.
+
+    head_lines and tail_lines default to the values set with
+    set_hexdump_options.
+    """
+    view = _byte_view(data)
+    ranges = displayed_ranges(len(view), head_lines, tail_lines)
+    if len(ranges) == 1:
+        return format_lines(view, base)
+    (head_start, head_end), (tail_start, tail_end) = ranges
+    elided = tail_start - head_end
+    return "".join((
+        format_lines(view[head_start:head_end], base + head_start),
+        "... {:d} (0x{:X}) bytes elided, use ipyida.hexdump.HexdumpPager "
+        "to page through the whole buffer ...\n".format(elided, elided),
+        format_lines(view[tail_start:tail_end], base + tail_start),
+    ))
+
+
+class Hexdump(object):
+    """
+    Hexdump of `data[start:end]`, rendered when displayed in the console.
+    Offsets are shown relative to `base`.
+    """
+
+    def __init__(self, data, start=0, end=None, base=0):
+        self.view = _byte_view(data)[start:end]
+        self.base = base + start
+
+    def __str__(self):
+        return format_lines(self.view, self.base)
+
+    def _repr_pretty_(self, printer, cycle):
+        printer.text(str(self))
+
+
+class HexdumpPager(object):
+    """
+    Page through a large buffer on demand, `lines_per_page` lines at a time.
+
+        >>> pager = HexdumpPager(get_bytes(seg.start_ea, seg.size()), base=seg.start_ea)
+        >>> pager.next()
+        >>> pager.page(42)
+        >>> pager.seek(seg.start_ea + 0x1000)
+    """
+
+    def __init__(self, data, lines_per_page=64, base=0):
+        self.view = _byte_view(data)
+        self.base = base
+        self.page_size = lines_per_page * BYTES_PER_LINE
+        self.current = -1
+
+    def __len__(self):
+        "Number of pages"
+        return (len(self.view) + self.page_size - 1) // self.page_size
+
+    def page(self, n):
+        "Return page n as a Hexdump"
+        if n < 0:
+            n += len(self)
+        if n < 0 or n >= len(self):
+            raise IndexError("page out of range")
+        self.current = n
+        start = n * self.page_size
+        return Hexdump(self.view, start, start + self.page_size, self.base)
+
+    def next(self):
+        return self.page(self.current + 1)
+
+    def previous(self):
+        return self.page(max(self.current - 1, 0))
+
+    def seek(self, address):
+        "Return the page containing `address` (an offset from base)"
+        return self.page((address - self.base) // self.page_size)
@@ -7,7 +7,20 @@
 # See LICENSE file for redistribution.
 
 import idaapi
-from ipyida import ida_qtconsole, kernel
+import os
+import sys
+
+from ipyida import startup
+
+# How the kernel is started when the plugin is loaded:
+#   "eager": start the kernel right away (default)
+#   "lazy": start the kernel when the console is opened with <Shift-.>
+#   "listen": like lazy, but also listen on the kernel ports and start the
+#             kernel on the first connection of an external client
+#   "prewarm": like lazy, but start the kernel once auto-analysis is done
+# Can be changed with the IPYIDA_START_MODE environment variable, or by
+# setting ipyida.ida_plugin.START_MODE in idapythonrc.py.
+START_MODE = os.environ.get("IPYIDA_START_MODE", "eager")
 
 
 def _get_QApplication_instance():
@@ -22,6 +35,7 @@ def _get_QApplication_instance():
     if hasattr(idaapi, "is_idaq") and not idaapi.is_idaq():
         return None
 
+    from ipyida import ida_qtconsole
     _qt_version = ida_qtconsole.get_qt_version()
 
     if _qt_version == 6:
@@ -36,6 +50,11 @@ def _get_QApplication_instance():
     return QApplication.instance()
 
 
+def _is_using_ipykernel_5():
+    from ipyida import kernel
+    return kernel.is_using_ipykernel_5()
+
+
 class IPyIDAPlugIn(idaapi.plugin_t):
     wanted_name = "IPyIDA"
     wanted_hotkey = "Shift-."
@@ -44,14 +63,81 @@ class IPyIDAPlugIn(idaapi.plugin_t):
     help = "Starts an IPython qtconsole in IDA Pro"
     
     def init(self):
-        self.kernel = kernel.IPythonKernel()
-        self.kernel.start()
+        self.kernel = None
         self.widget = None
-        monkey_patch_IDAPython_ExecScript()
+        self._listener = None
+        self._prewarm_timer = None
+        # The analysis index can only trust its files if it saw every change
+        # since the database was opened, whenever the kernel starts. It only
+        # hooks databases that have them.
+        from ipyida.analysis_index import analysis_index
+        analysis_index.watch()
+        if START_MODE == "lazy":
+            pass
+        elif START_MODE == "listen":
+            self._listener = _ConnectionListener(self._start_kernel)
+        elif START_MODE == "prewarm":
+            self._prewarm_timer = idaapi.register_timer(1000, self._prewarm)
+        elif _get_QApplication_instance() is None and _is_using_ipykernel_5():
+            # Without Qt, nothing would run the asyncio event loop of the
+            # kernel. ipyida.headless.serve() starts it with its own loop.
+            # Older kernels run from IDA timers and work without Qt.
+            pass
+        else:
+            self._start_kernel()
         return idaapi.PLUGIN_KEEP
 
+    def _start_kernel(self):
+        if self.kernel is not None:
+            return self.kernel
+        connection_file = None
+        if self._listener is not None:
+            connection_file = self._listener.connection_file
+            # The kernel registers the same connection file
+            self._listener.close(unregister=False)
+            self._listener = None
+        profiler = startup.profiler
+        with profiler.phase("Kernel startup"), profiler.track_imports():
+            # ida_qtconsole sets up the Qt bindings used by qtconsole and
+            # qasync, it must be imported first.
+            with profiler.phase("import ida_qtconsole"):
+                from ipyida import ida_qtconsole
+            with profiler.phase("import kernel"):
+                from ipyida import kernel
+            if (
+                _get_QApplication_instance() is not None
+                and ida_qtconsole.get_qt_version() >= 5
+                and kernel.is_using_ipykernel_5()
+            ):
+                with profiler.phase("qasync event loop setup"):
+                    _setup_asyncio_event_loop()
+            self.kernel = kernel.IPythonKernel()
+            with profiler.phase("IPythonKernel.start"):
+                self.kernel.start(connection_file=connection_file)
+            with profiler.phase("monkey_patch_IDAPython_ExecScript"):
+                monkey_patch_IDAPython_ExecScript()
+        if startup.LOG_ENABLED:
+            try:
+                profiler.write_log()
+            except IOError as e:
+                print("[IPyIDA] Could not write startup log: {}".format(e))
+        return self.kernel
+
+    def _prewarm(self):
+        if self.kernel is not None:
+            self._prewarm_timer = None
+            return -1
+        # Wait for a database to be open and auto-analysis to be done
+        if not idaapi.get_root_filename() or not idaapi.auto_is_ok():
+            return 1000
+        self._prewarm_timer = None
+        self._start_kernel()
+        return -1
+
     def run(self, args):
+        self._start_kernel()
         if self.widget is None:
+            from ipyida import ida_qtconsole
             self.widget = ida_qtconsole.IPythonConsole(self.kernel.connection_file)
         self.widget.Show()
 
@@ -59,8 +145,89 @@ class IPyIDAPlugIn(idaapi.plugin_t):
         if self.widget:
             self.widget.Close(0)
             self.widget = None
+        if self._listener:
+            self._listener.close()
+            self._listener = None
+        if self._prewarm_timer is not None:
+            idaapi.unregister_timer(self._prewarm_timer)
+            self._prewarm_timer = None
         if self.kernel:
             self.kernel.stop()
+        from ipyida.analysis_index import analysis_index
+        analysis_index.unwatch()
+        analysis_index.unhook()
+
+
+class _ConnectionListener(object):
+    """
+    Listens on the ports of a future kernel with plain sockets and writes its
+    connection file, without importing ipykernel. The kernel is started on
+    the first incoming connection and binds the same ports. Clients (zmq)
+    reconnect automatically.
+
+    The connection file is recorded in the kernel registry right away, so
+    `ipyida connect` finds it before the kernel starts.
+    """
+
+    POLL_INTERVAL = 250
+
+    def __init__(self, on_connection):
+        import json
+        import socket
+        import uuid
+        from jupyter_core.paths import jupyter_runtime_dir
+
+        self.on_connection = on_connection
+        self.sockets = []
+        ports = {}
+        for name in ("shell_port", "iopub_port", "stdin_port", "control_port", "hb_port"):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("127.0.0.1", 0))
+            sock.listen(1)
+            sock.setblocking(False)
+            self.sockets.append(sock)
+            ports[name] = sock.getsockname()[1]
+
+        runtime_dir = jupyter_runtime_dir()
+        if not os.path.exists(runtime_dir):
+            os.makedirs(runtime_dir)
+        self.connection_file = os.path.join(
+            runtime_dir, "kernel-{:d}.json".format(os.getpid())
+        )
+        info = dict(
+            ports,
+            ip="127.0.0.1",
+            transport="tcp",
+            key=str(uuid.uuid4()),
+            signature_scheme="hmac-sha256",
+            kernel_name="",
+        )
+        with open(self.connection_file, "w") as f:
+            json.dump(info, f, indent=2)
+        from ipyida.registry import KernelRegistration
+        self.registration = KernelRegistration(self.connection_file)
+        self.registration.start()
+        self._timer = idaapi.register_timer(self.POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        import select
+        readable, _, _ = select.select(self.sockets, [], [], 0)
+        if readable:
+            self._timer = None
+            self.on_connection()
+            return -1
+        return self.POLL_INTERVAL
+
+    def close(self, unregister=True):
+        if self._timer is not None:
+            idaapi.unregister_timer(self._timer)
+            self._timer = None
+        if self.registration is not None:
+            self.registration.stop(unregister)
+            self.registration = None
+        for sock in self.sockets:
+            sock.close()
+        self.sockets = []
 
 
 def PLUGIN_ENTRY():
@@ -88,13 +255,6 @@ def _setup_asyncio_event_loop():
         print("Note: qasync event loop already set up.")
 
 
-if (
-    _get_QApplication_instance() is not None
-    and ida_qtconsole.get_qt_version() >= 5
-    and kernel.is_using_ipykernel_5()
-):
-    _setup_asyncio_event_loop()
-
 def monkey_patch_IDAPython_ExecScript():
     """
     This funtion wraps IDAPython_ExecScript to avoid having an empty string has
@@ -102,7 +262,6 @@ def monkey_patch_IDAPython_ExecScript():
     See https://github.com/idapython/src/pull/23
     """
     # Test the behavior IDAPython_ExecScript see if it needs patching
-    import sys, os
     fake_globals = {}
     if idaapi.IDA_SDK_VERSION < 700:
         idaapi.IDAPython_ExecScript(os.devnull, fake_globals)
@@ -81,9 +81,25 @@ from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from qtconsole.manager import QtKernelManager
 from qtconsole.client import QtKernelClient
 from jupyter_client import find_connection_file
+from traitlets import Bool, Integer
+import io
+import tempfile
 import ipyida.kernel
+import ipyida.symbols
 
 class IdaRichJupyterWidget(RichJupyterWidget):
+
+    # Stream output is appended to the console at most once per interval
+    # instead of once per message.
+    output_flush_interval = Integer(16, config=True,
+        help="Interval in milliseconds between two appends of stream output")
+    max_output_lines = Integer(0, config=True,
+        help="""Maximum number of lines of stream output shown for a cell. The
+        rest is written to a file next to the database. 0 (the default)
+        disables the limit.""")
+    spill_output = Bool(True, config=True,
+        help="Write the output over max_output_lines to a file")
+
     def _is_complete(self, source, interactive):
         if ipyida.kernel.is_using_ipykernel_5():
             # The kernel is running on the QT runloop so no need to call
@@ -91,72 +107,248 @@ class IdaRichJupyterWidget(RichJupyterWidget):
             return super(IdaRichJupyterWidget, self)._is_complete(source, interactive)
         # The original implementation in qtconsole is synchronous. IDA Python is
         # single threaded and the IPython kernel runs on the same thread as the
-        # UI so the is_complete request can never be processed by the kernel,
-        # which results in always returning (False, '') and having to to
-        # <Shift-Enter> to execute a command.
+        # UI so the is_complete request can never be processed by the kernel
+        # while we wait for the reply, which freezes the UI until the timeout.
         #
-        # Our solution here was to copy the original _is_complete and call the
-        # kernel's do_one_iteration before expecting a reply. Original implemetation is in:
-        # https://github.com/jupyter/qtconsole/blob/4.3.1/qtconsole/frontend_widget.py#L260
+        # The kernel runs in the same process, so we ask its shell directly
+        # instead of making a request.
+        status, indent = ipyida.kernel.check_complete(source)
+        return status != 'incomplete', indent
+
+    # Delay before resolving the word under the mouse while Ctrl is held
+    HOVER_DELAY_MS = 30
+    # Maximum number of words kept in the resolution cache
+    WORD_CACHE_SIZE = 10000
+
+    def _resolve_word(self, word):
+        """
+        Return the address designated by word (hex number or name), or None.
+        Results are cached until a name or a segment changes.
+        """
+        index = ipyida.symbols.name_index
+        cache = getattr(self, "_word_cache", None)
+        if cache is None or self._word_cache_generation != index.generation \
+           or len(cache) > self.WORD_CACHE_SIZE:
+            cache = self._word_cache = {}
+            self._word_cache_generation = index.generation
         try:
-            from queue import Empty
-        except ImportError:
-            from Queue import Empty
-        kc = self.blocking_client
-        if kc is None:
-            self.log.warn("No blocking client to make is_complete requests")
-            return False, u''
-        msg_id = kc.is_complete(source)
-        MAX_RETRY_COUNT = 5
-        retry_count = 0
-        is_complete_timeout = self.is_complete_timeout / float(MAX_RETRY_COUNT)
-        while True:
+            return cache[word]
+        except KeyError:
+            pass
+        addr = None
+        if word and (word[0].isalnum() or word[0] in "_$@?."):
+            min_ea, max_ea = index.bounds
             try:
-                ipyida.kernel.do_one_iteration()
-                reply = kc.shell_channel.get_msg(block=True, timeout=is_complete_timeout)
-            except Empty:
-                ipyida.kernel.do_one_iteration()
-                if retry_count < MAX_RETRY_COUNT:
-                    retry_count += 1
-                    continue
-                else:
-                    # assume incomplete output if we get no reply in time
-                    return False, u''
-            if reply['parent_header'].get('msg_id', None) == msg_id:
-                status = reply['content'].get('status', u'complete')
-                indent = reply['content'].get('indent', u'')
-                return status != 'incomplete', indent
+                ea = int(word, 16)
+            except ValueError:
+                ea = idaapi.get_name_ea(min_ea, word)
+            if ea >= min_ea and ea < max_ea:
+                addr = ea
+        cache[word] = addr
+        return addr
 
     def _action_on_click(self, string):
-        import re
-        min_ea, max_ea = ipyida.kernel.get_ea_bounds()
-        try:
-            addr = int(string, 16)
-        except ValueError:
-            addr = idaapi.get_name_ea(min_ea, string)
-        if addr >= min_ea and addr < max_ea:
+        addr = self._resolve_word(string)
+        if addr is not None:
             return lambda: idaapi.jumpto(addr)
         else:
             return None
 
+    def _action_at(self, pos):
+        cursor = self._control.cursorForPosition(pos)
+        # Note: the cursor is a copy, so selection wont' affect the
+        # visible QTextEdit
+        cursor.select(QtGui.QTextCursor.WordUnderCursor)
+        return self._action_on_click(cursor.selectedText())
+
+    def _schedule_hover(self, pos):
+        # Mouse moves are coalesced: only the last position is resolved once
+        # the mouse stops for HOVER_DELAY_MS.
+        self._hover_pos = pos
+        timer = getattr(self, "_hover_timer", None)
+        if timer is None:
+            timer = self._hover_timer = QtCore.QTimer(self)
+            timer.setSingleShot(True)
+            timer.setInterval(self.HOVER_DELAY_MS)
+            timer.timeout.connect(self._update_hover_cursor)
+        timer.start()
+
+    def _update_hover_cursor(self):
+        if self._action_at(self._hover_pos):
+            self._control.viewport().setCursor(QtCore.Qt.PointingHandCursor)
+        else:
+            self._control.viewport().setCursor(QtCore.Qt.IBeamCursor)
+
     def eventFilter(self, obj, event):
         if event.type() in (QtCore.QEvent.MouseMove, QtCore.QEvent.MouseButtonPress):
             if event.modifiers() & QtCore.Qt.ControlModifier:
-                cursor = self._control.cursorForPosition(event.pos())
-                # Note: the cursor is a copy, so selection wont' affect the
-                # visible QTextEdit
-                cursor.select(QtGui.QTextCursor.WordUnderCursor)
-                action = self._action_on_click(cursor.selectedText())
-                if action:
-                    self._control.viewport().setCursor(QtCore.Qt.PointingHandCursor)
-                    if event.button() == QtCore.Qt.LeftButton:
-                        action()
+                if event.type() == QtCore.QEvent.MouseMove:
+                    self._schedule_hover(event.pos())
                 else:
-                    self._control.viewport().setCursor(QtCore.Qt.IBeamCursor)
+                    action = self._action_at(event.pos())
+                    if action:
+                        self._control.viewport().setCursor(QtCore.Qt.PointingHandCursor)
+                        if event.button() == QtCore.Qt.LeftButton:
+                            action()
+                    else:
+                        self._control.viewport().setCursor(QtCore.Qt.IBeamCursor)
             else:
+                timer = getattr(self, "_hover_timer", None)
+                if timer is not None:
+                    timer.stop()
                 self._control.viewport().setCursor(QtCore.Qt.IBeamCursor)
+        elif event.type() == QtCore.QEvent.MouseButtonRelease and \
+             event.button() == QtCore.Qt.LeftButton:
+            anchor = self._control.anchorAt(event.pos())
+            if anchor and anchor in getattr(self, "_spill_anchors", ()):
+                QtGui.QDesktopServices.openUrl(QtCore.QUrl(anchor))
+                return True
         return super(IdaRichJupyterWidget, self).eventFilter(obj, event)
 
+    #
+    # Output governor
+    #
+    # Appending to the QTextEdit is the slow part of displaying output, and a
+    # cell printing in a loop sends one stream message per flush of sys.stdout.
+    # Stream text is buffered and appended once per output_flush_interval.
+    # Past max_output_lines for a cell, the text goes to a file instead and a
+    # link to that file is shown when the kernel is idle again: the reply of
+    # the cell can arrive before its last stream messages, the idle status
+    # can't.
+    #
+
+    def _dispatch(self, msg):
+        msg_type = msg['header']['msg_type']
+        if msg_type == 'stream':
+            self._queue_stream(msg)
+            return
+        # Keep the output in order: whatever comes after the stream messages
+        # must be appended after them.
+        self.flush_stream_buffer()
+        if msg_type == 'status' and msg['content'].get('execution_state') == 'idle':
+            self._finish_cell(msg['parent_header'].get('msg_id'))
+        super(IdaRichJupyterWidget, self)._dispatch(msg)
+
+    def _queue_stream(self, msg):
+        if not self.include_output(msg):
+            return
+        text = msg['content']['text']
+        cell_id = msg['parent_header'].get('msg_id')
+        if cell_id != getattr(self, "_output_cell_id", None):
+            self.flush_stream_buffer()
+            self._finish_cell(getattr(self, "_output_cell_id", None))
+            self._output_cell_id = cell_id
+            self._output_cell_lines = 0
+            self._output_cell_truncated = 0
+
+        limit = self.max_output_lines
+        if limit > 0:
+            remaining = limit - self._output_cell_lines
+            if remaining <= 0:
+                visible, rest = "", text
+            else:
+                # Cut after the remaining-th newline, if there is one
+                end = -1
+                for _ in range(remaining):
+                    end = text.find("\n", end + 1)
+                    if end < 0:
+                        break
+                if end < 0:
+                    visible, rest = text, ""
+                else:
+                    visible, rest = text[:end+1], text[end+1:]
+            if rest:
+                self._output_cell_truncated += rest.count("\n") or 1
+                self._spill(cell_id, rest)
+            text = visible
+        self._output_cell_lines += text.count("\n")
+
+        if not text:
+            return
+        buf = getattr(self, "_stream_buffer", None)
+        if buf is None:
+            buf = self._stream_buffer = []
+        buf.append(text)
+        timer = getattr(self, "_stream_timer", None)
+        if timer is None:
+            timer = self._stream_timer = QtCore.QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(self.flush_stream_buffer)
+        if not timer.isActive():
+            timer.start(self.output_flush_interval)
+
+    def flush_stream_buffer(self):
+        "Append the buffered stream output to the console"
+        timer = getattr(self, "_stream_timer", None)
+        if timer is not None:
+            timer.stop()
+        buf = getattr(self, "_stream_buffer", None)
+        if not buf:
+            return
+        text = "".join(buf)
+        del buf[:]
+        self.flush_clearoutput()
+        self.append_stream(text)
+
+    def _finish_cell(self, cell_id):
+        "Show the link to the spilled output of cell_id, if any"
+        if cell_id is None or cell_id != getattr(self, "_output_cell_id", None):
+            return
+        truncated = self._output_cell_truncated
+        if not truncated:
+            return
+        self._output_cell_truncated = 0
+        if self._spill_file is not None:
+            self._spill_file.flush()
+            url = QtCore.QUrl.fromLocalFile(self._spill_file.name).toString()
+            self._spill_anchors.add(url)
+            self._append_html(
+                u'<a href="{:s}">{:d} lines truncated \u2014 open full output</a><br>'
+                .format(url, truncated),
+                before_prompt=True
+            )
+        else:
+            self._append_plain_text(
+                u"{:d} lines truncated\n".format(truncated), before_prompt=True
+            )
+
+    _spill_file = None
+    _spill_cell_id = None
+
+    def _spill_path(self):
+        "A file next to the database, unique to this console session"
+        idb_path = ""
+        if hasattr(idaapi, "get_path"):
+            idb_path = idaapi.get_path(idaapi.PATH_TYPE_IDB)
+        directory = os.path.dirname(idb_path) or tempfile.gettempdir()
+        if not os.access(directory, os.W_OK):
+            directory = tempfile.gettempdir()
+        name = os.path.splitext(os.path.basename(idb_path))[0] or "ipyida"
+        return os.path.join(directory, "{:s}.ipyida-output-{:s}.txt".format(
+            name, self.kernel_client.session.session[:8]
+        ))
+
+    def _spill(self, cell_id, text):
+        if not self.spill_output:
+            return
+        if self._spill_file is None:
+            try:
+                self._spill_file = io.open(self._spill_path(), "a", encoding="utf-8")
+            except (IOError, OSError):
+                self.spill_output = False
+                return
+            self._spill_anchors = set()
+        if cell_id != self._spill_cell_id:
+            self._spill_cell_id = cell_id
+            self._spill_file.write(u"\n# Output of request {:s}\n".format(cell_id or "?"))
+        self._spill_file.write(text)
+
+    def close_spill_file(self):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+            self._spill_cell_id = None
+
 _user_widget_options = {}
 
 def set_widget_options(options):
@@ -233,6 +425,7 @@ class IPythonConsole(idaapi.PluginForm):
 
     def OnClose(self, form):
         try:
+            self.ipython_widget.close_spill_file()
             self.kernel_client.stop_channels()
         except:
             import traceback
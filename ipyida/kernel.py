@@ -17,8 +17,19 @@ import sys
 import os
 import logging
 import json
+import time
+import threading
 import idaapi
 
+from .symbols import name_index, get_ea_bounds
+from . import hexdump
+from .segments import segment_buffers
+from . import startup
+from . import stats
+from . import cache
+from .analysis_index import analysis_index
+from .registry import KernelRegistration
+
 # The IPython kernel will override sys.std{out,err}. We keep a copy to let the
 # existing embeded IDA console continue working, and also let IPython output to
 # it.
@@ -47,23 +58,6 @@ def is_using_ipykernel_5():
     import ipykernel
     return hasattr(ipykernel.kernelbase.Kernel, "process_one")
 
-def get_ea_bounds():
-    """
-    Wraps getting the min and max ea to use either inf_get_min_ea
-    (IDA >= 7.?) or get_inf_structure (IDA < 7.?)
-
-    Returns: a tuple (min_ea, max_ea)
-    """
-    if hasattr(idaapi, "inf_get_min_ea"):
-        return (
-            idaapi.inf_get_min_ea(),
-            idaapi.inf_get_max_ea()
-        )
-    else:
-        inf = idaapi.get_inf_structure()
-        return ( inf.min_ea, inf.max_ea )
-
-
 class IDATeeOutStream(ipykernel.iostream.OutStream):
 
     def _setup_stream_redirects(self, name):
@@ -87,11 +81,171 @@ class IDATeeOutStream(ipykernel.iostream.OutStream):
 
     def write(self, string):
         "Write on both the previously saved IDA std output and zmq's stream"
-        if self.name == "stdout" and _ida_stdout:
-            _ida_stdout.write(string)
-        elif self.name == "stderr" and _ida_stderr:
-            _ida_stderr.write(string)
-        super(self.__class__, self).write(string)
+        mode = _tee_options["mode"]
+        if mode != "zmq":
+            if self.name == "stdout" and _ida_stdout:
+                _ida_console.write(_ida_stdout, string)
+            elif self.name == "stderr" and _ida_stderr:
+                _ida_console.write(_ida_stderr, string)
+        if mode != "console":
+            super(IDATeeOutStream, self).write(string)
+
+    def flush(self):
+        # Called by the kernel at the end of each cell
+        _ida_console.flush()
+        super(IDATeeOutStream, self).flush()
+
+_tee_options = {
+    # Where IDATeeOutStream sends the output of the kernel:
+    #   "tee": IDA's output window and IPython clients
+    #   "console": IDA's output window only
+    #   "zmq": IPython clients only
+    "mode": "tee",
+    # Batch writes to IDA's output window, which repaints on every write. The
+    # batch is written when it reaches flush_size characters, flush_interval
+    # seconds after its first write or at the end of the cell.
+    "buffered": True,
+    "flush_size": 64 * 1024,
+    "flush_interval": 0.2,
+    # Maximum number of lines written to IDA's output window per second. Extra
+    # lines are dropped and counted. Output without newlines counts as a line
+    # every 256 characters. None means no limit.
+    "max_lines_per_second": None,
+}
+
+def set_tee_options(options):
+    """
+    This function is intended to be called in ipyidarc.py to change how the
+    kernel output is sent to IDA's output window and IPython clients.
+
+    Args: options is expected to be a dict with any of the keys of
+    _tee_options.
+    """
+    _tee_options.update(options)
+
+class _IDAConsoleWriter(object):
+    """
+    Batches and rate limits writes to IDA's output window. Shared by the
+    stdout and stderr streams so their output stays in order.
+    """
+
+    # Output without newlines counts as a line every WRAP_WIDTH characters for
+    # the rate limit
+    WRAP_WIDTH = 256
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._buffer_size = 0
+        self._last_flush = time.time()
+        self._rate_second = 0
+        self._rate_lines = 0
+        self._column = 0
+        self._timer_armed = False
+        self.dropped_lines = 0
+
+    def _count_lines(self, string):
+        newlines = string.count("\n")
+        if newlines:
+            self._column = len(string) - string.rindex("\n") - 1
+        else:
+            self._column += len(string)
+        wrapped, self._column = divmod(self._column, self.WRAP_WIDTH)
+        return newlines + wrapped
+
+    def write(self, stream, string):
+        limit = _tee_options["max_lines_per_second"]
+        with self._lock:
+            if limit is not None:
+                now = int(time.time())
+                if now != self._rate_second:
+                    self._rate_second = now
+                    self._rate_lines = 0
+                lines = self._count_lines(string)
+                if self._rate_lines >= limit:
+                    self.dropped_lines += lines
+                    return
+                self._rate_lines += lines
+            if not _tee_options["buffered"]:
+                pending = [ (stream, string) ]
+            else:
+                self._buffer.append((stream, string))
+                self._buffer_size += len(string)
+                if self._buffer_size < _tee_options["flush_size"] and \
+                   time.time() - self._last_flush < _tee_options["flush_interval"]:
+                    # Nothing else may be written for a while, for instance
+                    # if the cell is computing after printing a progress line
+                    self._arm_timer()
+                    return
+                pending = self._take_buffer()
+        self._write_pending(pending)
+
+    def _arm_timer(self):
+        if self._timer_armed:
+            return
+        self._timer_armed = True
+        interval = max(1, int(_tee_options["flush_interval"] * 1000))
+        def register():
+            idaapi.register_timer(interval, self._on_timer)
+            return 0
+        if isinstance(threading.current_thread(), threading._MainThread):
+            register()
+        else:
+            # Output of a %%background cell: timers are registered from the
+            # main thread
+            idaapi.execute_sync(register, idaapi.MFF_FAST | idaapi.MFF_NOWAIT)
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer_armed = False
+        self.flush()
+        return -1
+
+    def flush(self):
+        with self._lock:
+            pending = self._take_buffer()
+            if self.dropped_lines > 0:
+                pending.append((_ida_stderr,
+                    "[IPyIDA] {:d} lines were not written to IDA's output window "
+                    "(max_lines_per_second is {})\n".format(
+                        self.dropped_lines, _tee_options["max_lines_per_second"]
+                    )
+                ))
+                self.dropped_lines = 0
+        self._write_pending(pending)
+
+    def _take_buffer(self):
+        pending = self._buffer
+        self._buffer = []
+        self._buffer_size = 0
+        self._last_flush = time.time()
+        return pending
+
+    @staticmethod
+    def _write_pending(pending):
+        # Join consecutive writes to the same stream into a single call
+        i = 0
+        while i < len(pending):
+            stream = pending[i][0]
+            j = i
+            while j < len(pending) and pending[j][0] is stream:
+                j += 1
+            if stream:
+                stream.write("".join(s for _, s in pending[i:j]))
+            i = j
+
+_ida_console = _IDAConsoleWriter()
+
+def flush_ida_console():
+    """
+    Write the output buffered for IDA's output window. Called by a timer
+    after flush_interval, which doesn't fire without IDA's GUI.
+    """
+    _ida_console.flush()
+
+def ida_console_flush_interval():
+    "Returns: the delay in seconds before buffered output is flushed"
+    return max(0.01, _tee_options["flush_interval"])
 
 def wrap_excepthook(ipython_excepthook):
     """
@@ -103,13 +257,135 @@ def wrap_excepthook(ipython_excepthook):
         ipython_excepthook(*args)
     return ipyida_excepthook
 
+class _AdaptiveScheduler(object):
+    """
+    Runs the loop of the kernel for ipykernel < 5 from an IDA timer.
+
+    The delay between two iterations doubles every time no message is waiting
+    on the kernel sockets, up to max_interval, and drops to MIN_INTERVAL as
+    soon as one arrives. It stays there for ACTIVE_PERIOD seconds after the
+    last message. When a Qt application is running, socket notifiers on the
+    zmq sockets wake the kernel as soon as a message is ready and the timer
+    is only a fallback. Without them, the delay never exceeds the poll
+    interval of the kernel, which was used as a fixed delay before.
+    """
+
+    MIN_INTERVAL = 0.001
+    MAX_INTERVAL_WITH_NOTIFIER = 2.0
+    ACTIVE_PERIOD = 1.0
+    # Maximum number of iterations done at once when messages are waiting
+    MAX_BURST = 16
+
+    def __init__(self, kernel):
+        self.kernel = kernel
+        self.max_interval = getattr(kernel, "_poll_interval", 0.01)
+        self.interval = self.MIN_INTERVAL
+        self.last_activity = time.time()
+        self._timer = None
+        self._notifiers = []
+
+    def start(self):
+        self._notifiers = self._create_notifiers()
+        self._timer = idaapi.register_timer(
+            int(1000 * self.interval), self._on_timer
+        )
+
+    def stop(self):
+        for notifier in self._notifiers:
+            notifier.setEnabled(False)
+        self._notifiers = []
+        if self._timer is not None:
+            idaapi.unregister_timer(self._timer)
+            self._timer = None
+
+    @property
+    def _sockets(self):
+        streams = list(self.kernel.shell_streams)
+        if self.kernel.control_stream:
+            streams.append(self.kernel.control_stream)
+        return [ stream.socket for stream in streams ]
+
+    def _has_pending_messages(self):
+        import zmq
+        return any(
+            socket.getsockopt(zmq.EVENTS) & zmq.POLLIN
+            for socket in self._sockets
+        )
+
+    def _run_pending(self):
+        "Iterate while messages are waiting. Returns True if any was."
+        count = 0
+        while count < self.MAX_BURST and self._has_pending_messages():
+            self.kernel.do_one_iteration()
+            count += 1
+        if count > 0:
+            self.last_activity = time.time()
+        return count > 0
+
+    def _rearm(self):
+        "Run the timer again right away instead of after the current interval"
+        self.interval = self.MIN_INTERVAL
+        if self._timer is not None:
+            idaapi.unregister_timer(self._timer)
+        self._timer = idaapi.register_timer(
+            int(1000 * self.interval), self._on_timer
+        )
+
+    def _on_timer(self):
+        if self._run_pending():
+            self.interval = self.MIN_INTERVAL
+        else:
+            # Let the kernel flush its outgoing streams
+            self.kernel.do_one_iteration()
+            if time.time() - self.last_activity > self.ACTIVE_PERIOD:
+                if self._notifiers:
+                    max_interval = self.MAX_INTERVAL_WITH_NOTIFIER
+                else:
+                    max_interval = self.max_interval
+                self.interval = min(2 * self.interval, max_interval)
+        return int(1000 * self.interval)
+
+    def _on_socket_ready(self, *args):
+        # The zmq file descriptor is edge-triggered: the notifier won't fire
+        # again for messages left after a burst, the timer has to take them.
+        if self._run_pending():
+            if self._has_pending_messages():
+                self._rearm()
+            else:
+                self.interval = self.MIN_INTERVAL
+
+    def _create_notifiers(self):
+        try:
+            import zmq
+            from .ida_qtconsole import QtCore
+        except Exception:
+            return []
+        if QtCore.QCoreApplication.instance() is None:
+            return []
+        notifiers = []
+        for socket in self._sockets:
+            notifier = QtCore.QSocketNotifier(
+                socket.getsockopt(zmq.FD), QtCore.QSocketNotifier.Read
+            )
+            notifier.activated.connect(self._on_socket_ready)
+            notifiers.append(notifier)
+        return notifiers
+
 class IPythonKernel(object):
     def __init__(self):
         self._timer = None
         self.connection_file = None
         self.notebook_mgr = None
+        self.registration = None
+        self.name_index = name_index
+        # ea -> symbol, precomputed while printing a container of ints
+        self._symbols = None
     
-    def start(self):
+    def start(self, connection_file=None):
+        """
+        Start the kernel. If connection_file is given and exists, the kernel
+        uses the ports and key it contains.
+        """
         if self.started:
             sys.stderr.write("Tried to start IPython kernel but already running.\n")
             return
@@ -125,27 +401,60 @@ class IPythonKernel(object):
             if os.path.exists(IPYIDARC_PATH):
                 IPKernelApp.exec_files = [ IPYIDARC_PATH ]
 
+            kwargs = {}
+            if connection_file is not None:
+                kwargs["connection_file"] = connection_file
             app = IPKernelApp.instance(
                 outstream_class='ipyida.kernel.IDATeeOutStream',
                 # We provide our own logger here because the default one from
                 # traitlets adds a handler that expect stderr to be a regular
                 # file object, and IDAPython's sys.stderr is actually a
                 # IDAPythonStdOut instance
-                log=logging.getLogger("ipyida_kernel")
+                log=logging.getLogger("ipyida_kernel"),
+                **kwargs
             )
-            app.initialize()
+            if hasattr(app, "_run_exec_files"):
+                app._run_exec_files = startup.profiler.wrap("ipyidarc.py", app._run_exec_files)
+            with startup.profiler.phase("IPKernelApp.initialize"):
+                app.initialize()
 
             main = app.kernel.shell._orig_sys_modules_main_mod
             if main is not None:
                 sys.modules[app.kernel.shell._orig_sys_modules_main_name] = main
 
-            app.kernel.shell.display_formatter.formatters["text/plain"].for_type(int, self.print_int)
+            # Make ipyida.bulk available in the console, unless ipyidarc.py
+            # already defined something with the same name.
+            from . import bulk
+            if "bulk" not in app.kernel.shell.user_ns:
+                app.kernel.shell.push({ "bulk": bulk }, interactive=False)
+
+            app.kernel.shell.register_magic_function(startup.ipyida_startup)
+            app.kernel.shell.register_magic_function(stats.ipyida_stats)
+            app.kernel.shell.register_magic_function(cache.ipyida_cache)
+            stats.kernel_stats.instrument(app.kernel)
+
+            from . import completion
+            completion.register(app.kernel.shell, self.name_index)
+
+            plain_formatter = app.kernel.shell.display_formatter.formatters["text/plain"]
+            plain_formatter.for_type(int, self.print_int)
+            for container in (list, tuple, set, frozenset):
+                plain_formatter.for_type(
+                    container, self.batch_symbols(plain_formatter.lookup_by_type(container))
+                )
             if sys.version_info.major >= 3:
                 app.kernel.shell.display_formatter.formatters["text/plain"].for_type(bytes, self.print_bytes)
-                from .notebook import NotebookManager
-                self.notebook_mgr = NotebookManager(app.connection_file)
+                app.kernel.shell.display_formatter.formatters["text/plain"].for_type(memoryview, self.print_bytes)
+                from . import notebook
+                self.notebook_mgr = notebook.NotebookManager(app.connection_file)
                 for func in self.notebook_mgr.magic_functions:
                     app.kernel.shell.register_magic_function(func)
+                if notebook.PREWARM:
+                    self.notebook_mgr.prewarm()
+                from . import background
+                app.kernel.shell.register_magic_function(
+                    background.background, magic_kind="cell"
+                )
 
             # IPython <= 3.2.x will send exception to sys.__stderr__ instead of
             # sys.stderr. IDA's console will not be able to display exceptions if we
@@ -162,61 +471,90 @@ class IPythonKernel(object):
 
         app.shell.set_completer_frame()
 
-        app.kernel.start()
+        with startup.profiler.phase("Kernel.start"):
+            app.kernel.start()
+
+        self.name_index.hook()
+        segment_buffers.hook()
+        cache.store.hook()
+        # Tables are only loaded when used
+        analysis_index.hook()
+        if stats.DUMP_ENABLED:
+            stats.kernel_stats.start_dump()
 
         self.connection_file = app.connection_file
+        # Lets `ipyida connect <idb>` find this kernel
+        self.registration = KernelRegistration(
+            getattr(app, "abs_connection_file", app.connection_file)
+        )
+        self.registration.start()
 
         if not is_using_ipykernel_5():
             app.kernel.do_one_iteration()
+            self._timer = _AdaptiveScheduler(app.kernel)
+            self._timer.start()
 
-            def ipython_kernel_iteration():
-                app.kernel.do_one_iteration()
-                return int(1000 * app.kernel._poll_interval)
-            self._timer = idaapi.register_timer(int(1000 * app.kernel._poll_interval), ipython_kernel_iteration)
-
-    @staticmethod
-    def print_int(obj, printer, *args):
+    def print_int(self, obj, printer, *args):
         if obj > 9 or obj < -9:
             printer.text(hex(obj))
         else:
             printer.text(str(obj))
-        min_ea, max_ea = get_ea_bounds()
-        if obj >= min_ea and obj < max_ea:
-            addr = idaapi.prev_that(obj+1, min_ea, idaapi.has_name)
-            if addr != idaapi.BADADDR:
-                name = idaapi.get_name(addr)
-                demangled = idaapi.demangle_name(name, 0)
-                if demangled and len(demangled) > 0:
-                    name = demangled
-                printer.text(" ({:s}".format(name))
-                if obj - addr != 0:
-                    printer.text(" + 0x{:x}".format(obj - addr))
-                printer.text(")")
+        if self._symbols is not None and obj in self._symbols:
+            symbol = self._symbols[obj]
+        else:
+            symbol = self.name_index.symbolicate(obj)
+        if symbol is not None:
+            name, offset = symbol
+            printer.text(" ({:s}".format(name))
+            if offset != 0:
+                printer.text(" + 0x{:x}".format(offset))
+            printer.text(")")
+
+    def batch_symbols(self, printer_func):
+        """
+        Returns: a printer calling printer_func with the ints of the container
+        symbolicated at once with symbolicate_many, for print_int to use
+        """
+        def print_container(obj, printer, cycle):
+            if self._symbols is not None or cycle:
+                # Nested container, the outer one already did the lookups
+                return printer_func(obj, printer, cycle)
+            eas = [ i for i in obj if type(i) is int ]
+            if len(eas) < 2:
+                return printer_func(obj, printer, cycle)
+            self._symbols = dict(zip(eas, self.name_index.symbolicate_many(eas)))
+            try:
+                return printer_func(obj, printer, cycle)
+            finally:
+                self._symbols = None
+        return print_container
 
     @staticmethod
     def print_bytes(obj, printer, *args):
-        if all(b >= 0x20 and b < 0x80 for b in obj):
-            printer.text(repr(obj))
+        # Only look for a printable string in buffers small enough to be
+        # displayed entirely.
+        if len(obj) <= hexdump.BYTES_PER_LINE * 32 and hexdump.is_printable(obj):
+            # bytes() so memoryviews show their content
+            printer.text(repr(bytes(obj)))
         else:
-            def to_single_char(b):
-                if   b <  0x20: return " "
-                elif b >= 0x80: return "."
-                else: return chr(b)
-            for i in range(0, len(obj), 16):
-                block = obj[i:i+16]
-                printer.text("{:08X}: {:23s}  {:23s} |{:16s}|\n".format(
-                    i,
-                    " ".join("{:02X}".format(b) for b in block[:8]),
-                    " ".join("{:02X}".format(b) for b in block[8:]),
-                    "".join(to_single_char(b) for b in block)
-                ))
+            printer.text(hexdump.render(obj))
 
     def stop(self):
         if self._timer is not None:
-            idaapi.unregister_timer(self._timer)
+            self._timer.stop()
+        self.name_index.unhook()
+        self.name_index.invalidate()
+        segment_buffers.unhook()
+        cache.store.unhook()
+        analysis_index.unhook()
+        stats.kernel_stats.stop_dump()
+        _ida_console.flush()
         if self.notebook_mgr is not None:
             self.notebook_mgr.shutdown()
             self.notebook_mgr = None
+        if self.registration is not None:
+            self.registration.stop()
+            self.registration = None
         self._timer = None
         self.connection_file = None
 
@@ -233,3 +571,38 @@ def do_one_iteration():
         app.kernel.do_one_iteration()
     else:
         raise Exception("Kernel is not initialized")
+
+def check_complete(source):
+    """
+    Check if source is ready to be executed, like an is_complete_request, but
+    without a round trip to the kernel. Uses the kernel's shell if it's
+    initialized and codeop otherwise.
+
+    Returns: a tuple (status, indent) where status is 'complete',
+    'incomplete' or 'invalid'
+    """
+    if IPKernelApp.initialized():
+        # Same as ipykernel's do_is_complete
+        shell = IPKernelApp.instance().shell
+        transformer_manager = getattr(shell, 'input_transformer_manager', None)
+        if transformer_manager is None:
+            transformer_manager = shell.input_splitter
+        status, indent_spaces = transformer_manager.check_complete(source)
+        return status, u' ' * (indent_spaces or 0)
+
+    import codeop
+    try:
+        code = codeop.compile_command(source, "<input>", "single")
+    except (SyntaxError, OverflowError, ValueError):
+        # "single" rejects multiple statements, which are fine in a cell
+        try:
+            code = compile(source, "<input>", "exec")
+        except (SyntaxError, OverflowError, ValueError):
+            return u'invalid', u''
+    if code is not None:
+        return u'complete', u''
+    last_line = source.rstrip("\n").split("\n")[-1]
+    indent = last_line[:len(last_line) - len(last_line.lstrip())]
+    if last_line.rstrip().endswith(":"):
+        indent += u' ' * 4
+    return u'incomplete', indent
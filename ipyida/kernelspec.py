@@ -0,0 +1,218 @@
+# -*- encoding: utf8 -*-
+#
+# This module lets a Jupyter Notebook server started by IPyIDA talk directly
+# to the kernels running in IDA, without jupyter-kernel-proxy relaying every
+# message through another process.
+#
+# It is imported by the notebook server, outside of IDA. The server lists one
+# kernelspec per kernel of the registry (see ipyida.registry), named
+# `ipyida-<kernel id>`. Starting one of them connects to the ports of the
+# kernel in IDA. The process started for it only waits for IDA to exit, so
+# the server can tell when the kernel is gone.
+#
+#   python -m ipyida.kernelspec latency <idb>
+#
+# compares the round-trip time of requests sent directly to the kernel of
+# <idb> and through jupyter-kernel-proxy.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import os
+import subprocess
+import sys
+import time
+
+from jupyter_client.ioloop import IOLoopKernelManager
+from jupyter_client.kernelspec import KernelSpecManager
+
+from .registry import Registry, pid_alive
+
+SPEC_PREFIX = "ipyida-"
+
+# Arguments to start a notebook server using the classes of this module
+NOTEBOOK_ARGS = [
+    # The asynchronous manager of recent notebook versions expects
+    # asynchronous kernel managers.
+    "--NotebookApp.kernel_manager_class="
+        "notebook.services.kernels.kernelmanager.MappingKernelManager",
+    "--NotebookApp.kernel_spec_manager_class=ipyida.kernelspec.IPyIDAKernelSpecManager",
+    "--MappingKernelManager.kernel_manager_class=ipyida.kernelspec.IPyIDAKernelManager",
+]
+
+def spec_name(entry):
+    "Returns: the name of the kernelspec of a registry entry"
+    return SPEC_PREFIX + entry["kernel_id"]
+
+def _find_entry(name):
+    if not name.startswith(SPEC_PREFIX):
+        return None
+    return next((e for e in Registry().entries() if spec_name(e) == name), None)
+
+def _resource_dir():
+    # Files in the resource directory are served by the notebook server, so
+    # this is an empty directory rather than the package.
+    from jupyter_core.paths import jupyter_runtime_dir
+    path = os.path.join(jupyter_runtime_dir(), "ipyida-kernelspec")
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    return path
+
+def _spec_dict(entry):
+    return dict(
+        argv=[ sys.executable, "-m", "ipyida.kernelspec", "wait", str(entry["pid"]) ],
+        display_name="IPyIDA ({:s})".format(os.path.basename(entry["idb"])),
+        language="python",
+        # The waiting process can't forward signals to IDA
+        interrupt_mode="message",
+        metadata=dict(ipyida=dict(idb=entry["idb"], pid=entry["pid"])),
+    )
+
+
+class IPyIDAKernelSpecManager(KernelSpecManager):
+    "Adds a kernelspec for each running IPyIDA kernel to the installed ones"
+
+    def get_kernel_spec(self, kernel_name):
+        entry = _find_entry(kernel_name)
+        if entry is None:
+            return super(IPyIDAKernelSpecManager, self).get_kernel_spec(kernel_name)
+        return self.kernel_spec_class(resource_dir=_resource_dir(), **_spec_dict(entry))
+
+    def get_all_specs(self):
+        specs = super(IPyIDAKernelSpecManager, self).get_all_specs()
+        for entry in Registry().entries():
+            specs[spec_name(entry)] = dict(
+                resource_dir=_resource_dir(), spec=_spec_dict(entry)
+            )
+        return specs
+
+
+class IPyIDAKernelManager(IOLoopKernelManager):
+    """
+    For `ipyida-*` kernelspecs, connects to the kernel running in IDA instead
+    of starting one. Shutting it down only disconnects, the kernel keeps
+    running in IDA.
+    """
+
+    def _is_ipyida(self):
+        return self.kernel_name.startswith(SPEC_PREFIX)
+
+    def start_kernel(self, **kw):
+        if not self._is_ipyida():
+            return super(IPyIDAKernelManager, self).start_kernel(**kw)
+        entry = _find_entry(self.kernel_name)
+        if entry is None:
+            raise RuntimeError("The IDA instance of {:s} is gone".format(self.kernel_name))
+        # Use the ports and key of IDA's kernel. The file is left marked as
+        # not written by this manager, so cleaning up won't remove it.
+        self.load_connection_file(entry["connection_file"])
+        self.connection_file = entry["connection_file"]
+        self._connection_file_written = False
+        self.kernel = subprocess.Popen(_spec_dict(entry)["argv"])
+        self.post_start_kernel(**kw)
+
+    def restart_kernel(self, now=False, newports=False, **kw):
+        """
+        The kernel in IDA can't be restarted from here, restarting it only
+        reconnects. Once IDA exited there's nothing to reconnect to, the
+        restarter then reports the kernel as dead after its restart limit.
+        """
+        if not self._is_ipyida():
+            return super(IPyIDAKernelManager, self).restart_kernel(now, newports, **kw)
+        if _find_entry(self.kernel_name) is None:
+            return
+        self.shutdown_kernel(now=now, restart=True)
+        self.start_kernel(**kw)
+
+    def interrupt_kernel(self):
+        if not self._is_ipyida():
+            return super(IPyIDAKernelManager, self).interrupt_kernel()
+        self._connect_control_socket()
+        self.session.send(self._control_socket, self.session.msg("interrupt_request", content={}))
+
+    def shutdown_kernel(self, now=False, restart=False):
+        if not self._is_ipyida():
+            return super(IPyIDAKernelManager, self).shutdown_kernel(now, restart)
+        self.stop_restarter()
+        if self.kernel is not None:
+            self.kernel.kill()
+            self.kernel.wait()
+            self.kernel = None
+        if self._control_socket is not None:
+            self._control_socket.close()
+            self._control_socket = None
+
+
+def wait(pid):
+    "Stand-in process of a kernel in IDA, exits with IDA"
+    pid = int(pid)
+    while pid_alive(pid):
+        time.sleep(1)
+    return 0
+
+def _round_trips(client, count):
+    "Returns: the round-trip times of count kernel_info requests, in ms"
+    client.wait_for_ready(timeout=30)
+    times = []
+    for _ in range(count):
+        start = time.time()
+        client.kernel_info()
+        client.get_shell_msg(timeout=10)
+        times.append(1000 * (time.time() - start))
+    return sorted(times)
+
+def _summary(name, times):
+    return "{:10s} median {:7.3f} ms   p90 {:7.3f} ms   max {:7.3f} ms".format(
+        name, times[len(times) // 2], times[int(len(times) * 0.9)], times[-1]
+    )
+
+def latency(idb_path, count=200):
+    """
+    Compare the round-trip time of kernel_info requests sent to the kernel
+    of idb_path directly, like the ipyida kernelspec does, and through
+    jupyter-kernel-proxy. IDA must be idle while this runs.
+    """
+    from jupyter_client import BlockingKernelClient, KernelManager
+    entry = Registry().lookup(idb_path)
+    if entry is None:
+        sys.stderr.write("No IPyIDA kernel for {:s}\n".format(idb_path))
+        return 1
+
+    client = BlockingKernelClient(connection_file=entry["connection_file"])
+    client.load_connection_file()
+    client.start_channels()
+    try:
+        lines = [ _summary("direct", _round_trips(client, count)) ]
+    finally:
+        client.stop_channels()
+
+    try:
+        manager = KernelManager(kernel_name="proxy")
+        manager.kernel_spec
+    except Exception:
+        lines.append("proxy      jupyter-kernel-proxy's kernelspec is not installed")
+    else:
+        # The proxy relays to the connection file accessed last
+        with open(entry["connection_file"], "r"): pass
+        manager.start_kernel()
+        client = manager.client()
+        client.start_channels()
+        try:
+            lines.append(_summary("proxy", _round_trips(client, count)))
+        finally:
+            client.stop_channels()
+            manager.shutdown_kernel(now=True)
+    print("\n".join(lines))
+    return 0
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 2 and argv[0] == "wait":
+        return wait(argv[1])
+    if len(argv) == 2 and argv[0] == "latency":
+        return latency(argv[1])
+    sys.stderr.write("usage: python -m ipyida.kernelspec wait <pid> | latency <idb>\n")
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# -*- encoding: utf8 -*-
+#
+# This module implements lazy imports, meant to be used in ipyidarc.py to
+# avoid paying for every import when the kernel starts.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Placeholder for a module that is imported on the first access to one of
+    its attributes. The placeholder is then replaced by the real module in the
+    namespace it was bound to.
+    """
+
+    def __init__(self, name, namespace=None, bound_name=None):
+        super(LazyModule, self).__init__(name)
+        self.__dict__["_lazy_namespace"] = namespace
+        self.__dict__["_lazy_bound_name"] = bound_name
+        self.__dict__["_lazy_module"] = None
+
+    def _lazy_load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_module"] = module
+            namespace = self.__dict__["_lazy_namespace"]
+            bound_name = self.__dict__["_lazy_bound_name"]
+            if namespace is not None and namespace.get(bound_name) is self:
+                namespace[bound_name] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._lazy_load(), name, value)
+
+    def __dir__(self):
+        return dir(self._lazy_load())
+
+    def __repr__(self):
+        if self.__dict__["_lazy_module"] is not None:
+            return repr(self.__dict__["_lazy_module"])
+        return "<lazy module {!r} (not imported yet)>".format(self.__name__)
+
+def lazy_import(name, as_name=None):
+    """
+    Bind `name` in the caller's namespace to a placeholder that imports the
+    module on first attribute access. Meant to be used in ipyidarc.py:
+
+        import ipyida
+        ipyida.lazy_import("ida_hexrays")
+        ipyida.lazy_import("numpy", "np")
+        ipyida.lazy_import("networkx.algorithms")   # bound as "algorithms"
+
+    The name is available right away in the console and in tab completion,
+    but the module is only imported when it's actually used.
+
+    Returns: the placeholder
+    """
+    if as_name is None:
+        as_name = name.rsplit(".", 1)[-1]
+    namespace = sys._getframe(1).f_globals
+    if name in sys.modules:
+        module = sys.modules[name]
+    else:
+        module = LazyModule(name, namespace, as_name)
+    namespace[as_name] = module
+    return module
@@ -10,6 +10,7 @@
 
 import sys
 import os
+import re
 import subprocess
 import time
 import json
@@ -21,6 +22,27 @@ import nbformat
 from jupyter_client.kernelspec import find_kernel_specs
 from jupyter_client import find_connection_file
 
+# Start a notebook server in the background as soon as a database is open,
+# so %open_notebook doesn't have to wait for it. Can be changed with the
+# IPYIDA_NOTEBOOK_PREWARM environment variable, or by setting
+# ipyida.notebook.PREWARM in idapythonrc.py.
+PREWARM = os.environ.get("IPYIDA_NOTEBOOK_PREWARM", "0") == "1"
+
+# Notebook servers started by IPyIDA connect directly to the kernel in IDA
+# (see ipyida.kernelspec). Set to False to go through jupyter-kernel-proxy.
+# jupyter-kernel-proxy is then only needed to use servers started by hand,
+# and is not installed by %open_notebook.
+DIRECT_KERNEL = True
+
+# Result of the last successful dependency check of %open_notebook
+DEPENDENCY_CACHE_PATH = os.path.join(idaapi.get_user_idadir(), "ipyida_notebook_deps.json")
+
+# Seconds given to the notebook server to log its URL
+SERVER_START_TIMEOUT = 30
+
+# Logged by the server once it listens, with or without a token
+_SERVER_URL_RE = re.compile(r"https?://(?:\[[^]]+\]|[^\s/:]+):(\d+)/")
+
 def _popen_python_module(module, *args, **kwargs):
     # We can't rely on sys.executable because it's set to ida{q,t}{.exe,} in IDA
     if sys.platform == 'win32':
@@ -39,6 +61,42 @@ def _popen_python_module(module, *args, **kwargs):
             python += str(sys.version_info.major)
     return subprocess.Popen([ python, "-m", module ] + list(args), **kwargs)
 
+def _run_python_module(module, *args):
+    "Run a module to completion, printing its output as it comes"
+    proc = _popen_python_module(
+        module, *args,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    for line in proc.stdout:
+        print("   " + line, end="")
+    return proc.wait() == 0
+
+def _distribution_version(name):
+    "Returns: the installed version of a package, without importing it"
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        return None
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+def _required_packages():
+    if DIRECT_KERNEL:
+        return [ "notebook" ]
+    return [ "notebook", "jupyter-kernel-proxy" ]
+
+def _dependency_cache_key():
+    """
+    Returns: what a successful dependency check depends on, or None if it
+    can't be known without importing the packages.
+    """
+    versions = [ _distribution_version(name) for name in _required_packages() ]
+    if None in versions:
+        return None
+    return [ sys.prefix ] + versions
+
 
 class NotebookManager(object):
 
@@ -47,7 +105,13 @@ class NotebookManager(object):
         self.nb_proc = None
         self.nb_pipe_thread = None
         self.nb_pipe_buffer = []
-        self.nb_pipe_lock = threading.Lock()
+        self.nb_server_info = None
+        self.nb_start_failed = False
+        self.nb_start_timer = None
+        self.nb_ready_callbacks = []
+        self.dependencies_ok = False
+        # Protects the fields above, shared with the stdout thread
+        self.nb_lock = threading.Lock()
 
     @staticmethod
     def ensure_kernel_proxy_installed():
@@ -55,9 +119,7 @@ class NotebookManager(object):
             import jupyter_kernel_proxy
         except ImportError:
             print("-> Installing jupyter-kernel-proxy...")
-            return _popen_python_module(
-                "pip", "install", "jupyter-kernel-proxy"
-            ).wait() == 0
+            return _run_python_module("pip", "install", "jupyter-kernel-proxy")
         else:
             return True
 
@@ -65,9 +127,7 @@ class NotebookManager(object):
     def ensure_kernelspec_installed():
         if "proxy" not in find_kernel_specs():
             print("-> Installing jupyter-kernel-proxy kernelspec...")
-            return _popen_python_module(
-                "jupyter_kernel_proxy", "install"
-            ).wait() == 0
+            return _run_python_module("jupyter_kernel_proxy", "install")
         else:
             return True
 
@@ -77,18 +137,78 @@ class NotebookManager(object):
             import notebook
         except ImportError:
             print("-> Installing jupyter-notebook...")
-            return _popen_python_module(
-                "pip", "install", "notebook<7"
-            ).wait() == 0
+            return _run_python_module("pip", "install", "notebook<7")
         else:
             return True
 
-    def _get_running_notebook_config(self):
+    def _dependencies_cached(self):
+        """
+        Returns: True if the dependencies were found by a previous check, in
+        this session or a previous one with the same Python and versions of
+        the required packages.
+        """
+        if self.dependencies_ok:
+            return True
+        try:
+            with open(DEPENDENCY_CACHE_PATH, "r") as f:
+                cache = json.load(f)
+        except (IOError, OSError, ValueError):
+            return False
+        key = _dependency_cache_key()
+        # The kernelspec may have been removed without changing the packages
+        self.dependencies_ok = key is not None and cache.get("key") == key and \
+                               (DIRECT_KERNEL or os.path.isdir(cache.get("kernelspec", "")))
+        return self.dependencies_ok
+
+    def _save_dependency_cache(self):
+        self.dependencies_ok = True
+        key = _dependency_cache_key()
+        if key is None:
+            return
+        cache = dict(key=key)
+        try:
+            if not DIRECT_KERNEL:
+                cache["kernelspec"] = find_kernel_specs()["proxy"]
+            with open(DEPENDENCY_CACHE_PATH, "w") as f:
+                json.dump(cache, f)
+        except (IOError, OSError, KeyError):
+            pass
+
+    def _check_dependencies_thread(self, idb_path, args):
+        "Check and install the dependencies, then open the notebook"
+        try:
+            if not self.ensure_notebook_installed() or \
+               not DIRECT_KERNEL and (not self.ensure_kernel_proxy_installed() or
+                                      not self.ensure_kernelspec_installed()):
+                print("Could not find or install all requirements")
+                return
+            self._save_dependency_cache()
+            self._open_notebook(idb_path, args)
+        except Exception as e:
+            print("Could not open the notebook: {}".format(e))
+
+    def _get_running_notebook_config(self, idb_path):
+        """
+        Returns: the config of a server serving idb_path that was not started
+        by this instance, or None. Such servers go through jupyter-kernel-proxy,
+        they are ignored if its kernelspec isn't installed.
+        """
+        if DIRECT_KERNEL and "proxy" not in find_kernel_specs():
+            return None
         from notebook.notebookapp import list_running_servers
-        idb_path = idaapi.get_path(idaapi.PATH_TYPE_IDB)
         is_idb_under_nb_dir = lambda c: idb_path.startswith(c.get("notebook_dir"))
         return next(filter(is_idb_under_nb_dir, list_running_servers()), None)
 
+    def _get_own_server_config(self, port):
+        """
+        Returns: the config of the server started by this instance, or None.
+        It is found by the port logged in its URL: its pid may not be the one
+        of nb_proc, for instance on Windows where jupyter runs the notebook
+        in a new process.
+        """
+        from notebook.notebookapp import list_running_servers
+        return next((c for c in list_running_servers() if c.get("port") == port), None)
+
     def _parse_args(self, line):
         args = line.split()
         parsed = dict()
@@ -99,16 +219,167 @@ class NotebookManager(object):
             parsed["filename"] = args[0]
         return parsed
 
+    def _is_server_running(self):
+        return self.nb_proc is not None and self.nb_proc.poll() is None
+
+    def _start_server(self, idb_path):
+        """
+        Start a notebook server without waiting for it. It is ready when it
+        logs its URL, see _notebook_stdout_thread.
+        """
+        with self.nb_lock:
+            if self._is_server_running():
+                return
+            print("-> Starting notebook")
+            self.nb_server_info = None
+            self.nb_start_failed = False
+            # The server serves its working directory. Keep IDA's if the
+            # IDB is under it, like when the server was started by hand.
+            cwd = None
+            if not os.path.abspath(idb_path).startswith(os.getcwd() + os.sep):
+                cwd = os.path.dirname(os.path.abspath(idb_path))
+            args = [ "--no-browser", "-y" ]
+            env = None
+            if DIRECT_KERNEL:
+                from .kernelspec import NOTEBOOK_ARGS
+                args += NOTEBOOK_ARGS
+                # The server imports ipyida.kernelspec, even if IPyIDA was
+                # installed in IDA's plugins directory.
+                package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+                env = dict(os.environ)
+                env["PYTHONPATH"] = os.pathsep.join(
+                    [ package_dir ] + [ p for p in [ env.get("PYTHONPATH") ] if p ]
+                )
+            self.nb_proc = _popen_python_module(
+                "jupyter", "notebook", *args,
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, cwd=cwd, env=env
+            )
+            self.nb_pipe_thread = threading.Thread(target=self._notebook_stdout_thread)
+            self.nb_pipe_thread.daemon = True
+            self.nb_pipe_thread.start()
+            self.nb_start_timer = threading.Timer(SERVER_START_TIMEOUT, self._on_start_timeout)
+            self.nb_start_timer.daemon = True
+            self.nb_start_timer.start()
+
+    def _when_ready(self, callback):
+        """
+        Call callback(server config) once the server started by this instance
+        is ready, right away if it already is.
+        """
+        with self.nb_lock:
+            ready = self.nb_server_info is not None
+            if not ready:
+                self.nb_ready_callbacks.append(callback)
+        if ready:
+            callback(self.nb_server_info)
+
+    def _server_ready(self, info):
+        with self.nb_lock:
+            self.nb_server_info = info
+            callbacks, self.nb_ready_callbacks = self.nb_ready_callbacks, []
+            if self.nb_start_timer is not None:
+                self.nb_start_timer.cancel()
+                self.nb_start_timer = None
+        for callback in callbacks:
+            callback(info)
+
+    def _server_failed(self):
+        with self.nb_lock:
+            if self.nb_start_failed or self.nb_server_info is not None:
+                return
+            self.nb_start_failed = True
+            self.nb_ready_callbacks = []
+            output, self.nb_pipe_buffer = self.nb_pipe_buffer, []
+        print("".join(output))
+        print("Couldn't start Jupyter Notebook")
+
+    def _on_start_timeout(self):
+        if self.nb_server_info is None:
+            self.nb_proc.terminate()
+            self._server_failed()
+
+    def prewarm(self):
+        """
+        Start a notebook server in the background once a database is open, so
+        %open_notebook doesn't have to wait for it. Dependencies are not
+        installed, the server is only started if they are already there.
+        """
+        def wait_for_database():
+            idb_path = idaapi.get_path(idaapi.PATH_TYPE_IDB)
+            if not idb_path:
+                return 1000
+            thread = threading.Thread(target=self._prewarm_thread, args=(idb_path,))
+            thread.daemon = True
+            thread.start()
+            return -1
+        if wait_for_database() < 0:
+            return
+        if hasattr(idaapi, "is_idaq") and not idaapi.is_idaq():
+            # IDA timers don't fire in idat or with the idapro module
+            sys.stderr.write("[IPyIDA] Jupyter Notebook is not prewarmed: no "
+                             "database is open and IDA's GUI isn't running\n")
+            return
+        idaapi.register_timer(1000, wait_for_database)
+
+    def _prewarm_thread(self, idb_path):
+        if not self._dependencies_cached():
+            return
+        if self._get_running_notebook_config(idb_path) is None:
+            self._start_server(idb_path)
+
+    def _kernel_name(self, nb_server_info, idb_path):
+        """
+        Returns: the kernelspec connecting the notebook to this kernel. Servers
+        started by IPyIDA connect directly (see ipyida.kernelspec), others go
+        through jupyter-kernel-proxy.
+        """
+        if DIRECT_KERNEL and self._is_server_running() and \
+           nb_server_info is self.nb_server_info:
+            # The server has no proxy kernelspec, use this kernel's even if
+            # the database is registered under another path
+            from .registry import Registry, kernel_id_from_connection_file
+            from .kernelspec import SPEC_PREFIX, spec_name
+            registry = Registry()
+            entry = registry.lookup(idb_path)
+            if entry is not None:
+                return spec_name(entry)
+            kernel_id = kernel_id_from_connection_file(self.connection_file)
+            if not any(e["kernel_id"] == kernel_id for e in registry.entries()):
+                sys.stderr.write("[IPyIDA] This kernel isn't in the kernel registry ({:s}), "
+                                 "the notebook may not find it\n".format(registry.path))
+            return SPEC_PREFIX + kernel_id
+        # Update access time of the file so it's picked up by the proxy.
+        # jupyter-kernel-proxy will use the file with the most recent access
+        # time (like `jupyter console --existing`)
+        with open(find_connection_file(self.connection_file), "r"): pass
+        return "proxy"
+
+    def _open_in_browser(self, nb_server_info, idb_path, ipynb_path):
+        relative_path = os.path.relpath(ipynb_path, nb_server_info.get("notebook_dir"))
+        url = nb_server_info.get("url") + \
+            "notebooks/" + "/".join(relative_path.split(os.path.sep)) + \
+            '?kernel_name=' + self._kernel_name(nb_server_info, idb_path) + \
+            '&token=' + (nb_server_info.get("token") or "")
+        webbrowser.open(url)
+        return url
+
     def open_notebook(self, line):
         """
         Open a Jupyter Notebook in the same directory where the currently open
         .idb (or .i64) is located. Unless specified, the notebook file (.ipynb)
         will have the same name as the IDA database file.
 
+        If dependencies have to be checked or a notebook server has to be
+        started, this returns right away and the browser is opened when the
+        notebook is ready. A successful dependency check is remembered until
+        the packages are upgraded.
+
         The following arguments can be used:
 
-            --skip-dependency-checks    Assumes Notebook and jupyter-kernel-proxy
-                                        are already installed
+            --skip-dependency-checks    Assumes Notebook (and jupyter-kernel-proxy
+                                        if DIRECT_KERNEL is False) is already
+                                        installed
             <filename>                  Filename of the notebook to open.
                                         (.ipynb may be omitted)
         """
@@ -119,34 +390,19 @@ class NotebookManager(object):
 
         args = self._parse_args(line)
 
-        if not args.get("skip_dependency_checks", False):
-            if not self.ensure_notebook_installed() or \
-               not self.ensure_kernel_proxy_installed() or \
-               not self.ensure_kernelspec_installed():
-                raise Exception("Could not find or install all requirements")
-
-        nb_server_info = self._get_running_notebook_config()
-
-        if nb_server_info is None:
-            print("-> Starting notebook")
-            self.nb_proc = _popen_python_module(
-                "jupyter", "notebook", "--no-browser", "-y",
-                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                text=True
+        if not args.get("skip_dependency_checks", False) and \
+           not self._dependencies_cached():
+            print("-> Checking dependencies")
+            thread = threading.Thread(
+                target=self._check_dependencies_thread, args=(idb_path, args)
             )
-            try_count = 0
-            while nb_server_info is None and self.nb_proc.poll() is None and try_count < 10:
-                time.sleep(0.5)
-                nb_server_info = self._get_running_notebook_config()
-                try_count += 1
-            if nb_server_info is None:
-                self.nb_proc.terminate()
-                print(self.nb_proc.stdout.read())
-                raise Exception("Couldn't start Jupyter Notebook")
-            else:
-                self.nb_pipe_thread = threading.Thread(target=self._notebook_stdout_thread)
-                self.nb_pipe_thread.start()
+            thread.daemon = True
+            thread.start()
+            return None
+
+        return self._open_notebook(idb_path, args)
 
+    def _open_notebook(self, idb_path, args):
         ipynb_filename = args.get("filename", os.path.basename(idb_path).rsplit(".", 1)[0])
         if not ipynb_filename.endswith(".ipynb"):
             ipynb_filename += ".ipynb"
@@ -156,27 +412,53 @@ class NotebookManager(object):
             with open(ipynb_path, "w") as f:
                 nb = nbformat.versions[nbformat.current_nbformat].new_notebook()
                 json.dump(nb, f)
-        relative_path = os.path.relpath(ipynb_path, nb_server_info.get("notebook_dir"))
-        url = nb_server_info.get("url") + \
-            "notebooks/" + "/".join(relative_path.split(os.path.sep)) + \
-            '?kernel_name=proxy&token=' + nb_server_info.get("token")
-        # Update access time of the file so it's picked up by the proxy.
-        # jupyter-kernel-proxy will use the file with the most recent access
-        # time (like `jupyter console --existing`)
-        with open(find_connection_file(self.connection_file), "r"): pass
-        webbrowser.open(url)
-        return url
+
+        # The server started by this instance (or prewarmed) doesn't need a
+        # scan of the runtime directory.
+        nb_server_info = None
+        if self._is_server_running():
+            nb_server_info = self.nb_server_info
+            if nb_server_info is None:
+                print("-> Waiting for the notebook server, "
+                      "the browser will open when it's ready")
+                self._when_ready(lambda info: self._open_in_browser(info, idb_path, ipynb_path))
+                return None
+        else:
+            nb_server_info = self._get_running_notebook_config(idb_path)
+
+        if nb_server_info is None:
+            self._start_server(idb_path)
+            print("-> The browser will open when the notebook server is ready")
+            self._when_ready(lambda info: self._open_in_browser(info, idb_path, ipynb_path))
+            return None
+
+        return self._open_in_browser(nb_server_info, idb_path, ipynb_path)
 
     def _notebook_stdout_thread(self):
-        while self.nb_proc.poll() is None:
-            r = self.nb_proc.stdout.readline()
-            with self.nb_pipe_lock:
+        proc = self.nb_proc
+        while proc.poll() is None:
+            r = proc.stdout.readline()
+            with self.nb_lock:
                 self.nb_pipe_buffer.append(r)
+            # The server logs its URL once it's listening
+            m = _SERVER_URL_RE.search(r) if self.nb_server_info is None else None
+            if m is not None:
+                info = None
+                # The server info file may be written right after the log
+                for _ in range(20):
+                    info = self._get_own_server_config(int(m.group(1)))
+                    if info is not None:
+                        break
+                    time.sleep(0.05)
+                if info is not None:
+                    self._server_ready(info)
+        if self.nb_server_info is None:
+            self._server_failed()
 
     def notebook_log(self, line):
         "Print output from Jupyter Notebook started by IPyIDA"
         if self.nb_proc:
-            with self.nb_pipe_lock:
+            with self.nb_lock:
                 for s in self.nb_pipe_buffer:
                     print(s, end="")
                 self.nb_pipe_buffer = []
@@ -188,6 +470,8 @@ class NotebookManager(object):
         return [self.open_notebook, self.notebook_log]
 
     def shutdown(self):
+        if self.nb_start_timer is not None:
+            self.nb_start_timer.cancel()
         if self.nb_proc:
             self.nb_proc.terminate()
         if self.nb_pipe_thread:
@@ -0,0 +1,585 @@
+# -*- encoding: utf8 -*-
+#
+# This module runs the same work on many IPyIDA kernels at once. It is used
+# outside of IDA, by a regular Python process or with `python -m ipyida.pool`.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import argparse
+import ast
+import base64
+import collections
+import inspect
+import itertools
+import os
+import pickle
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from jupyter_client import BlockingKernelClient, find_connection_file
+from jupyter_core.paths import jupyter_runtime_dir
+
+# Result of one task. `error` is None if the task succeeded. `output` is the
+# text printed while it ran, `kernel` the name of the kernel that ran it.
+TaskResult = collections.namedtuple(
+    "TaskResult", ("item", "value", "error", "output", "kernel")
+)
+
+class KernelDied(Exception):
+    "The kernel stopped responding while running a task"
+
+class LaunchError(Exception):
+    "IDA exited before its kernel was ready"
+
+# Defined in the kernel before each call. The function is sent as source code
+# because the kernel can't import what is defined in the caller's __main__.
+# Arguments and results go through pickle, base64 encoded to fit in the
+# code and the user_expressions of the execute request.
+_CALL_HELPER = """
+def _ipyida_pool_call(payload):
+    import base64, pickle, traceback
+    source, name, args, kwargs = pickle.loads(base64.b64decode(payload))
+    namespace = dict(get_ipython().user_ns)
+    try:
+        exec(source, namespace)
+        result = (True, namespace[name](*args, **kwargs))
+        data = pickle.dumps(result, 2)
+    except Exception:
+        data = pickle.dumps((False, traceback.format_exc()), 2)
+    return base64.b64encode(data).decode("ascii")
+"""
+
+def _function_source(func):
+    if func.__name__ == "<lambda>":
+        raise ValueError("Lambdas can't be sent to a kernel, use def")
+    return textwrap.dedent(inspect.getsource(func))
+
+
+class Kernel(object):
+    """
+    Client of one IPyIDA kernel, attached to with its connection file or
+    started by launch().
+    """
+
+    # Interval at which a running task checks that the kernel is still alive
+    POLL_INTERVAL = 0.2
+
+    def __init__(self, connection_file, process=None, name=None):
+        self.connection_file = find_connection_file(connection_file)
+        self.process = process
+        self.name = name or os.path.basename(self.connection_file)
+        self.client = BlockingKernelClient(connection_file=self.connection_file)
+        self.client.load_connection_file()
+        self.client.start_channels()
+
+    def __repr__(self):
+        return "<Kernel {:s}>".format(self.name)
+
+    def is_alive(self):
+        if self.process is not None and self.process.poll() is not None:
+            return False
+        return self.client.is_alive()
+
+    def wait_for_ready(self, timeout=None):
+        self.client.wait_for_ready(timeout=timeout)
+
+    def execute(self, code, user_expressions=None, timeout=None, silent=False):
+        """
+        Execute code and wait for the reply.
+
+        Returns: a tuple (reply content, printed text, text/plain of the
+        result or None)
+
+        Raises KernelDied if the kernel stops responding, or if timeout
+        seconds pass before the reply.
+        """
+        client = self.client
+        msg_id = client.execute(
+            code, silent=silent, store_history=False,
+            user_expressions=user_expressions or {}, allow_stdin=False
+        )
+        deadline = None if timeout is None else time.time() + timeout
+        output = []
+        result = None
+        reply = None
+        idle = False
+        while reply is None or not idle:
+            while True:
+                try:
+                    msg = client.get_iopub_msg(timeout=0)
+                except queue.Empty:
+                    break
+                if msg["parent_header"].get("msg_id") != msg_id:
+                    continue
+                msg_type = msg["msg_type"]
+                content = msg["content"]
+                if msg_type == "stream":
+                    output.append(content["text"])
+                elif msg_type == "execute_result":
+                    result = content["data"].get("text/plain")
+                elif msg_type == "status" and content["execution_state"] == "idle":
+                    idle = True
+            if reply is None:
+                try:
+                    msg = client.get_shell_msg(timeout=self.POLL_INTERVAL)
+                except queue.Empty:
+                    if not self.is_alive():
+                        raise KernelDied("{:s} died".format(self.name))
+                else:
+                    if msg["parent_header"].get("msg_id") == msg_id:
+                        reply = msg["content"]
+                        # The rest of the output may still be in flight
+                        idle_deadline = time.time() + 1
+            elif time.time() > idle_deadline:
+                break
+            else:
+                time.sleep(0.01)
+            if deadline is not None and reply is None and time.time() > deadline:
+                raise KernelDied("{:s} did not reply in {:g} s".format(self.name, timeout))
+        return reply, "".join(output), result
+
+    def call(self, func, args=(), kwargs=None, timeout=None):
+        """
+        Call func(*args, **kwargs) in the kernel.
+
+        Returns: a tuple (return value, printed text)
+
+        Raises RuntimeError with the remote traceback if the function raised.
+        """
+        payload = base64.b64encode(pickle.dumps(
+            (_function_source(func), func.__name__, tuple(args), kwargs or {}), 2
+        )).decode("ascii")
+        reply, output, _ = self.execute(
+            _CALL_HELPER,
+            user_expressions=dict(result="_ipyida_pool_call({!r})".format(payload)),
+            timeout=timeout, silent=True
+        )
+        if reply["status"] != "ok":
+            raise RuntimeError("\n".join(reply.get("traceback", [])))
+        expression = reply["user_expressions"]["result"]
+        if expression["status"] != "ok":
+            raise RuntimeError("\n".join(expression.get("traceback", [])))
+        data = ast.literal_eval(expression["data"]["text/plain"])
+        ok, value = pickle.loads(base64.b64decode(data))
+        if not ok:
+            raise RuntimeError(value)
+        return value, output
+
+    def run_cell(self, code, timeout=None):
+        """
+        Execute code like a cell of the console.
+
+        Returns: a tuple (text/plain of the result or None, printed text)
+
+        Raises RuntimeError with the traceback if the code raised.
+        """
+        reply, output, result = self.execute(code, timeout=timeout)
+        if reply["status"] != "ok":
+            raise RuntimeError("\n".join(reply.get("traceback", [])) or
+                               "{}: {}".format(reply.get("ename"), reply.get("evalue")))
+        return result, output
+
+    def close(self):
+        self.client.stop_channels()
+
+    def shutdown(self, timeout=30):
+        "Ask the kernel to shut down. IDA exits if it was started by launch()."
+        try:
+            self.client.shutdown()
+        finally:
+            self.close()
+        if self.process is not None:
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+_launch_counter = itertools.count()
+
+def launch(database, ida_path=None, startup_timeout=300):
+    """
+    Start IDA in batch mode on database and serve an IPyIDA kernel with
+    ipyida.headless. The kernel is ready when auto-analysis is done.
+
+    ida_path defaults to the IPYIDA_IDAT environment variable or `idat` in
+    the PATH.
+
+    Returns: a Kernel. Calling its shutdown() method makes IDA exit.
+    """
+    ida_path = ida_path or os.environ.get("IPYIDA_IDAT", "idat")
+    connection_file = os.path.join(
+        jupyter_runtime_dir(),
+        "kernel-ipyida-pool-{:d}-{:d}.json".format(os.getpid(), next(_launch_counter))
+    )
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "headless.py")
+    env = dict(os.environ, IPYIDA_CONNECTION_FILE=connection_file, TVHEADLESS="1")
+    with open(os.devnull, "w") as devnull:
+        process = subprocess.Popen(
+            [ ida_path, "-A", '-S"{:s}"'.format(script), database ],
+            env=env, stdin=subprocess.PIPE, stdout=devnull, stderr=devnull
+        )
+    deadline = time.time() + startup_timeout
+    while not os.path.exists(connection_file):
+        if process.poll() is not None:
+            raise LaunchError("IDA exited with status {:d} on {:s}".format(
+                process.returncode, database
+            ))
+        if time.time() > deadline:
+            process.kill()
+            raise LaunchError("Timed out waiting for the kernel of " + database)
+        time.sleep(0.2)
+    # The file may have been created but not written yet
+    time.sleep(0.1)
+    kernel = Kernel(connection_file, process, name=os.path.basename(database))
+    try:
+        kernel.wait_for_ready(timeout=max(deadline - time.time(), 1))
+    except RuntimeError:
+        kernel.close()
+        process.kill()
+        raise LaunchError("The kernel of {:s} did not start".format(database))
+    return kernel
+
+
+class PoolStats(object):
+    "Throughput of a pool"
+
+    def __init__(self):
+        self.start = time.time()
+        self.end = None
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.per_kernel = collections.Counter()
+
+    @property
+    def elapsed(self):
+        return (self.end or time.time()) - self.start
+
+    def add(self, result):
+        if result.error is None:
+            self.completed += 1
+        else:
+            self.failed += 1
+        if result.kernel is not None:
+            self.per_kernel[result.kernel] += 1
+
+    def report(self):
+        total = self.completed + self.failed
+        elapsed = self.elapsed
+        lines = [ "{:d} tasks in {:.1f} s ({:.2f} tasks/s), {:d} failed, {:d} retried".format(
+            total, elapsed, total / elapsed if elapsed > 0 else 0.0,
+            self.failed, self.retried
+        ) ]
+        for name, count in sorted(self.per_kernel.items()):
+            lines.append("  {:40s} {:d}".format(name, count))
+        return "\n".join(lines)
+
+
+def _run_task(kernel, task, item, timeout):
+    "Returns: a tuple (value, output)"
+    if isinstance(task, str):
+        return kernel.run_cell(task, timeout=timeout)
+    if item is _NO_ITEM:
+        return kernel.call(task, timeout=timeout)
+    return kernel.call(task, (item,), timeout=timeout)
+
+_NO_ITEM = object()
+
+
+class Pool(object):
+    """
+    Runs tasks on a set of running kernels, given by their connection files:
+
+        >>> pool = Pool(["kernel-1234.json", "kernel-5678.json"])
+        >>> for result in pool.imap(count_xrefs, eas):
+        ...     print(result.item, result.value)
+        >>> print(pool.stats.report())
+
+    A task is a function, sent as source code and called in the kernel's
+    namespace, or a string of code run like a console cell. Each kernel takes
+    the next item from a shared queue as soon as it's done with the previous
+    one. If a kernel dies, its task is retried on another one.
+    """
+
+    def __init__(self, connection_files=(), kernels=(), timeout=None, retries=1):
+        self.kernels = list(kernels) + [ Kernel(f) for f in connection_files ]
+        self.timeout = timeout
+        self.retries = retries
+        self.stats = PoolStats()
+
+    def _imap(self, task, items):
+        "Yields (index of the item, TaskResult) in completion order"
+        if items is None:
+            for index_result in self._broadcast(task):
+                yield index_result
+            return
+        work = list(items)
+        todo = queue.Queue()
+        for index, item in enumerate(work):
+            todo.put((index, item, 0))
+        results = queue.Queue()
+        lock = threading.Lock()
+        # Items without a result yet, and kernels still running
+        state = dict(pending=len(work), alive=len(self.kernels))
+
+        def done(index, result):
+            with lock:
+                state["pending"] -= 1
+            results.put((index, result))
+
+        def worker(kernel):
+            while True:
+                try:
+                    # Wait instead of leaving when the queue is empty: an item
+                    # may be put back if another kernel dies
+                    index, item, attempts = todo.get(timeout=0.1)
+                except queue.Empty:
+                    with lock:
+                        if state["pending"] == 0:
+                            return
+                    continue
+                try:
+                    value, output = _run_task(kernel, task, item, self.timeout)
+                except KernelDied as e:
+                    with lock:
+                        state["alive"] -= 1
+                        if attempts < self.retries and state["alive"] > 0:
+                            self.stats.retried += 1
+                            todo.put((index, item, attempts + 1))
+                            return
+                    done(index, TaskResult(item, None, str(e), "", kernel.name))
+                    with lock:
+                        if state["alive"] > 0:
+                            return
+                    # Nobody is left to run the remaining tasks
+                    while True:
+                        try:
+                            index, item, _ = todo.get_nowait()
+                        except queue.Empty:
+                            return
+                        done(index, TaskResult(item, None, "No kernel left", "", None))
+                except Exception as e:
+                    done(index, TaskResult(item, None, str(e), "", kernel.name))
+                else:
+                    done(index, TaskResult(item, value, None, output, kernel.name))
+
+        if not self.kernels:
+            raise ValueError("The pool has no kernel")
+        threads = [ threading.Thread(target=worker, args=(kernel,)) for kernel in self.kernels ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for _ in range(len(work)):
+            index, result = results.get()
+            self.stats.add(result)
+            yield index, result
+        self.stats.end = time.time()
+
+    def _broadcast(self, task):
+        "Yields (index of the kernel, TaskResult) in completion order"
+        if not self.kernels:
+            raise ValueError("The pool has no kernel")
+        results = queue.Queue()
+
+        def worker(index, kernel):
+            # Not retried elsewhere: the task is meant for this kernel
+            try:
+                value, output = _run_task(kernel, task, _NO_ITEM, self.timeout)
+            except Exception as e:
+                results.put((index, TaskResult(None, None, str(e), "", kernel.name)))
+            else:
+                results.put((index, TaskResult(None, value, None, output, kernel.name)))
+
+        threads = [ threading.Thread(target=worker, args=(index, kernel))
+                    for index, kernel in enumerate(self.kernels) ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for _ in range(len(threads)):
+            index, result = results.get()
+            self.stats.add(result)
+            yield index, result
+        self.stats.end = time.time()
+
+    def imap(self, task, items):
+        """
+        Run task on every item, or once per kernel if items is None.
+
+        Returns: an iterator over TaskResult in completion order
+        """
+        for _, result in self._imap(task, items):
+            yield result
+
+    def map(self, task, items):
+        "Same as imap, but returns the list of values in the order of items"
+        items = list(items)
+        values = [ None ] * len(items)
+        for index, result in self._imap(task, items):
+            if result.error is not None:
+                raise RuntimeError(result.error)
+            values[index] = result.value
+        return values
+
+    def broadcast(self, task):
+        """
+        Run task once on every kernel. A task whose kernel dies is not
+        retried on another one.
+
+        Returns: an iterator over TaskResult
+        """
+        return self.imap(task, None)
+
+    def close(self):
+        for kernel in self.kernels:
+            kernel.close()
+
+
+class DatabasePool(object):
+    """
+    Runs a task on many databases, with at most `processes` IDA instances at
+    once. Each database is opened in batch mode with launch(), the task runs
+    once auto-analysis is done, and IDA exits.
+
+        >>> pool = DatabasePool(processes=8)
+        >>> for result in pool.imap(list_imports, glob.glob("samples/*")):
+        ...     print(result.item, result.value)
+
+    If IDA dies before the task completes, the database is retried.
+    """
+
+    def __init__(self, processes=None, ida_path=None, timeout=None, retries=1,
+                 startup_timeout=300):
+        self.processes = processes or os.cpu_count() or 1
+        self.ida_path = ida_path
+        self.timeout = timeout
+        self.retries = retries
+        self.startup_timeout = startup_timeout
+        self.stats = PoolStats()
+
+    def _run_on(self, task, database):
+        kernel = launch(database, self.ida_path, self.startup_timeout)
+        try:
+            value, output = _run_task(kernel, task, _NO_ITEM, self.timeout)
+        except KernelDied:
+            kernel.close()
+            if kernel.process.poll() is None:
+                kernel.process.kill()
+            raise
+        except Exception:
+            kernel.shutdown()
+            raise
+        kernel.shutdown()
+        return value, output, kernel.name
+
+    def imap(self, task, databases):
+        """
+        Run task on every database.
+
+        Returns: an iterator over TaskResult in completion order, with the
+        database path as item.
+        """
+        databases = list(databases)
+        todo = queue.Queue()
+        for database in databases:
+            todo.put(database)
+        results = queue.Queue()
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                try:
+                    database = todo.get_nowait()
+                except queue.Empty:
+                    return
+                attempts = 0
+                while True:
+                    try:
+                        value, output, name = self._run_on(task, database)
+                    except (KernelDied, LaunchError) as e:
+                        if attempts < self.retries:
+                            attempts += 1
+                            with lock:
+                                self.stats.retried += 1
+                            continue
+                        results.put(TaskResult(database, None, str(e), "", None))
+                    except Exception as e:
+                        results.put(TaskResult(database, None, str(e), "", None))
+                    else:
+                        results.put(TaskResult(database, value, None, output, name))
+                    break
+
+        threads = [ threading.Thread(target=worker)
+                    for _ in range(min(self.processes, len(databases))) ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for _ in range(len(databases)):
+            result = results.get()
+            self.stats.add(result)
+            yield result
+        self.stats.end = time.time()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ipyida.pool",
+        description="Run a script on many databases, or on running IPyIDA "
+                    "kernels, and print what each one printed and returned."
+    )
+    parser.add_argument("script", help="Python file run like a console cell")
+    parser.add_argument("databases", nargs="*", help="databases opened with idat")
+    parser.add_argument("-e", "--existing", action="append", default=[],
+                        metavar="CONNECTION_FILE",
+                        help="run on a running kernel instead (repeatable)")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="IDA instances at once (default: number of cores)")
+    parser.add_argument("--idat", default=None,
+                        help="path of idat (default: $IPYIDA_IDAT or idat)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="seconds allowed to each run of the script")
+    parser.add_argument("--retries", type=int, default=1,
+                        help="times a task is retried if its kernel dies")
+    args = parser.parse_args(argv)
+
+    if bool(args.databases) == bool(args.existing):
+        parser.error("give either databases or --existing connection files")
+    with open(args.script) as f:
+        code = f.read()
+
+    if args.existing:
+        pool = Pool(args.existing, timeout=args.timeout, retries=args.retries)
+        results = pool.broadcast(code)
+    else:
+        pool = DatabasePool(args.processes, args.idat, args.timeout, args.retries)
+        results = pool.imap(code, args.databases)
+
+    failed = False
+    for result in results:
+        name = result.item or result.kernel
+        if result.error is not None:
+            failed = True
+            sys.stdout.write("== {:s} FAILED\n{:s}\n".format(name, result.error))
+            continue
+        sys.stdout.write("== {:s}\n".format(name))
+        sys.stdout.write(result.output)
+        if result.value is not None:
+            sys.stdout.write(result.value + "\n")
+        sys.stdout.flush()
+    if args.existing:
+        pool.close()
+    sys.stderr.write(pool.stats.report() + "\n")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
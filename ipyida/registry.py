@@ -0,0 +1,268 @@
+# -*- encoding: utf8 -*-
+#
+# This module keeps track of the running IPyIDA kernels and the database each
+# of them is attached to, so clients can find the kernel of a given IDB
+# without guessing from the access time of connection files.
+#
+# The registry is a JSON file in Jupyter's runtime directory. It is written by
+# the kernels running in IDA and read by `ipyida connect`, outside of IDA.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import errno
+import json
+import os
+import sys
+import time
+
+try:
+    import idaapi
+except ImportError:
+    # Used outside of IDA, by `ipyida connect`
+    idaapi = None
+
+REGISTRY_FILENAME = "ipyida-kernels.json"
+
+# How long to wait for another process holding the registry lock before
+# assuming it died while holding it
+LOCK_TIMEOUT = 2.0
+
+def registry_path():
+    from jupyter_core.paths import jupyter_runtime_dir
+    return os.path.join(jupyter_runtime_dir(), REGISTRY_FILENAME)
+
+def normalize_path(path):
+    "Returns: the key under which the database at path is registered"
+    return os.path.normcase(os.path.abspath(path))
+
+def kernel_id_from_connection_file(connection_file):
+    "kernel-<id>.json -> <id>"
+    name = os.path.splitext(os.path.basename(connection_file))[0]
+    if name.startswith("kernel-"):
+        name = name[len("kernel-"):]
+    return name
+
+def pid_alive(pid):
+    if sys.platform == "win32":
+        # os.kill(pid, 0) would terminate the process on Windows
+        import ctypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return False
+            return code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        # EPERM: the process exists but belongs to someone else
+        return e.errno == errno.EPERM
+    return True
+
+def is_stale(entry):
+    "Returns: True if the process or the connection file of entry is gone"
+    return not pid_alive(entry.get("pid", -1)) or \
+           not os.path.exists(entry.get("connection_file", ""))
+
+
+class _RegistryLock(object):
+    "Lock file next to the registry, so concurrent updates don't get lost"
+
+    def __init__(self, path):
+        self.path = path + ".lock"
+
+    def __enter__(self):
+        deadline = time.time() + LOCK_TIMEOUT
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+            if time.time() > deadline:
+                # Left over by a process that died while holding it
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+                deadline = time.time() + LOCK_TIMEOUT
+            time.sleep(0.01)
+
+    def __exit__(self, *args):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class Registry(object):
+    """
+    Maps database paths to the kernel serving them. Each entry is a dict with
+    the keys `idb`, `input`, `pid`, `kernel_id`, `connection_file` and
+    `started`. Entries of processes that exited, or whose connection file was
+    removed, are dropped when the registry is read.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or registry_path()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save(self, data):
+        tmp_path = "{:s}.{:d}.tmp".format(self.path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        # Readers never see a partially written file
+        if hasattr(os, "replace"):
+            os.replace(tmp_path, self.path)
+        else:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(tmp_path, self.path)
+
+    def _update(self, change):
+        "Apply change(data) to the registry, under the lock"
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with _RegistryLock(self.path):
+            data = self._load()
+            for key in [ k for k, entry in data.items() if is_stale(entry) ]:
+                del data[key]
+            change(data)
+            self._save(data)
+
+    def register(self, idb_path, connection_file, input_path=None, pid=None):
+        """
+        Record that the kernel of connection_file serves the database at
+        idb_path. Replaces any other kernel of this process.
+        """
+        pid = os.getpid() if pid is None else pid
+        connection_file = os.path.abspath(connection_file)
+        entry = dict(
+            idb=os.path.abspath(idb_path),
+            input=os.path.abspath(input_path) if input_path else None,
+            pid=pid,
+            kernel_id=kernel_id_from_connection_file(connection_file),
+            connection_file=connection_file,
+            started=time.time(),
+        )
+        def change(data):
+            for key in [ k for k, e in data.items() if e.get("pid") == pid ]:
+                del data[key]
+            data[normalize_path(idb_path)] = entry
+        self._update(change)
+        return entry
+
+    def unregister(self, connection_file=None, pid=None):
+        "Remove the entries of connection_file, or of the process pid"
+        if connection_file is not None:
+            connection_file = os.path.abspath(connection_file)
+            match = lambda e: e.get("connection_file") == connection_file
+        else:
+            pid = os.getpid() if pid is None else pid
+            match = lambda e: e.get("pid") == pid
+        def change(data):
+            for key in [ k for k, e in data.items() if match(e) ]:
+                del data[key]
+        self._update(change)
+
+    def entries(self):
+        "Returns: the live entries, in the order kernels were started"
+        live = [ e for e in self._load().values() if not is_stale(e) ]
+        return sorted(live, key=lambda e: e.get("started", 0))
+
+    def lookup(self, path):
+        """
+        Returns: the entry of the kernel serving the database at path, or
+        None. path may also be the input file the database was created from.
+        """
+        key = normalize_path(path)
+        data = self._load()
+        entry = data.get(key)
+        if entry is None:
+            # Not the IDB itself, maybe the input file
+            entry = next((e for e in data.values()
+                          if e.get("input") and normalize_path(e["input"]) == key), None)
+        if entry is None or is_stale(entry):
+            return None
+        return entry
+
+
+class KernelRegistration(object):
+    """
+    Keeps the entry of the kernel running in this IDA instance up to date:
+    registered when a database is open, removed when it's closed or when the
+    kernel stops.
+    """
+
+    def __init__(self, connection_file, registry=None):
+        self.connection_file = connection_file
+        self.registry = registry or Registry()
+        self._ui_hooks = None
+
+    def start(self):
+        self.update()
+        if self._ui_hooks is None and hasattr(idaapi, "UI_Hooks"):
+            self._ui_hooks = _RegistrationUIHooks(self)
+            self._ui_hooks.hook()
+
+    def update(self):
+        idb_path = ""
+        if hasattr(idaapi, "get_path"):
+            idb_path = idaapi.get_path(idaapi.PATH_TYPE_IDB)
+        input_path = idaapi.get_input_file_path()
+        try:
+            if idb_path or input_path:
+                self.registry.register(idb_path or input_path, self.connection_file,
+                                       input_path=input_path)
+            else:
+                self.registry.unregister(pid=os.getpid())
+        except (IOError, OSError) as e:
+            sys.stderr.write("[IPyIDA] Could not update the kernel registry: {}\n".format(e))
+
+    def stop(self, unregister=True):
+        """
+        Stop updating the entry. unregister=False keeps it, for a kernel
+        taking over the connection file.
+        """
+        if self._ui_hooks is not None:
+            self._ui_hooks.unhook()
+            self._ui_hooks = None
+        if not unregister:
+            return
+        try:
+            self.registry.unregister(pid=os.getpid())
+        except (IOError, OSError):
+            pass
+
+
+if idaapi is not None and hasattr(idaapi, "UI_Hooks"):
+    class _RegistrationUIHooks(idaapi.UI_Hooks):
+
+        def __init__(self, registration):
+            super(_RegistrationUIHooks, self).__init__()
+            self.registration = registration
+
+        def database_inited(self, *args):
+            self.registration.update()
+            return 0
+
+        def database_closed(self, *args):
+            self.registration.update()
+            return 0
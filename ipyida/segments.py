@@ -0,0 +1,224 @@
+# -*- encoding: utf8 -*-
+#
+# This module exposes the content of the database segments as cached
+# read-only buffers.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import idaapi
+
+from . import hexdump
+from .changes import dispatcher
+
+
+class SegmentBuffer(object):
+    """
+    Read-only buffer over the bytes of a segment.
+
+    The content is read from the database in chunks of CHUNK_SIZE bytes on
+    first access and kept until a byte of the chunk is patched or the segment
+    changes. Memory is only allocated for the chunks that are read, so large
+    segments cost nothing until they are used. Slicing returns a read-only
+    memoryview, without copying if the slice is within a chunk. Slices
+    spanning several chunks are copied once, and the copy is reused until one
+    of its chunks is invalidated, so repeated scans don't copy:
+
+        >>> buf = ipyida.segments.get_segment_buffer(".text")
+        >>> buf[0x100:0x200]                    # memoryview, offsets
+        >>> buf.at(0x401000, 16)                # memoryview, address
+        >>> buf.array().nonzero()               # NumPy uint8 array
+
+    Views within a chunk keep pointing to the same memory, so they show the
+    new content once an invalidated chunk is accessed again through the
+    SegmentBuffer.
+    """
+
+    CHUNK_SIZE = 0x10000
+
+    def __init__(self, start_ea, end_ea):
+        self.start_ea = start_ea
+        self.end_ea = end_ea
+        self._size = end_ea - start_ea
+        # chunk number -> bytearray, allocated on first read
+        self._chunks = {}
+        self._valid = bytearray(
+            (self._size + self.CHUNK_SIZE - 1) // self.CHUNK_SIZE
+        )
+        # (first chunk, last chunk, bytes) of the last slice spanning several
+        # chunks
+        self._joined = None
+        # Set once the buffer is dropped from the cache and stops receiving
+        # invalidations: every access reads the database again
+        self.detached = False
+
+    def __len__(self):
+        return self._size
+
+    def _fill(self, start, end):
+        "Make sure bytes at offsets [start, end) are read from the database"
+        if start >= end:
+            return
+        for chunk in range(start // self.CHUNK_SIZE, (end - 1) // self.CHUNK_SIZE + 1):
+            if self._valid[chunk]:
+                continue
+            offset = chunk * self.CHUNK_SIZE
+            size = min(self.CHUNK_SIZE, self._size - offset)
+            data = idaapi.get_bytes(self.start_ea + offset, size) or b""
+            if len(data) < size:
+                data += b"\xff" * (size - len(data))
+            if chunk in self._chunks:
+                self._chunks[chunk][:] = data
+            else:
+                self._chunks[chunk] = bytearray(data)
+            if not self.detached:
+                self._valid[chunk] = 1
+
+    def detach(self):
+        "Stop caching, for buffers still used after the segments changed"
+        self.detached = True
+        self.invalidate()
+
+    def invalidate(self, ea=None, size=1):
+        "Forget the content at [ea, ea + size), or everything if ea is None"
+        if ea is None:
+            self._valid = bytearray(len(self._valid))
+            self._joined = None
+            return
+        start = max(ea, self.start_ea) - self.start_ea
+        end = min(ea + size, self.end_ea) - self.start_ea
+        if start >= end:
+            return
+        first, last = start // self.CHUNK_SIZE, (end - 1) // self.CHUNK_SIZE
+        for chunk in range(first, last + 1):
+            self._valid[chunk] = 0
+        if self._joined is not None and first <= self._joined[1] and self._joined[0] <= last:
+            self._joined = None
+
+    def _view(self, start, end):
+        first = start // self.CHUNK_SIZE
+        if start >= end:
+            view = memoryview(b"")
+        elif (end - 1) // self.CHUNK_SIZE == first:
+            offset = first * self.CHUNK_SIZE
+            view = memoryview(self._chunks[first])[start-offset:end-offset]
+        else:
+            # Spans several chunks
+            last = (end - 1) // self.CHUNK_SIZE
+            joined = self._joined
+            if joined is None or not joined[0] <= first <= last <= joined[1]:
+                joined = (first, last, b"".join(
+                    self._chunks[chunk] for chunk in range(first, last + 1)
+                ))
+                if not self.detached:
+                    self._joined = joined
+            offset = joined[0] * self.CHUNK_SIZE
+            view = memoryview(joined[2])[start-offset:end-offset]
+        if hasattr(view, "toreadonly"):
+            view = view.toreadonly()
+        return view
+
+    def view(self, start=0, end=None):
+        "Return a read-only memoryview of the bytes at offsets [start, end)"
+        start, end, _ = slice(start, end).indices(self._size)
+        self._fill(start, end)
+        return self._view(start, end)
+
+    def at(self, ea, size):
+        "Return a read-only memoryview of `size` bytes at address ea"
+        return self.view(ea - self.start_ea, ea - self.start_ea + size)
+
+    def array(self, start=0, end=None):
+        "Return a read-only NumPy uint8 array of the bytes at offsets [start, end)"
+        import numpy
+        return numpy.frombuffer(self.view(start, end), dtype=numpy.uint8)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, end, step = key.indices(self._size)
+            if step < 0:
+                return self.view()[key]
+            self._fill(start, end)
+            return self._view(start, end)[::step]
+        if key < 0:
+            key += self._size
+        if not 0 <= key < self._size:
+            raise IndexError("SegmentBuffer index out of range")
+        self._fill(key, key + 1)
+        return self._chunks[key // self.CHUNK_SIZE][key % self.CHUNK_SIZE]
+
+    def __buffer__(self, flags):
+        # Python >= 3.12: memoryview(buf) works directly
+        return self.view()
+
+    def __repr__(self):
+        return "<SegmentBuffer {:#x}-{:#x}>".format(self.start_ea, self.end_ea)
+
+    def _repr_pretty_(self, printer, cycle):
+        # Only read the parts that are displayed
+        ranges = hexdump.displayed_ranges(self._size)
+        for i, (start, end) in enumerate(ranges):
+            if i > 0:
+                elided = start - ranges[i-1][1]
+                printer.text(
+                    "... {:d} (0x{:X}) bytes elided, use ipyida.hexdump.HexdumpPager "
+                    "to page through the whole buffer ...\n".format(elided, elided)
+                )
+            printer.text(hexdump.format_lines(self.view(start, end), self.start_ea + start))
+
+
+class SegmentBufferCache(object):
+    "Keeps a SegmentBuffer per segment, invalidated by the changes of the database"
+
+    def __init__(self):
+        self._buffers = {}
+
+    def hook(self):
+        dispatcher.subscribe(self)
+
+    def unhook(self):
+        dispatcher.unsubscribe(self)
+        self.clear()
+
+    def clear(self):
+        # Buffers may still be referenced by the user
+        for buf in self._buffers.values():
+            buf.detach()
+        self._buffers.clear()
+
+    def get(self, segment):
+        """
+        Return the SegmentBuffer of a segment given by name, by any address
+        it contains, or as a segment_t.
+        """
+        if isinstance(segment, str):
+            seg = idaapi.get_segm_by_name(segment)
+        elif isinstance(segment, int):
+            seg = idaapi.getseg(segment)
+        else:
+            seg = segment
+        if seg is None:
+            raise KeyError("No such segment: {!r}".format(segment))
+        buf = self._buffers.get(seg.start_ea)
+        if buf is None or buf.end_ea != seg.end_ea:
+            if buf is not None:
+                buf.detach()
+            buf = self._buffers[seg.start_ea] = SegmentBuffer(seg.start_ea, seg.end_ea)
+        return buf
+
+    def bytes_changed(self, ea, size=1):
+        for buf in self._buffers.values():
+            if buf.start_ea < ea + size and ea < buf.end_ea:
+                buf.invalidate(ea, size)
+
+    def everything_changed(self):
+        self.clear()
+
+segment_buffers = SegmentBufferCache()
+
+def get_segment_buffer(segment):
+    """
+    Return a cached read-only buffer over a segment given by name, by any
+    address it contains, or as a segment_t. See SegmentBuffer.
+    """
+    return segment_buffers.get(segment)
@@ -0,0 +1,149 @@
+# -*- encoding: utf8 -*-
+#
+# This module measures the time spent in each phase of IPyIDA's startup.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import contextlib
+import itertools
+import json
+import os
+import sys
+import time
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+import idaapi
+
+# Append a JSON line with the timings of every startup to LOG_PATH. Enabled by
+# setting the IPYIDA_STARTUP_LOG environment variable to 1.
+LOG_ENABLED = os.environ.get("IPYIDA_STARTUP_LOG") == "1"
+LOG_PATH = os.path.join(idaapi.get_user_idadir(), "ipyida_startup.jsonl")
+
+# Time every import done during the startup. Enabled by setting the
+# IPYIDA_PROFILE_STARTUP environment variable to 1, only the phases are timed
+# otherwise.
+PROFILE_IMPORTS = os.environ.get("IPYIDA_PROFILE_STARTUP") == "1"
+
+_clock = getattr(time, "perf_counter", time.time)
+
+
+class StartupProfiler(object):
+
+    def __init__(self):
+        self.origin = _clock()
+        # List of (name, depth, start, duration), start relative to origin
+        self.phases = []
+        # Module name -> import time (including the modules it imports)
+        self.imports = {}
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        "Record the time spent in the with block as phase `name`"
+        entry = [name, self._depth, _clock() - self.origin, None]
+        self.phases.append(entry)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            entry[3] = _clock() - self.origin - entry[2]
+
+    def wrap(self, name, func):
+        "Return func wrapped to record its calls as phase `name`"
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    @contextlib.contextmanager
+    def track_imports(self):
+        """
+        Record the time taken by every new module imported in the with block,
+        under its full name. Relative imports and submodules imported with
+        `from package import module` are found by looking at the modules
+        added to sys.modules by each import.
+
+        Does nothing unless PROFILE_IMPORTS is set, wrapping __import__ slows
+        down every import.
+        """
+        if not PROFILE_IMPORTS:
+            yield
+            return
+        original_import = builtins.__import__
+        imports = self.imports
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level == 0 and not fromlist and name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+            before = len(sys.modules)
+            start = _clock()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                duration = _clock() - start
+                if len(sys.modules) > before:
+                    # New modules are added at the end of sys.modules. Nested
+                    # imports finished first and recorded their own modules
+                    # with their shorter times.
+                    for module_name in list(itertools.islice(sys.modules, before, None)):
+                        imports.setdefault(module_name, duration)
+        builtins.__import__ = timed_import
+        try:
+            yield
+        finally:
+            builtins.__import__ = original_import
+
+    def as_dict(self):
+        return dict(
+            time=time.time(),
+            ida_version=idaapi.get_kernel_version() if hasattr(idaapi, "get_kernel_version") else None,
+            python_version=sys.version.split()[0],
+            phases=[
+                dict(name=name, depth=depth, start=start, duration=duration)
+                for name, depth, start, duration in self.phases
+            ],
+            imports=self.imports,
+        )
+
+    def report(self, top_imports=15):
+        lines = [ "Phase{:s}  Start (s)  Duration (s)".format(" " * 45) ]
+        for name, depth, start, duration in self.phases:
+            lines.append("{:50s} {:10.3f}  {:>12s}".format(
+                "  " * depth + name,
+                start,
+                "running" if duration is None else "{:.3f}".format(duration)
+            ))
+        if not PROFILE_IMPORTS:
+            lines.append("")
+            lines.append("Set IPYIDA_PROFILE_STARTUP=1 to time every import.")
+        elif self.imports:
+            lines.append("")
+            lines.append("Slowest imports (including their own imports):")
+            slowest = sorted(self.imports.items(), key=lambda i: -i[1])
+            for name, duration in slowest[:top_imports]:
+                lines.append("  {:48s} {:.3f}".format(name, duration))
+        return "\n".join(lines)
+
+    def write_log(self, path=None):
+        with open(path or LOG_PATH, "a") as f:
+            f.write(json.dumps(self.as_dict()) + "\n")
+
+profiler = StartupProfiler()
+
+def ipyida_startup(line):
+    """
+    Show the time spent in each phase of IPyIDA's startup, and the slowest
+    imports when IPYIDA_PROFILE_STARTUP is set.
+
+    Usage:
+        %ipyida_startup [--json]
+    """
+    if line.strip() == "--json":
+        print(json.dumps(profiler.as_dict(), indent=2))
+    else:
+        print(profiler.report())
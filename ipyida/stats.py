@@ -0,0 +1,320 @@
+# -*- encoding: utf8 -*-
+#
+# This module measures where the time goes when the kernel handles a message:
+# waiting to be dispatched, running the handler, and sending the reply.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import bisect
+import calendar
+import json
+import os
+import threading
+import time
+
+import idaapi
+
+# Append a JSON line with the current figures to DUMP_PATH every
+# DUMP_INTERVAL seconds. Enabled by setting the IPYIDA_STATS_LOG environment
+# variable to 1, IPYIDA_STATS_INTERVAL changes the interval.
+DUMP_ENABLED = os.environ.get("IPYIDA_STATS_LOG") == "1"
+DUMP_PATH = os.path.join(idaapi.get_user_idadir(), "ipyida_stats.jsonl")
+DUMP_INTERVAL = float(os.environ.get("IPYIDA_STATS_INTERVAL", "60"))
+
+# Message types measured, on the shell and control channels
+MESSAGE_TYPES = (
+    "execute_request",
+    "complete_request",
+    "inspect_request",
+    "is_complete_request",
+    "kernel_info_request",
+    "history_request",
+    "comm_info_request",
+    "shutdown_request",
+    "interrupt_request",
+)
+
+# Messages whose size is counted as output of the cell
+OUTPUT_TYPES = ("stream", "display_data", "update_display_data", "execute_result", "error")
+
+_clock = getattr(time, "perf_counter", time.time)
+
+
+class Histogram(object):
+    """
+    Distribution of values in fixed buckets, each one 25% wider than the
+    previous one, so memory doesn't grow with the number of values.
+    Percentiles are estimated with the upper bound of their bucket.
+    """
+
+    def __init__(self, low, high, growth=1.25):
+        self.bounds = []
+        bound = low
+        while bound < high:
+            self.bounds.append(bound)
+            bound *= growth
+        self.bounds.append(high)
+        # One more bucket for values above high
+        self.counts = [ 0 ] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p):
+        if self.count == 0:
+            return 0.0
+        rank = p * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count > 0:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self):
+        return dict(
+            count=self.count, mean=self.mean, max=self.max,
+            p50=self.percentile(0.5), p90=self.percentile(0.9), p99=self.percentile(0.99),
+        )
+
+def _time_histogram():
+    # 10 us to 60 s
+    return Histogram(1e-5, 60.0)
+
+
+class MessageStats(object):
+    "Figures of one message type"
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.queued = _time_histogram()
+        self.handling = _time_histogram()
+        self.reply = _time_histogram()
+
+
+class KernelStats(object):
+    """
+    Per message type histograms of the time spent:
+
+        queued: between the client sending the message and the kernel
+                dispatching it (includes the transport, and waiting behind
+                IDA's UI or another message)
+        handling: running the handler, executing the cell for
+                  execute_request
+        reply: serializing and sending the reply
+
+    and a histogram of the bytes of output of each cell.
+    """
+
+    def __init__(self):
+        self.messages = {}
+        self.reset()
+        self._cell_output = 0
+        self._kernel = None
+        self._original_handlers = []
+        self._original_send = None
+        self._dump_thread = None
+        self._dump_stop = None
+
+    def reset(self):
+        self.start = time.time()
+        # The wrapped handlers keep their MessageStats
+        for stats in self.messages.values():
+            stats.reset()
+        self.output_bytes = Histogram(64, 1 << 30, growth=2)
+
+    def _stats_for(self, msg_type):
+        stats = self.messages.get(msg_type)
+        if stats is None:
+            stats = self.messages.setdefault(msg_type, MessageStats())
+        return stats
+
+    def instrument(self, kernel):
+        "Wrap the message handlers and the session of an ipykernel Kernel"
+        if self._kernel is not None:
+            return
+        self._kernel = kernel
+        for handlers in (kernel.shell_handlers, getattr(kernel, "control_handlers", {})):
+            for msg_type in MESSAGE_TYPES:
+                handler = handlers.get(msg_type)
+                if handler is not None:
+                    self._original_handlers.append((handlers, msg_type, handler))
+                    handlers[msg_type] = self._wrap_handler(msg_type, handler)
+        session = kernel.session
+        self._original_send = session.send
+        session.send = self._wrap_send(session.send)
+
+    def uninstrument(self):
+        for handlers, msg_type, handler in self._original_handlers:
+            handlers[msg_type] = handler
+        self._original_handlers = []
+        if self._kernel is not None:
+            self._kernel.session.send = self._original_send
+        self._original_send = None
+        self._kernel = None
+
+    def _wrap_handler(self, msg_type, handler):
+        stats = self._stats_for(msg_type)
+        def timed_handler(*args):
+            start = _clock()
+            queued = _queued_time(args[-1])
+            if queued is not None:
+                stats.queued.add(queued)
+            if msg_type == "execute_request":
+                self._cell_output = 0
+            def done(*_):
+                stats.handling.add(_clock() - start)
+                if msg_type == "execute_request":
+                    self.output_bytes.add(self._cell_output)
+            result = handler(*args)
+            if result is not None and hasattr(result, "__await__"):
+                # ipykernel >= 5 handlers may be coroutines
+                import asyncio
+                result = asyncio.ensure_future(result)
+                result.add_done_callback(done)
+            else:
+                done()
+            return result
+        return timed_handler
+
+    def _wrap_send(self, send):
+        def timed_send(stream, msg_or_type, content=None, *args, **kwargs):
+            msg_type = msg_or_type if isinstance(msg_or_type, str) \
+                       else msg_or_type.get("header", {}).get("msg_type")
+            if msg_type in OUTPUT_TYPES:
+                self._cell_output += _content_size(
+                    content if content is not None else msg_or_type.get("content")
+                )
+            if msg_type is None or not msg_type.endswith("_reply"):
+                return send(stream, msg_or_type, content, *args, **kwargs)
+            start = _clock()
+            try:
+                return send(stream, msg_or_type, content, *args, **kwargs)
+            finally:
+                request_type = msg_type[:-len("_reply")] + "_request"
+                if request_type in self.messages:
+                    self.messages[request_type].reply.add(_clock() - start)
+        return timed_send
+
+    def as_dict(self):
+        return dict(
+            time=time.time(),
+            uptime=time.time() - self.start,
+            messages={
+                msg_type: dict(
+                    queued=stats.queued.as_dict(),
+                    handling=stats.handling.as_dict(),
+                    reply=stats.reply.as_dict(),
+                )
+                for msg_type, stats in self.messages.items()
+                if stats.handling.count > 0
+            },
+            output_bytes=self.output_bytes.as_dict(),
+        )
+
+    def report(self):
+        lines = [ "{:22s} {:>6s}  {:>21s}  {:>21s}  {:>21s}".format(
+            "Message (ms)", "Count", "Queued p50/p90/max", "Handling p50/p90/max",
+            "Reply p50/p90/max"
+        ) ]
+        def column(histogram):
+            return "{:6.1f}/{:6.1f}/{:7.1f}".format(
+                1000 * histogram.percentile(0.5), 1000 * histogram.percentile(0.9),
+                1000 * histogram.max
+            )
+        for msg_type, stats in sorted(self.messages.items()):
+            if stats.handling.count == 0:
+                continue
+            lines.append("{:22s} {:6d}  {:s}  {:s}  {:s}".format(
+                msg_type, stats.handling.count,
+                column(stats.queued), column(stats.handling), column(stats.reply)
+            ))
+        output = self.output_bytes
+        lines.append("")
+        lines.append("Output per cell: {:d} cells, mean {:.0f} bytes, "
+                     "p90 {:.0f} bytes, max {:.0f} bytes".format(
+            output.count, output.mean, output.percentile(0.9), output.max
+        ))
+        return "\n".join(lines)
+
+    def write_dump(self, path=None):
+        with open(path or DUMP_PATH, "a") as f:
+            f.write(json.dumps(self.as_dict()) + "\n")
+
+    def start_dump(self, interval=None):
+        "Call write_dump every interval seconds from a thread"
+        if self._dump_thread is not None:
+            return
+        interval = interval or DUMP_INTERVAL
+        stop = threading.Event()
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.write_dump()
+                except (IOError, OSError):
+                    pass
+        self._dump_stop = stop
+        self._dump_thread = threading.Thread(target=run)
+        self._dump_thread.daemon = True
+        self._dump_thread.start()
+
+    def stop_dump(self):
+        if self._dump_thread is not None:
+            self._dump_stop.set()
+            self._dump_thread = None
+            self._dump_stop = None
+
+
+def _queued_time(msg):
+    "Returns: seconds since the client sent msg, or None if unknown"
+    try:
+        date = msg["header"]["date"]
+        sent = calendar.timegm(date.utctimetuple()) + date.microsecond / 1e6
+    except (KeyError, TypeError, AttributeError):
+        return None
+    return max(time.time() - sent, 0.0)
+
+def _content_size(content):
+    "Returns: the number of characters of text and data in a message content"
+    if not content:
+        return 0
+    if "text" in content:
+        return len(content["text"])
+    size = 0
+    for value in content.get("data", {}).values():
+        size += len(value) if isinstance(value, (str, bytes)) else len(json.dumps(value))
+    for line in content.get("traceback", ()):
+        size += len(line)
+    return size
+
+kernel_stats = KernelStats()
+
+def ipyida_stats(line):
+    """
+    Show, for each type of message handled by the kernel, the time spent
+    waiting to be dispatched, handling it and sending the reply, and the size
+    of the output of cells.
+
+    Usage:
+        %ipyida_stats [--json] [--reset]
+    """
+    args = line.split()
+    if "--json" in args:
+        print(json.dumps(kernel_stats.as_dict(), indent=2))
+    else:
+        print(kernel_stats.report())
+    if "--reset" in args:
+        kernel_stats.reset()
@@ -0,0 +1,365 @@
+# -*- encoding: utf8 -*-
+#
+# This module keeps an index of the named addresses of the database to
+# symbolicate integers displayed in the IPython console.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import bisect
+import collections
+
+import idaapi
+
+from .changes import dispatcher
+
+def get_ea_bounds():
+    """
+    Wraps getting the min and max ea to use either inf_get_min_ea
+    (IDA >= 7.?) or get_inf_structure (IDA < 7.?)
+
+    Returns: a tuple (min_ea, max_ea)
+    """
+    if hasattr(idaapi, "inf_get_min_ea"):
+        return (
+            idaapi.inf_get_min_ea(),
+            idaapi.inf_get_max_ea()
+        )
+    else:
+        inf = idaapi.get_inf_structure()
+        return ( inf.min_ea, inf.max_ea )
+
+if hasattr(idaapi, "get_flags"):
+    _get_flags = idaapi.get_flags
+else:
+    # IDA < 7.0
+    _get_flags = idaapi.getFlags
+
+# asyncio loop running the timers of this module instead of IDA timers, see
+# set_event_loop
+_loop = None
+
+def set_event_loop(loop):
+    """
+    Run the timers building the name lists on loop, an asyncio event loop,
+    or on IDA timers again if loop is None. IDA timers don't fire while the
+    headless kernel blocks the main thread with its own loop.
+    """
+    global _loop
+    _loop = loop
+
+
+class _LoopTimer(object):
+    "Calls callback on an asyncio loop, following the protocol of IDA timers"
+
+    def __init__(self, loop, interval, callback):
+        self._loop = loop
+        self._callback = callback
+        self._handle = loop.call_later(interval / 1000.0, self._fire)
+
+    def _fire(self):
+        # Milliseconds until the next call, or -1 to stop
+        delay = self._callback()
+        if delay >= 0:
+            self._handle = self._loop.call_later(delay / 1000.0, self._fire)
+
+    def cancel(self):
+        self._handle.cancel()
+
+def _register_timer(interval, callback):
+    if _loop is not None:
+        return _LoopTimer(_loop, interval, callback)
+    return idaapi.register_timer(interval, callback)
+
+def _unregister_timer(timer):
+    if isinstance(timer, _LoopTimer):
+        timer.cancel()
+    else:
+        idaapi.unregister_timer(timer)
+
+
+class NameIndex(object):
+    """
+    Sorted index of the addresses having a name in the database.
+
+    Looking up the closest name preceding an address is a bisect in the index
+    instead of walking the database backward with prev_that. The index is
+    built lazily on the first lookup from IDA's name list and is kept up to
+    date by the changes of the database once `hook` is called.
+    """
+
+    # Number of demangled names to keep around
+    DEMANGLED_CACHE_SIZE = 4096
+
+    def __init__(self):
+        self._eas = None
+        self._bounds = None
+        self._demangled = collections.OrderedDict()
+        self.names = NameList()
+        # Incremented every time a name or a segment changes. Allows users of
+        # the index to cache derived data and know when it becomes stale.
+        self.generation = 0
+
+    def hook(self):
+        dispatcher.subscribe(self)
+        self.names.start_build()
+
+    def unhook(self):
+        dispatcher.unsubscribe(self)
+        self.names.stop_build()
+
+    @property
+    def hooked(self):
+        return dispatcher.is_subscribed(self)
+
+    def invalidate(self):
+        "Drop everything. The index will be rebuilt on the next lookup."
+        self._eas = None
+        self._bounds = None
+        self._demangled.clear()
+        self.generation += 1
+        if dispatcher.is_subscribed(self):
+            self.names.start_build()
+
+    def everything_changed(self):
+        # Names in a deleted segment are gone without a renamed event
+        self.invalidate()
+
+    @property
+    def bounds(self):
+        "Cached result of get_ea_bounds()"
+        if self._bounds is None:
+            self._bounds = get_ea_bounds()
+        return self._bounds
+
+    @property
+    def eas(self):
+        "Sorted list of named addresses"
+        if self._eas is None:
+            get_nlist_ea = idaapi.get_nlist_ea
+            eas = [ get_nlist_ea(i) for i in range(idaapi.get_nlist_size()) ]
+            # The name list is already sorted by address, so this is cheap
+            eas.sort()
+            self._eas = eas
+        return self._eas
+
+    def name_changed(self, ea):
+        "Update the index after the name at `ea` was set or removed"
+        self.generation += 1
+        self._demangled.pop(ea, None)
+        self.names.name_changed(ea)
+        if self._eas is None:
+            return
+        eas = self._eas
+        i = bisect.bisect_left(eas, ea)
+        present = i < len(eas) and eas[i] == ea
+        if idaapi.has_name(_get_flags(ea)):
+            if not present:
+                eas.insert(i, ea)
+        elif present:
+            del eas[i]
+
+    def get_display_name(self, ea):
+        "Return the (demangled if possible) name at ea, using a LRU cache"
+        demangled = self._demangled
+        try:
+            name = demangled.pop(ea)
+        except KeyError:
+            name = idaapi.get_name(ea)
+            long_name = idaapi.demangle_name(name, 0)
+            if long_name and len(long_name) > 0:
+                name = long_name
+            if len(demangled) >= self.DEMANGLED_CACHE_SIZE:
+                demangled.popitem(last=False)
+        demangled[ea] = name
+        return name
+
+    def find(self, ea):
+        """
+        Find the closest named address lower or equal to ea.
+
+        Returns: the named address or idaapi.BADADDR
+        """
+        min_ea, max_ea = self.bounds
+        if ea < min_ea or ea >= max_ea:
+            return idaapi.BADADDR
+        eas = self.eas
+        i = bisect.bisect_right(eas, ea)
+        if i == 0 or eas[i-1] < min_ea:
+            return idaapi.BADADDR
+        return eas[i-1]
+
+    def symbolicate(self, ea):
+        """
+        Returns: a tuple (name, offset) for the closest name before ea or
+        None if there is none.
+        """
+        addr = self.find(ea)
+        if addr == idaapi.BADADDR:
+            return None
+        return (self.get_display_name(addr), ea - addr)
+
+    def symbolicate_many(self, eas):
+        """
+        Same as symbolicate on every element of `eas`, but fetches the bounds
+        and the index only once.
+
+        Returns: a list of (name, offset) tuples or None
+        """
+        min_ea, max_ea = self.bounds
+        index = self.eas
+        bisect_right = bisect.bisect_right
+        get_display_name = self.get_display_name
+        result = []
+        for ea in eas:
+            if ea < min_ea or ea >= max_ea:
+                result.append(None)
+                continue
+            i = bisect_right(index, ea)
+            if i == 0 or index[i-1] < min_ea:
+                result.append(None)
+            else:
+                addr = index[i-1]
+                result.append((get_display_name(addr), ea - addr))
+        return result
+
+
+class NameList(object):
+    """
+    Sorted list of all the names of the database, mangled and demangled, for
+    prefix lookups. Built in small steps from a timer once auto-analysis is
+    done so it doesn't freeze IDA on databases with millions of names.
+    """
+
+    # Number of names processed per timer tick while building
+    BUILD_STEP = 20000
+    MAX_MATCHES = 200
+
+    def __init__(self):
+        self._names = None
+        self._by_ea = {}
+        self._timer = None
+        self._pending = None
+        self._build_position = 0
+        # Highest address read by the build
+        self._build_ea = -1
+        self._changed_during_build = set()
+
+    @property
+    def ready(self):
+        return self._names is not None
+
+    @staticmethod
+    def _names_at(ea):
+        name = idaapi.get_name(ea)
+        if not name:
+            return ()
+        flags = getattr(idaapi, "MNG_SHORT_FORM", 0)
+        demangled = idaapi.demangle_name(name, flags)
+        if demangled and demangled != name:
+            return (name, demangled)
+        return (name,)
+
+    def start_build(self):
+        "(Re)build the list in the background"
+        self.stop_build()
+        self._names = None
+        self._by_ea = {}
+        self._pending = []
+        self._build_position = 0
+        self._build_ea = -1
+        self._changed_during_build = set()
+        self._timer = _register_timer(1000, self._build_step)
+
+    def stop_build(self):
+        if self._timer is not None:
+            _unregister_timer(self._timer)
+            self._timer = None
+
+    def _build_step(self):
+        if not idaapi.auto_is_ok():
+            return 1000
+        get_nlist_ea = idaapi.get_nlist_ea
+        size = idaapi.get_nlist_size()
+        # Names added or removed before the cursor shift the list
+        position = min(self._build_position, size)
+        while position > 0 and get_nlist_ea(position - 1) > self._build_ea:
+            position -= 1
+        while position < size and get_nlist_ea(position) <= self._build_ea:
+            position += 1
+        end = min(position + self.BUILD_STEP, size)
+        for i in range(position, end):
+            ea = get_nlist_ea(i)
+            names = self._names_at(ea)
+            self._by_ea[ea] = names
+            self._pending.extend(names)
+            self._build_ea = ea
+        self._build_position = end
+        if end < size:
+            return 10
+        self._pending.sort()
+        self._names = self._pending
+        self._pending = None
+        self._timer = None
+        changed, self._changed_during_build = self._changed_during_build, set()
+        self._merge_changes(changed)
+        return -1
+
+    def _merge_changes(self, eas):
+        "Update the names of eas in one pass over the list"
+        if not eas:
+            return
+        removed = collections.Counter()
+        added = []
+        for ea in eas:
+            removed.update(self._by_ea.pop(ea, ()))
+            new_names = self._names_at(ea) if idaapi.has_name(_get_flags(ea)) else ()
+            if new_names:
+                self._by_ea[ea] = new_names
+                added.extend(new_names)
+        names = []
+        for name in self._names:
+            if removed[name] > 0:
+                removed[name] -= 1
+            else:
+                names.append(name)
+        names.extend(added)
+        # Mostly sorted already
+        names.sort()
+        self._names = names
+
+    def name_changed(self, ea):
+        if self._names is None:
+            # Names after the cursor are read by the build anyway
+            if self._pending is not None and ea <= self._build_ea:
+                self._changed_during_build.add(ea)
+            return
+        names = self._names
+        for name in self._by_ea.pop(ea, ()):
+            i = bisect.bisect_left(names, name)
+            if i < len(names) and names[i] == name:
+                del names[i]
+        new_names = self._names_at(ea) if idaapi.has_name(_get_flags(ea)) else ()
+        if new_names:
+            self._by_ea[ea] = new_names
+            for name in new_names:
+                bisect.insort(names, name)
+
+    def complete(self, prefix):
+        "Returns: the names starting with prefix, up to MAX_MATCHES"
+        names = self._names
+        if not names:
+            return []
+        start = bisect.bisect_left(names, prefix)
+        result = []
+        for i in range(start, min(start + self.MAX_MATCHES, len(names))):
+            if not names[i].startswith(prefix):
+                break
+            if not result or result[-1] != names[i]:
+                result.append(names[i])
+        return result
+
+
+# Shared by the kernel and the console widget
+name_index = NameIndex()
+
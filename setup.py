@@ -36,6 +36,11 @@ setup(name='ipyida',
           'jupyter-client<6.1.13',
           'nbformat',
       ],
+      entry_points={
+          "console_scripts": [
+              "ipyida=ipyida.__main__:main",
+          ]
+      },
       extras_require={
           "notebook": [
               "notebook<7",
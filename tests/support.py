@@ -0,0 +1,34 @@
+# -*- encoding: utf8 -*-
+#
+# Helpers shared by the tests: the fake idaapi of the benchmarks, installed
+# once for all the tests since IPyIDA's modules keep a reference to it.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import fake_idaapi
+
+_database = None
+
+def install(**kwargs):
+    """
+    Make `import idaapi` return the fake module, backed by a new
+    FakeDatabase(**kwargs).
+
+    Returns: the FakeDatabase
+    """
+    global _database
+    database = fake_idaapi.FakeDatabase(**kwargs)
+    if _database is None:
+        _database = fake_idaapi.install(database)
+    else:
+        # The installed module refers to this object
+        _database.__dict__.update(database.__dict__)
+    return _database
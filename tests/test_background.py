@@ -0,0 +1,76 @@
+# -*- encoding: utf8 -*-
+#
+# Tests of the namespace of ipyida.background cells on the fake idaapi of the
+# benchmarks.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import sys
+import threading
+import types
+import unittest
+
+import support
+
+
+class NamespaceTest(unittest.TestCase):
+
+    def setUp(self):
+        support.install(names=10, segment_size=0x1000)
+        import idaapi
+        from ipyida import background
+        self.idaapi = idaapi
+        self.background = background
+        # The fake execute_sync runs the function in the calling thread
+        self.round_trips = 0
+        execute_sync = idaapi.execute_sync
+        def counting_execute_sync(func, flags):
+            self.round_trips += 1
+            return execute_sync(func, flags)
+        idaapi.execute_sync = counting_execute_sync
+        self.addCleanup(setattr, idaapi, "execute_sync", execute_sync)
+
+        self.helpers = types.ModuleType("helpers")
+        self.helpers.idaapi = idaapi
+        exec("def names(eas): return [ idaapi.get_name(ea) for ea in eas ]",
+             self.helpers.__dict__)
+        self.plain = types.ModuleType("plain")
+        exec("def double(x): return 2 * x", self.plain.__dict__)
+        self.user_ns = dict(idaapi=idaapi, helpers=self.helpers, plain=self.plain)
+        exec("def first_name(): return idaapi.get_name(idaapi.get_nlist_ea(0))",
+             self.user_ns)
+
+    def run_in_worker(self, code):
+        ns = self.background._make_namespace(self.user_ns)
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(value=eval(code, ns)))
+        thread.start()
+        thread.join()
+        return result["value"]
+
+    def test_ida_calls_are_round_trips(self):
+        eas = self.idaapi.database.eas[:3]
+        self.user_ns["eas"] = eas
+        self.run_in_worker("[ idaapi.get_name(ea) for ea in eas ]")
+        self.assertEqual(self.round_trips, 3)
+
+    def test_modules_using_ida_run_on_the_main_thread(self):
+        eas = self.idaapi.database.eas[:3]
+        self.user_ns["eas"] = eas
+        names = self.run_in_worker("helpers.names(eas)")
+        self.assertEqual(names, [ self.idaapi.get_name(ea) for ea in eas ])
+        self.assertEqual(self.round_trips, 1)
+
+    def test_console_functions_run_on_the_main_thread(self):
+        self.assertEqual(self.run_in_worker("first_name()"),
+                         self.idaapi.get_name(self.idaapi.database.eas[0]))
+        self.assertEqual(self.round_trips, 1)
+
+    def test_other_modules_run_in_the_worker(self):
+        self.assertEqual(self.run_in_worker("plain.double(21)"), 42)
+        self.assertEqual(self.round_trips, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# -*- encoding: utf8 -*-
+#
+# Tests of ipyida.bulk on the fake idaapi of the benchmarks.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import unittest
+
+import support
+
+
+class BulkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = support.install(names=50, segment_size=0x1000)
+        import idaapi
+        from ipyida import bulk
+        self.idaapi = idaapi
+        self.bulk = bulk
+
+    def test_get_names(self):
+        db = self.db
+        eas = [ db.eas[3], db.min_ea + 1, db.eas[0], db.eas[3] ]
+        self.assertEqual(self.bulk.get_names(eas),
+                         [ db.names[db.eas[3]], "", db.names[db.eas[0]], db.names[db.eas[3]] ])
+        self.assertEqual(self.bulk.get_names([ db.eas[0] ], demangle=True), [ "Class0::method()" ])
+
+    def test_get_names_only_reads_named_addresses(self):
+        db, idaapi = self.db, self.idaapi
+        read = []
+        get_name = idaapi.get_name
+        idaapi.get_name = lambda ea: read.append(ea) or get_name(ea)
+        self.addCleanup(setattr, idaapi, "get_name", get_name)
+        eas = list(range(db.min_ea, db.max_ea, 2))
+        names = self.bulk.get_names(eas)
+        self.assertEqual(names, [ db.names.get(ea, "") for ea in eas ])
+        self.assertEqual(sorted(read), [ ea for ea in db.eas if ea % 2 == 0 ])
+        del read[:]
+        self.bulk.get_names(eas, dummy=True)
+        self.assertEqual(len(read), len(eas))
+
+    def test_items(self):
+        idaapi = self.idaapi
+        # 8-byte items from min_ea on
+        base = self.db.min_ea
+        items = dict(get_item_head=idaapi.get_item_head, get_item_end=idaapi.get_item_end)
+        calls = []
+        idaapi.get_item_head = lambda ea: calls.append(ea) or base + (ea - base) // 8 * 8
+        idaapi.get_item_end = lambda ea: base + (ea - base) // 8 * 8 + 8
+        for name, func in items.items():
+            self.addCleanup(setattr, idaapi, name, func)
+        eas = [ base + 17, base + 3, base + 0, base + 8, base + 15 ]
+        self.assertEqual(list(self.bulk.get_item_heads(eas)),
+                         [ base + 16, base, base, base + 8, base + 8 ])
+        self.assertEqual(list(self.bulk.get_item_sizes(eas)), [ 7, 5, 8, 8, 1 ])
+        # One lookup per item
+        self.assertEqual(len(calls), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+# -*- encoding: utf8 -*-
+#
+# Tests of ipyida.cache on the fake idaapi of the benchmarks.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import unittest
+
+import support
+
+
+class CacheStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        support.install(names=10, segment_size=0x1000)
+        from ipyida import cache
+        self.cache = cache
+
+    def store(self, **kwargs):
+        return self.cache.CacheStore(**kwargs)
+
+    def put(self, store, key, value, depends=None):
+        store.put(("f", key), "f", value, depends or self.cache.KINDS)
+
+    def test_evicts_least_recently_used_entries(self):
+        store = self.store(max_entries=3)
+        for key in range(3):
+            self.put(store, key, key)
+        # 0 becomes the most recently used
+        self.assertEqual(store.get(("f", 0), "f"), (True, 0))
+        self.put(store, 3, 3)
+        self.assertEqual(store.get(("f", 1), "f"), (False, None))
+        for key in (0, 2, 3):
+            self.assertEqual(store.get(("f", key), "f"), (True, key))
+        info = store.info("f")
+        self.assertEqual((info.evictions, info.entries), (1, 3))
+
+    def test_evicts_by_size(self):
+        value = b"x" * 1000
+        size = self.cache.estimate_size(value)
+        store = self.store(max_size=3 * size)
+        for key in range(5):
+            self.put(store, key, value)
+        info = store.info()
+        self.assertEqual((info.entries, info.size, info.evictions), (3, 3 * size, 2))
+        self.assertEqual(store.get(("f", 1), "f"), (False, None))
+        self.assertEqual(store.get(("f", 4), "f"), (True, value))
+
+    def test_values_larger_than_the_cache_are_not_stored(self):
+        store = self.store(max_size=100)
+        self.put(store, 0, b"x" * 1000)
+        self.assertEqual(store.info().entries, 0)
+
+    def test_replacing_an_entry_keeps_the_size(self):
+        store = self.store()
+        self.put(store, 0, b"x" * 1000)
+        self.put(store, 0, b"y" * 10)
+        self.assertEqual(store.info().size, self.cache.estimate_size(b"y" * 10))
+
+    def test_changes_only_drop_dependent_entries(self):
+        cache = self.cache
+        store = self.store()
+        self.put(store, "names", 1, [ cache.NAMES ])
+        self.put(store, "xrefs", 2, [ cache.XREFS ])
+        store.name_changed(0x401000)
+        self.assertEqual(store.get(("f", "names"), "f"), (False, None))
+        self.assertEqual(store.get(("f", "xrefs"), "f"), (True, 2))
+        store.everything_changed()
+        self.assertEqual(store.get(("f", "xrefs"), "f"), (False, None))
+        self.assertEqual(store.info().stale, 2)
+
+
+class MemoizeTest(unittest.TestCase):
+
+    def setUp(self):
+        support.install(names=10, segment_size=0x1000)
+        from ipyida import cache
+        from ipyida.changes import dispatcher
+        self.cache = cache
+        self.dispatcher = dispatcher
+        self.addCleanup(cache.store.unhook)
+
+    def test_memoize(self):
+        calls = []
+        @self.cache.memoize(self.cache.BYTES)
+        def read(ea):
+            calls.append(ea)
+            return ea + 1
+        self.assertEqual([ read(1), read(1), read(2) ], [ 2, 2, 3 ])
+        self.assertEqual(calls, [ 1, 2 ])
+        self.assertTrue(self.cache.store.hooked)
+        self.dispatcher.dispatch("name_changed", 1)
+        read(1)
+        self.assertEqual(calls, [ 1, 2 ])
+        self.dispatcher.dispatch("bytes_changed", 1)
+        read(1)
+        self.assertEqual(calls, [ 1, 2, 1 ])
+        self.assertEqual(read.cache_info().hits, 2)
+
+    def test_unhashable_arguments_are_not_cached(self):
+        calls = []
+        @self.cache.memoize()
+        def total(values):
+            calls.append(values)
+            return sum(values)
+        self.assertEqual([ total([ 1, 2 ]), total([ 1, 2 ]) ], [ 3, 3 ])
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*- encoding: utf8 -*-
+#
+# Tests of ipyida.hexdump and of the display of bytes in the kernel.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import unittest
+
+import support
+from ipyida import hexdump
+
+
+class Printer(object):
+    "Collects what a formatter prints, like IPython's pretty printer"
+
+    def __init__(self):
+        self.parts = []
+
+    def text(self, text):
+        self.parts.append(text)
+
+
+class HexdumpTest(unittest.TestCase):
+
+    def test_format_lines(self):
+        self.assertEqual(
+            hexdump.format_lines(b"ABC\x00\xff" + b"x" * 11 + b"y", 0x1000),
+            "00001000: 41 42 43 00 FF 78 78 78  78 78 78 78 78 78 78 78 |ABC .xxxxxxxxxxx|\n"
+            "00001010: 79{:s}  {:23s} |y{:15s}|\n".format(" " * 21, "", "")
+        )
+
+    def test_render_elides_the_middle(self):
+        data = bytes(bytearray(range(256))) * 64
+        text = hexdump.render(data, head_lines=2, tail_lines=1)
+        lines = text.splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith("00000000: 00 01"))
+        self.assertIn("{:d} (0x{:X}) bytes elided".format(len(data) - 48, len(data) - 48), lines[2])
+        self.assertTrue(lines[3].startswith("{:08X}: F0 F1".format(len(data) - 16)))
+
+    def test_render_without_truncation(self):
+        data = b"\x01" * 100
+        self.assertEqual(hexdump.render(data, head_lines=None, tail_lines=None),
+                         hexdump.format_lines(data))
+        self.assertEqual(len(hexdump.render(data).splitlines()), 7)
+
+    def test_render_memoryviews(self):
+        data = bytes(bytearray(range(64)))
+        view = memoryview(data)
+        self.assertEqual(hexdump.render(view), hexdump.render(data))
+        # Not contiguous
+        self.assertEqual(hexdump.render(view[::2]), hexdump.render(data[::2]))
+        self.assertEqual(hexdump.render(view.cast("I")), hexdump.render(data))
+
+    def test_pager(self):
+        data = b"\x00" * 1000
+        pager = hexdump.HexdumpPager(data, lines_per_page=4, base=0x400000)
+        self.assertEqual(len(pager), 16)
+        self.assertTrue(str(pager.next()).startswith("00400000:"))
+        self.assertTrue(str(pager.seek(0x400100)).startswith("00400100:"))
+        self.assertEqual(len(str(pager.page(-1)).splitlines()), 3)
+        self.assertRaises(IndexError, pager.page, 16)
+
+
+class PrintBytesTest(unittest.TestCase):
+
+    def setUp(self):
+        support.install(names=10, segment_size=0x1000)
+        try:
+            from ipyida import kernel
+        except ImportError as e:
+            self.skipTest("ipyida.kernel can't be imported: {}".format(e))
+        self.print_bytes = kernel.IPythonKernel.print_bytes
+
+    def printed(self, obj):
+        printer = Printer()
+        self.print_bytes(obj, printer, False)
+        return "".join(printer.parts)
+
+    def test_printable(self):
+        self.assertEqual(self.printed(b"hello"), "b'hello'")
+        self.assertEqual(self.printed(memoryview(b"hello")), "b'hello'")
+
+    def test_binary(self):
+        data = b"\x00\x01hello"
+        self.assertEqual(self.printed(memoryview(data)), hexdump.render(data))
+        self.assertEqual(self.printed(memoryview(data)[::2]), hexdump.render(data[::2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# -*- encoding: utf8 -*-
+#
+# Tests of the batching of the output written to IDA's console by
+# ipyida.kernel, on the fake idaapi of the benchmarks.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import unittest
+
+import support
+
+try:
+    support.install(names=10, segment_size=0x1000)
+    from ipyida import kernel
+except ImportError:
+    # ipykernel is missing
+    kernel = None
+
+
+class Stream(object):
+    "Stands for IDA's sys.stdout or sys.stderr, records every write call"
+
+    def __init__(self, name, writes):
+        self.name = name
+        self.writes = writes
+
+    def write(self, string):
+        self.writes.append((self.name, string))
+
+
+@unittest.skipIf(kernel is None, "ipyida.kernel can't be imported")
+class ConsoleWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        options = dict(kernel._tee_options)
+        self.addCleanup(kernel._tee_options.update, options)
+        self.writes = []
+        self.out = Stream("out", self.writes)
+        self.err = Stream("err", self.writes)
+        self.writer = kernel._IDAConsoleWriter()
+
+    def test_writes_are_batched_in_order(self):
+        kernel.set_tee_options(dict(flush_interval=60))
+        for stream, string in ((self.out, "a"), (self.out, "b\n"),
+                               (self.err, "c\n"), (self.out, "d")):
+            self.writer.write(stream, string)
+        self.assertEqual(self.writes, [])
+        self.writer.flush()
+        self.assertEqual(self.writes, [ ("out", "ab\n"), ("err", "c\n"), ("out", "d") ])
+
+    def test_flush_size(self):
+        kernel.set_tee_options(dict(flush_interval=60, flush_size=10))
+        self.writer.write(self.out, "12345")
+        self.assertEqual(self.writes, [])
+        self.writer.write(self.out, "67890")
+        self.assertEqual(self.writes, [ ("out", "1234567890") ])
+
+    def test_unbuffered(self):
+        kernel.set_tee_options(dict(buffered=False))
+        self.writer.write(self.out, "a")
+        self.assertEqual(self.writes, [ ("out", "a") ])
+
+    def test_rate_limit(self):
+        kernel.set_tee_options(dict(buffered=False, max_lines_per_second=3))
+        # All the writes happen in the same second
+        clock = kernel.time
+        kernel.time = type("Clock", (object,), dict(time=staticmethod(lambda: 1000.5)))
+        self.addCleanup(setattr, kernel, "time", clock)
+        for i in range(5):
+            self.writer.write(self.out, "{:d}\n".format(i))
+        self.assertEqual(self.writes, [ ("out", "0\n"), ("out", "1\n"), ("out", "2\n") ])
+        self.assertEqual(self.writer.dropped_lines, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+# -*- encoding: utf8 -*-
+#
+# Tests of ipyida.pool with stub kernels, runnable without IDA:
+#
+#   python -m unittest discover tests
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from ipyida import pool
+except ImportError as e:
+    # jupyter_client is missing
+    pool = None
+    _import_error = str(e)
+
+
+class StubKernel(object):
+    """
+    Stands for pool.Kernel: calls the task function locally after `delay`
+    seconds, and raises KernelDied from its `dies_after`-th call on.
+    """
+
+    def __init__(self, name, delay=0.0, dies_after=None):
+        self.name = name
+        self.delay = delay
+        self.dies_after = dies_after
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _run(self, func):
+        with self.lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.delay)
+        if self.dies_after is not None and calls > self.dies_after:
+            raise pool.KernelDied("{:s} died".format(self.name))
+        return func(), ""
+
+    def call(self, func, args=(), kwargs=None, timeout=None):
+        return self._run(lambda: func(*args, **(kwargs or {})))
+
+    def run_cell(self, code, timeout=None):
+        return self._run(lambda: self.name)
+
+    def close(self):
+        pass
+
+
+def square(x):
+    return x * x
+
+
+def _collect(iterator, timeout=5):
+    "Returns: the items of iterator, failing if it takes more than timeout"
+    items = []
+    def consume():
+        items.extend(iterator)
+    thread = threading.Thread(target=consume)
+    thread.daemon = True
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise AssertionError("The pool did not complete in {:d} s".format(timeout))
+    return items
+
+
+@unittest.skipIf(pool is None, "ipyida.pool can't be imported")
+class PoolTest(unittest.TestCase):
+
+    def test_map_keeps_the_order_of_items(self):
+        kernels = [ StubKernel("A", 0.01), StubKernel("B", 0.003) ]
+        p = pool.Pool(kernels=kernels)
+        self.assertEqual(p.map(square, range(20)), [ x * x for x in range(20) ])
+        self.assertEqual(p.stats.completed, 20)
+        self.assertEqual(sum(k.calls for k in kernels), 20)
+
+    def test_imap_yields_every_item(self):
+        p = pool.Pool(kernels=[ StubKernel("A"), StubKernel("B") ])
+        results = _collect(p.imap(square, range(10)))
+        self.assertEqual(sorted(r.item for r in results), list(range(10)))
+        self.assertTrue(all(r.error is None and r.value == r.item ** 2 for r in results))
+
+    def test_retry_on_another_kernel(self):
+        dying = StubKernel("A", 0.01, dies_after=0)
+        p = pool.Pool(kernels=[ dying, StubKernel("B", 0.001) ], retries=1)
+        results = _collect(p.imap(square, range(5)))
+        self.assertEqual(sorted(r.value for r in results), [ x * x for x in range(5) ])
+        self.assertTrue(all(r.error is None and r.kernel == "B" for r in results))
+        self.assertEqual(p.stats.retried, 1)
+
+    def test_requeued_item_after_queue_drained(self):
+        # B empties the queue and would leave before A dies and puts its
+        # item back
+        dying = StubKernel("A", 0.3, dies_after=0)
+        p = pool.Pool(kernels=[ dying, StubKernel("B") ], retries=1)
+        results = _collect(p.imap(square, range(3)))
+        self.assertEqual(sorted(r.value for r in results), [ 0, 1, 4 ])
+        self.assertTrue(all(r.error is None for r in results))
+
+    def test_no_kernel_left(self):
+        p = pool.Pool(kernels=[ StubKernel("A", dies_after=0) ], retries=1)
+        results = _collect(p.imap(square, range(3)))
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(r.error is not None for r in results))
+
+    def test_broadcast_runs_once_per_kernel(self):
+        kernels = [ StubKernel("A"), StubKernel("B", 0.05), StubKernel("C", 0.02) ]
+        p = pool.Pool(kernels=kernels)
+        results = _collect(p.broadcast("get_root_filename()"))
+        self.assertEqual(sorted(r.value for r in results), [ "A", "B", "C" ])
+        self.assertEqual([ k.calls for k in kernels ], [ 1, 1, 1 ])
+
+    def test_broadcast_is_not_retried_elsewhere(self):
+        kernels = [ StubKernel("A", dies_after=0), StubKernel("B") ]
+        p = pool.Pool(kernels=kernels, retries=3)
+        results = _collect(p.broadcast("pass"))
+        errors = dict((r.kernel, r.error) for r in results)
+        self.assertIsNotNone(errors["A"])
+        self.assertIsNone(errors["B"])
+        self.assertEqual(kernels[1].calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
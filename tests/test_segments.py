@@ -0,0 +1,74 @@
+# -*- encoding: utf8 -*-
+#
+# Tests of ipyida.segments on the fake idaapi of the benchmarks.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import unittest
+
+import support
+
+
+class SegmentBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = support.install(names=10, segment_size=0x48000)
+        from ipyida import segments
+        self.segments = segments
+        self.cache = segments.SegmentBufferCache()
+        self.buf = self.cache.get(".text")
+
+    def patch(self, ea, value):
+        db = self.db
+        offset = ea - db.min_ea
+        db.data = db.data[:offset] + bytes([ value ]) + db.data[offset+1:]
+        self.cache.bytes_changed(ea)
+
+    def test_slicing(self):
+        buf, data = self.buf, self.db.data
+        self.assertEqual(len(buf), len(data))
+        self.assertEqual(buf[5], data[5])
+        self.assertEqual(buf[-1], data[-1])
+        for key in (slice(0x100, 0x200), slice(0xfff0, 0x10010), slice(0, None),
+                    slice(0x10, 0x30000, 3), slice(None, None, -7), slice(0x20, 0x10)):
+            self.assertEqual(bytes(buf[key]), data[key], key)
+        self.assertEqual(bytes(buf.at(self.db.min_ea + 0x10000, 4)), data[0x10000:0x10004])
+        self.assertRaises(IndexError, lambda: buf[len(data)])
+        self.assertTrue(buf[0:16].readonly)
+
+    def test_views_share_memory(self):
+        # Within a chunk
+        self.assertIs(self.buf[0:16].obj, self.buf[16:32].obj)
+        # Across chunks, until a chunk is invalidated
+        whole = self.buf.view()
+        self.assertIs(whole.obj, self.buf.view().obj)
+        self.assertIs(whole.obj, self.buf[0x100:0x20000].obj)
+        self.patch(self.db.min_ea + 0x30000, 0x42)
+        self.assertIsNot(whole.obj, self.buf.view().obj)
+        self.assertEqual(self.buf.view()[0x30000], 0x42)
+
+    def test_patch(self):
+        view = self.buf[0:16]
+        self.patch(self.db.min_ea + 3, 0xaa)
+        self.assertEqual(self.buf[3], 0xaa)
+        # The view of the chunk shows the new content
+        self.assertEqual(view[3], 0xaa)
+
+    def test_chunks_are_lazy(self):
+        self.buf[0x20000]
+        self.assertEqual(list(self.buf._chunks), [ 2 ])
+
+    def test_segment_change_detaches(self):
+        self.buf.view()
+        self.cache.everything_changed()
+        self.assertTrue(self.buf.detached)
+        self.assertIsNot(self.cache.get(".text"), self.buf)
+        self.patch(self.db.min_ea, 0x17)
+        # Detached buffers read the database every time
+        self.assertEqual(self.buf[0], 0x17)
+        self.assertEqual(self.buf.view()[0], 0x17)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+# -*- encoding: utf8 -*-
+#
+# Tests of ipyida.symbols on the fake idaapi of the benchmarks.
+#
+# Copyright (c) 2026 ESET
+# See LICENSE file for redistribution.
+
+import bisect
+import unittest
+
+import support
+
+
+class NameListTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = support.install(names=5000, segment_size=1 << 20)
+        from ipyida import symbols
+        self.symbols = symbols
+        self.names = symbols.NameList()
+        self.names.BUILD_STEP = 1000
+
+    def expected(self):
+        "Returns: the list built from scratch from the database"
+        fresh = self.symbols.NameList()
+        fresh.BUILD_STEP = len(self.db.eas) + 1
+        fresh.start_build()
+        fresh._build_step()
+        return fresh._names
+
+    def build(self, steps=None):
+        "Run the build, or only `steps` steps of it"
+        if self.names._pending is None:
+            self.names.start_build()
+        while steps is None or steps > 0:
+            if self.names._build_step() < 0:
+                break
+            if steps is not None:
+                steps -= 1
+
+    def rename(self, ea, name):
+        db = self.db
+        if name is None:
+            del db.names[ea]
+            db.eas.remove(ea)
+        else:
+            if ea not in db.names:
+                bisect.insort(db.eas, ea)
+            db.names[ea] = name
+        self.names.name_changed(ea)
+
+    def test_build(self):
+        self.build()
+        self.assertTrue(self.names.ready)
+        self.assertEqual(self.names._names, self.expected())
+        self.assertIn("Class4::method()", self.names.complete("Class4::"))
+        self.assertEqual(self.names.complete("sub_"), self.expected()[
+            bisect.bisect_left(self.expected(), "sub_"):][:self.names.MAX_MATCHES])
+
+    def test_build_on_event_loop(self):
+        import asyncio
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        self.symbols.set_event_loop(loop)
+        self.addCleanup(self.symbols.set_event_loop, None)
+        self.names.start_build()
+        async def wait():
+            while not self.names.ready:
+                await asyncio.sleep(0.05)
+        loop.run_until_complete(asyncio.wait_for(wait(), 10))
+        self.assertEqual(self.names._names, self.expected())
+
+    def test_rename_after_build(self):
+        self.build()
+        ea = self.db.eas[10]
+        self.rename(ea, "renamed")
+        self.rename(self.db.eas[20], None)
+        self.rename(self.db.min_ea + 2, "new_name")
+        self.assertEqual(self.names._names, self.expected())
+        self.assertEqual(self.names.complete("renamed"), [ "renamed" ])
+
+    def test_changes_during_build(self):
+        self.build(steps=2)
+        cursor = self.names._build_ea
+        eas = list(self.db.eas)
+        # Before the cursor: renamed, removed (shifting the list) and added
+        for ea in eas[:1500:3]:
+            self.rename(ea, "before_{:X}".format(ea))
+        for ea in eas[1:1500:7]:
+            self.rename(ea, None)
+        self.rename(self.db.min_ea + 2, "added_first")
+        # After the cursor, read by the build anyway
+        for ea in eas[3000::5]:
+            self.rename(ea, "after_{:X}".format(ea))
+        self.assertTrue(all(ea <= cursor for ea in self.names._changed_during_build))
+        self.assertTrue(all(ea > cursor for ea in eas[3000::5]))
+        self.build()
+        self.assertEqual(self.names._names, self.expected())
+
+    def test_changes_before_build_started(self):
+        self.names.start_build()
+        for ea in list(self.db.eas)[::2]:
+            self.rename(ea, "early_{:X}".format(ea))
+        # Nothing read yet, nothing to replay
+        self.assertEqual(self.names._changed_during_build, set())
+        self.build()
+        self.assertEqual(self.names._names, self.expected())
+
+
+class NameIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = support.install(names=1000, segment_size=1 << 20)
+        from ipyida import symbols
+        self.index = symbols.NameIndex()
+
+    def test_symbolicate(self):
+        ea = self.db.eas[100]
+        name = self.index.get_display_name(ea)
+        self.assertEqual(self.index.symbolicate(ea + 1), (name, 1))
+        self.assertEqual(self.index.symbolicate_many([ ea, self.db.max_ea ]), [ (name, 0), None ])
+        self.assertIsNone(self.index.symbolicate(self.db.min_ea - 1))
+
+
+if __name__ == "__main__":
+    unittest.main()